@@ -0,0 +1,228 @@
+"""
+Streamed multi-table archives (ZIP or tar) for whole-database exports.
+
+A ParallelExport reads several tables at once on a small thread pool, each
+into its own anonymous temporary file, and hands the finished files over
+in completion order. iter_archive() appends them to a ZIP or tar stream as
+they arrive, so the download starts with the first finished table and
+memory holds no more than one copy buffer. Archive members have to be
+written one after another, which is why tables are spooled rather than
+interleaved.
+
+ZIP members use data descriptors and ZIP64, so the archive is written to a
+non-seekable stream without knowing sizes in advance. Tar members are
+written by hand (a PAX header, the data, padding), which keeps each member
+a sequence of small chunks instead of one blocking copy.
+"""
+import json
+import logging
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from export_engine import ExportCancelled
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER = 1024 * 1024
+
+
+class SnapshotMember:
+    """One table of a ParallelExport, spooled to a temporary file once it is done"""
+
+    def __init__(self, table, filename, cancelled):
+        self.table = table
+        self.filename = filename
+        self.spool = None
+        self.size = 0
+        self.rows = None
+        self.seconds = None
+        self.error = None
+        self._reader = None
+        self._cancelled = cancelled
+
+    def track(self, reader):
+        """Attach the member's reader so that ParallelExport.cancel() can stop it"""
+        self._reader = reader
+        if self._cancelled.is_set():
+            reader.cancel()
+            raise ExportCancelled()
+
+
+class ParallelExport:
+    """
+    Exports tables concurrently, one connection per table and at most
+    `workers` tables at a time.
+
+    - members:      (table, filename) pairs
+    - export_table: export_table(member, spool) writes member.table to the
+                    binary file spool, calling member.track(reader) so the
+                    export can be cancelled, and returns its row count
+
+    Iterating yields SnapshotMembers in completion order; a member whose
+    export failed carries .error and no spool. cancel() (also run when the
+    consumer stops early) skips queued tables and cancels running ones.
+    """
+
+    def __init__(self, members, export_table, workers=4):
+        self._cancelled = threading.Event()
+        self.members = [SnapshotMember(table, filename, self._cancelled) for table, filename in members]
+        self.workers = max(1, workers)
+        self._export_table = export_table
+        self._executor = None
+
+    def _run(self, member):
+        if self._cancelled.is_set():
+            raise ExportCancelled()
+        started = time.perf_counter()
+        spool = tempfile.TemporaryFile(prefix='udbm_snapshot_')
+        try:
+            member.rows = self._export_table(member, spool)
+            if self._cancelled.is_set():
+                raise ExportCancelled()
+            member.size = spool.tell()
+            spool.seek(0)
+            member.spool, spool = spool, None
+        except ExportCancelled:
+            raise
+        except Exception as e:
+            if self._cancelled.is_set():
+                raise ExportCancelled()
+            logger.warning(f"Snapshot export of {member.table} failed: {e}")
+            member.error = str(e)
+        finally:
+            member.seconds = time.perf_counter() - started
+            member._reader = None
+            if spool is not None:
+                spool.close()
+        return member
+
+    def __iter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='udbm-snapshot')
+        futures = [self._executor.submit(self._run, member) for member in self.members]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            self.cancel()
+            for member in self.members:
+                if member.spool is not None:
+                    member.spool.close()
+
+    def cancel(self):
+        self._cancelled.set()
+        for member in self.members:
+            reader = member._reader
+            if reader is not None:
+                reader.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object whose output is collected in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _copy_chunks(source, write):
+    while True:
+        data = source.read(COPY_BUFFER)
+        if not data:
+            return
+        write(data)
+        yield
+
+
+def iter_archive(export, archive_format, compress_members=True, manifest=None):
+    """
+    Yield the bytes of a ZIP or tar archive holding every member of export
+    (a ParallelExport) as it completes. A final _manifest.json lists each
+    table with its row count, or the error that kept it out of the archive;
+    manifest adds extra top-level fields to it.
+    """
+    if archive_format not in ('zip', 'tar'):
+        raise ValueError(f'Unsupported archive format: {archive_format}')
+    sink = _ChunkSink()
+    archive = None
+    if archive_format == 'zip':
+        archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED if compress_members
+                                  else zipfile.ZIP_STORED, allowZip64=True)
+    entries = []
+
+    def add(name, source, size):
+        if archive is not None:
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for _ in _copy_chunks(source, member.write):
+                    yield sink.take()
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = int(time.time())
+            sink.write(info.tobuf(format=tarfile.PAX_FORMAT))
+            for _ in _copy_chunks(source, sink.write):
+                yield sink.take()
+            remainder = size % tarfile.BLOCKSIZE
+            if remainder:
+                sink.write(b'\0' * (tarfile.BLOCKSIZE - remainder))
+        yield sink.take()
+
+    try:
+        for member in export:
+            entry = {'table': member.table, 'file': None, 'rows': member.rows, 'bytes': member.size,
+                     'seconds': round(member.seconds or 0, 3)}
+            if member.error is not None:
+                entry['error'] = member.error
+            else:
+                entry['file'] = member.filename
+                try:
+                    yield from add(member.filename, member.spool, member.size)
+                finally:
+                    member.spool.close()
+            entries.append(entry)
+
+        data = json.dumps(dict(manifest or {}, tables=sorted(entries, key=lambda e: e['table'])),
+                          indent=2, default=str).encode('utf-8')
+        yield from add('_manifest.json', _BytesSource(data), len(data))
+        if archive is not None:
+            archive.close()
+        else:
+            # End-of-archive marker, padded to a full record like tarfile does
+            sink.write(b'\0' * (tarfile.BLOCKSIZE * 2))
+            remainder = sink.tell() % tarfile.RECORDSIZE
+            if remainder:
+                sink.write(b'\0' * (tarfile.RECORDSIZE - remainder))
+        yield sink.take()
+    finally:
+        export.cancel()
+
+
+class _BytesSource:
+    def __init__(self, data):
+        self._data = data
+
+    def read(self, size):
+        data, self._data = self._data[:size], self._data[size:]
+        return data
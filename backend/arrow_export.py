@@ -0,0 +1,189 @@
+"""
+Columnar exports (Parquet and Arrow IPC) through the optional pyarrow package.
+
+Rows are read in batches from an export reader (see export_engine.py) and
+converted column by column into typed Arrow record batches: one converter
+per column, chosen once from the cursor description, so integers, decimals,
+booleans, dates and timestamps keep their types and only JSON, text and
+unknown types become strings. Batches are written incrementally, so memory
+stays bounded by a row group however large the result is.
+
+The schema is fixed by the first batch. A value in a later batch that does
+not fit its column's type is written as NULL and counted, and the export
+goes on; write_arrow logs how many values were replaced.
+
+- parquet: a Parquet file (zstd), one row group per `row_group_size` rows
+- arrow:   an Arrow IPC stream (optionally compressed), one record batch
+           per fetched batch
+"""
+import datetime
+import json
+import logging
+
+from export_engine import column_kinds
+
+logger = logging.getLogger(__name__)
+
+ARROW_FORMATS = ('parquet', 'arrow')
+
+MYSQL_LONGLONG, MYSQL_UNSIGNED_FLAG = 8, 32
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError('Parquet and Arrow exports need the pyarrow package (pip install pyarrow)')
+    return pyarrow
+
+
+def _arrow_type(pa, kind, column, db_type):
+    if kind == 'integer':
+        # BIGINT UNSIGNED goes up to 2**64 - 1; mysql-connector reports the column flags after null_ok
+        if db_type != 'postgresql' and column[1] == MYSQL_LONGLONG and len(column) > 7 \
+                and (column[7] or 0) & MYSQL_UNSIGNED_FLAG:
+            return pa.uint64()
+        return pa.int64()
+    if kind == 'number':
+        # PostgreSQL reports numeric(p, s); unconstrained numerics and MySQL decimals become doubles
+        precision, scale = getattr(column, 'precision', None), getattr(column, 'scale', None)
+        if db_type == 'postgresql' and column[1] == 1700 and precision and 0 < precision <= 38 \
+                and scale is not None and 0 <= scale <= precision:
+            return pa.decimal128(precision, scale)
+        return pa.float64()
+    if kind == 'bool':
+        return pa.bool_()
+    if kind == 'date':
+        return pa.date32()
+    if kind == 'datetime':
+        # timestamptz values arrive time zone aware and are stored as UTC
+        return pa.timestamp('us', tz='UTC') if db_type == 'postgresql' and column[1] == 1184 else pa.timestamp('us')
+    if kind == 'time':
+        return pa.time64('us')
+    if kind == 'binary':
+        return pa.binary()
+    return pa.string()
+
+
+class BatchConverter:
+    """
+    Turns lists of row tuples into pyarrow RecordBatches with a fixed schema.
+
+    A column whose first batch does not fit the type its description
+    suggests (a MySQL zero date read as text, mixed JSON) is stored as text
+    instead. The schema cannot change after that, so in later batches only
+    the values that do not fit become NULL; `replaced` counts them per
+    column.
+    """
+
+    def __init__(self, description, db_type, format_text):
+        self.pa = require_pyarrow()
+        self.format_text = format_text
+        self.names = [column[0] for column in description]
+        self.kinds = column_kinds(description, db_type)
+        self.types = [_arrow_type(self.pa, kind, column, db_type) for kind, column in zip(self.kinds, description)]
+        self.replaced = {}
+        self._settled = False
+
+    @property
+    def schema(self):
+        return self.pa.schema(list(zip(self.names, self.types)))
+
+    def _prepare(self, kind, arrow_type, values):
+        if arrow_type == self.pa.string():
+            format_text = self.format_text
+            if kind == 'json':
+                return [v if v is None or isinstance(v, str) else json.dumps(v, ensure_ascii=False) for v in values]
+            return [v if v is None or type(v) is str else format_text(v) for v in values]
+        if kind == 'binary':
+            return [None if v is None else bytes(v) for v in values]
+        if arrow_type == self.pa.float64():
+            # Decimals (unconstrained numerics, MySQL DECIMAL) are not converted implicitly
+            return [v if v is None or type(v) is float else float(v) for v in values]
+        if kind == 'datetime' and arrow_type.tz is None:
+            # Naive timestamps; a stray aware value would otherwise fail the whole batch
+            return [v.replace(tzinfo=None) if isinstance(v, datetime.datetime) and v.tzinfo else v for v in values]
+        return values
+
+    def _fit(self, i, values):
+        """Convert a column value by value, replacing the values its settled type cannot hold with NULL"""
+        pa, kind, arrow_type = self.pa, self.kinds[i], self.types[i]
+        fitted = []
+        for value in values:
+            try:
+                prepared = self._prepare(kind, arrow_type, [value])
+                pa.array(prepared, type=arrow_type)
+                fitted.append(prepared[0])
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+                fitted.append(None)
+                self.replaced[self.names[i]] = self.replaced.get(self.names[i], 0) + 1
+        return pa.array(fitted, type=arrow_type)
+
+    def convert(self, rows):
+        pa = self.pa
+        columns = list(zip(*rows)) if rows else [()] * len(self.names)
+        arrays = []
+        for i, values in enumerate(columns):
+            kind, arrow_type = self.kinds[i], self.types[i]
+            try:
+                arrays.append(pa.array(self._prepare(kind, arrow_type, values), type=arrow_type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+                if arrow_type == pa.string():
+                    raise
+                if self._settled:
+                    arrays.append(self._fit(i, values))
+                    continue
+                self.types[i] = pa.string()
+                arrays.append(pa.array(self._prepare(kind, pa.string(), values), type=pa.string()))
+        self._settled = True
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+def write_arrow(reader, target, export_format, db_type, format_text, compression=None, row_group_size=65536):
+    """
+    Write every row of reader as Parquet or an Arrow IPC stream to target (a
+    path or a binary file object). compression defaults to zstd for Parquet
+    and none for Arrow streams. Returns the number of rows written.
+    """
+    pa = require_pyarrow()
+    writer = None
+    try:
+        if reader.description is None:
+            reader.open()
+        converter = BatchConverter(reader.description, db_type, format_text)
+        pending, pending_rows, written = [], 0, 0
+
+        def open_writer(schema):
+            if export_format == 'parquet':
+                return pa.parquet.ParquetWriter(target, schema, compression=compression or 'zstd')
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            return pa.ipc.new_stream(target, schema, options=options)
+
+        for rows in reader.batches():
+            batch = converter.convert(rows)
+            if writer is None:
+                writer = open_writer(batch.schema)
+            written += len(rows)
+            if export_format != 'parquet':
+                writer.write_batch(batch)
+                continue
+            # Fetched batches are small; collect them into row groups of a useful size
+            pending.append(batch)
+            pending_rows += len(rows)
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.Table.from_batches(pending))
+                pending, pending_rows = [], 0
+        if writer is None:
+            writer = open_writer(converter.schema)
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending))
+        if converter.replaced:
+            logger.warning(f"{export_format} export wrote NULL for values that did not fit their column: "
+                           + ', '.join(f'{name} ({count})' for name, count in converter.replaced.items()))
+        return written
+    finally:
+        if writer is not None:
+            writer.close()
+        reader.close()
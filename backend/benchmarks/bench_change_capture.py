@@ -0,0 +1,106 @@
+"""
+Benchmark: LISTEN/NOTIFY change capture vs. timed polling (PostgreSQL).
+
+Measures how long a committed INSERT takes to reach a PgChangeListener,
+the write overhead of the notify trigger, and how many queries N idle
+views cost per minute when polled versus when driven by notifications.
+
+Creates a scratch table udbm_bench_notify in the target database and drops
+it (and its trigger) afterwards. Use a scratch database.
+
+    python benchmarks/bench_change_capture.py --type postgresql --user postgres \\
+        --password secret --database scratch --views 50 --interval-ms 1000
+"""
+import statistics
+import threading
+import time
+
+from bench_common import connect, connection_config, make_parser, measure, print_table
+
+from pg_notify_cdc import PgChangeListener, install_triggers, uninstall_triggers
+
+TABLE = 'udbm_bench_notify'
+
+
+def insert_rows(connection, count):
+    cursor = connection.cursor()
+    for _ in range(count):
+        cursor.execute(f"INSERT INTO {TABLE} (v) VALUES ('x')")
+        connection.commit()
+    cursor.close()
+
+
+def notify_latencies(connection, config, samples):
+    """Seconds from commit to on_change() for each of samples INSERTs"""
+    received = threading.Event()
+    ready = threading.Event()
+    listener = PgChangeListener(
+        connect=lambda: connect(config),
+        on_change=lambda table_name, operation: received.set() if table_name == TABLE else None,
+        on_status=lambda connected: ready.set() if connected else None,
+    )
+    listener.start()
+    ready.wait(10)
+    cursor = connection.cursor()
+    latencies = []
+    try:
+        for _ in range(samples):
+            received.clear()
+            cursor.execute(f"INSERT INTO {TABLE} (v) VALUES ('x')")
+            start = time.perf_counter()
+            connection.commit()
+            if received.wait(5):
+                latencies.append(time.perf_counter() - start)
+    finally:
+        cursor.close()
+        listener.stop()
+    return latencies
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, default=200, help='INSERTs timed for notification latency')
+    parser.add_argument('--writes', type=int, default=500, help='INSERTs timed for trigger overhead')
+    parser.add_argument('--views', type=int, default=50, help='Idle views watched by the dashboard')
+    parser.add_argument('--interval-ms', type=int, default=1000, help='Polling interval of each view')
+    args = parser.parse_args()
+
+    config = connection_config(args)
+    if config['db_type'] != 'postgresql':
+        parser.error('LISTEN/NOTIFY change capture requires --type postgresql')
+
+    connection = connect(config)
+    cursor = connection.cursor()
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    cursor.execute(f'CREATE TABLE {TABLE} (id serial PRIMARY KEY, v text)')
+    connection.commit()
+    try:
+        plain_time, _ = measure(lambda: insert_rows(connection, args.writes), args.repeat)
+        install_triggers(connection, [TABLE])
+        trigger_time, _ = measure(lambda: insert_rows(connection, args.writes), args.repeat)
+        latencies = sorted(notify_latencies(connection, config, args.samples))
+    finally:
+        uninstall_triggers(connection, [TABLE])
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    polls_per_minute = args.views * 60000 // args.interval_ms
+    print()
+    print(f'postgresql, rtt={args.rtt_ms}ms')
+    print_table(['measurement', 'polling', 'LISTEN/NOTIFY'], [
+        ['idle queries / minute', polls_per_minute, 0],
+        ['change latency (avg ms)', f'{args.interval_ms / 2:.0f}',
+         f'{statistics.mean(latencies) * 1000:.2f}' if latencies else 'n/a'],
+        ['change latency (p99 ms)', f'{args.interval_ms:.0f}',
+         f'{latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}' if latencies else 'n/a'],
+        ['INSERT+commit (us)', f'{plain_time / args.writes * 1e6:.0f}',
+         f'{trigger_time / args.writes * 1e6:.0f}'],
+    ])
+    print(f'{len(latencies)}/{args.samples} notifications received; '
+          f'{args.views} views polled every {args.interval_ms}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+
+Every benchmark takes the same connection arguments. Defaults come from
+backend/config.py when it exists (see config_example.py), so the
+benchmarks can run against the mock databases created by create_db.py.
+"""
+import argparse
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+try:
+    from config import MYSQL_USER, MYSQL_PASSWORD, MYSQL_HOST
+except ImportError:
+    MYSQL_USER, MYSQL_PASSWORD, MYSQL_HOST = 'root', '', 'localhost'
+
+
+def add_connection_args(parser):
+    parser.add_argument('--type', choices=['mysql', 'postgresql'], default='mysql', help='Database type')
+    parser.add_argument('--host', default=MYSQL_HOST)
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--user', default=MYSQL_USER)
+    parser.add_argument('--password', default=MYSQL_PASSWORD)
+    parser.add_argument('--database', default='mock_db')
+    parser.add_argument('--rtt-ms', type=float, default=0,
+                        help='Route the connection through a local proxy that adds this round-trip time')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per measurement')
+    return parser
+
+
+def make_parser(description):
+    return add_connection_args(argparse.ArgumentParser(description=description))
+
+
+def default_port(db_type):
+    return 5432 if db_type == 'postgresql' else 3306
+
+
+def connection_config(args):
+    """Configuration dict in the same shape monitor.py keeps per session"""
+    host, port = args.host, args.port or default_port(args.type)
+    if args.rtt_ms:
+        proxy = LatencyProxy(host, port, args.rtt_ms / 1000.0)
+        proxy.start()
+        host, port = '127.0.0.1', proxy.port
+    config = {
+        'host': host,
+        'user': args.user,
+        'password': args.password,
+        'database': args.database,
+        'type': args.type,
+        'db_type': args.type,
+    }
+    if port != default_port(args.type):
+        config['port'] = port
+    return config
+
+
+def connect(config):
+    """Open a raw DB-API connection for a config returned by connection_config()"""
+    if config['db_type'] == 'postgresql':
+        import psycopg2
+        return psycopg2.connect(host=config['host'], port=config.get('port', 5432), user=config['user'],
+                                password=config['password'], database=config['database'])
+    import mysql.connector
+    return mysql.connector.connect(**{k: v for k, v in config.items() if k not in ['db_type', 'type']})
+
+
+class CountingConnection:
+    """Wraps a connection and counts the statements executed through its cursors"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.queries = 0
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self, self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _CountingCursor:
+    def __init__(self, owner, cursor):
+        self._owner = owner
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        self._owner.queries += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def measure(fn, repeat):
+    """Run fn() repeat times; return (median seconds, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) if rows else len(str(h))
+              for i, h in enumerate(headers)]
+    line = '  '.join(str(h).rjust(w) for h, w in zip(headers, widths))
+    print(line)
+    print('-' * len(line))
+    for row in rows:
+        print('  '.join(str(v).rjust(w) for v, w in zip(row, widths)))
+
+
+class LatencyProxy:
+    """
+    Local TCP proxy that delays every chunk by half the requested RTT in
+    each direction, to emulate a database reached over a WAN or VPN.
+    """
+
+    def __init__(self, upstream_host, upstream_port, rtt):
+        self.upstream = (upstream_host, upstream_port)
+        self.delay = rtt / 2.0
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(16)
+        self.port = self._server.getsockname()[1]
+
+    def start(self):
+        threading.Thread(target=self._accept_forever, daemon=True).start()
+
+    def _accept_forever(self):
+        while True:
+            client, _ = self._server.accept()
+            upstream = socket.create_connection(self.upstream)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._pump, args=(client, upstream), daemon=True).start()
+            threading.Thread(target=self._pump, args=(upstream, client), daemon=True).start()
+
+    def _pump(self, source, target):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                time.sleep(self.delay)
+                target.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, target):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
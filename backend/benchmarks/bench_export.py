@@ -0,0 +1,121 @@
+"""
+Benchmark: CSV table export throughput.
+
+Exports a scratch table to CSV (discarding the bytes) with
+- offset:  the old loop of LIMIT 5000 OFFSET n queries
+- cursor:  one pass through a server-side cursor, rows formatted in Python
+           (ExportReader + iter_csv, the MySQL path and the PostgreSQL fallback)
+- copy:    PostgreSQL COPY (...) TO STDOUT streamed through CopyReader
+
+and prints rows/second for each. Creates the table udbm_bench_export in
+the target database and drops it afterwards. Use a scratch database.
+
+    python benchmarks/bench_export.py --type postgresql --user postgres \\
+        --password secret --database scratch --rows 500000
+"""
+from bench_common import connect, connection_config, make_parser, measure, print_table
+
+from export_engine import CopyReader, ExportReader, iter_csv
+from monitor import export_text
+
+TABLE = 'udbm_bench_export'
+
+
+def create_table(connection, db_type, rows):
+    cursor = connection.cursor()
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    if db_type == 'postgresql':
+        cursor.execute(f'CREATE TABLE {TABLE} (id serial PRIMARY KEY, name text, amount numeric(12,2), '
+                       f'active boolean, created_at timestamp, attrs jsonb)')
+        cursor.execute(f"""
+            INSERT INTO {TABLE} (name, amount, active, created_at, attrs)
+            SELECT 'customer ' || g, g * 0.37, g %% 2 = 0, now() - g * interval '1 second',
+                   jsonb_build_object('tier', g %% 5, 'tags', jsonb_build_array('a', 'b'))
+            FROM generate_series(1, %s) g
+        """, (rows,))
+    else:
+        cursor.execute(f'CREATE TABLE {TABLE} (id int AUTO_INCREMENT PRIMARY KEY, name varchar(64), '
+                       f'amount decimal(12,2), active boolean, created_at datetime, attrs json)')
+        batch = 10000
+        for start in range(0, rows, batch):
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (name, amount, active, created_at, attrs) '
+                f'VALUES (%s, %s, %s, NOW() - INTERVAL %s SECOND, %s)',
+                [(f'customer {i}', i * 0.37, i % 2 == 0, i, f'{{"tier": {i % 5}, "tags": ["a", "b"]}}')
+                 for i in range(start, min(start + batch, rows))])
+    connection.commit()
+    cursor.close()
+
+
+def format_row(row):
+    return [export_text(value) for value in row]
+
+
+def export_offset(connection, query):
+    """The export loop used before server-side cursors"""
+    cursor = connection.cursor()
+    total, offset = 0, 0
+    while True:
+        cursor.execute(f'{query} LIMIT %s OFFSET %s', (5000, offset))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for row in rows:
+            format_row(row)
+        total += len(rows)
+        offset += 5000
+    cursor.close()
+    connection.commit()
+    return total
+
+
+def export_cursor(connection, db_type, query, fetch_size):
+    reader = ExportReader(connection, db_type, query, fetch_size=fetch_size).open()
+    size = sum(len(chunk) for chunk in iter_csv(reader, reader.columns, format_row))
+    return reader.rows_read, size
+
+
+def export_copy(connection, query):
+    reader = CopyReader(connection, query).open()
+    size = sum(len(chunk) for chunk in reader.chunks())
+    return size
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000, help='Rows in the scratch table')
+    parser.add_argument('--fetch-size', type=int, default=5000, help='Rows per server-side cursor fetch')
+    parser.add_argument('--skip-offset', action='store_true', help='Skip the (quadratic) OFFSET loop')
+    args = parser.parse_args()
+
+    config = connection_config(args)
+    db_type = config['db_type']
+    connection = connect(config)
+    create_table(connection, db_type, args.rows)
+    query = f'SELECT * FROM {TABLE} ORDER BY id DESC'
+    results = []
+    try:
+        if not args.skip_offset:
+            seconds, _ = measure(lambda: export_offset(connection, query), args.repeat)
+            results.append(['offset', seconds, ''])
+        seconds, (rows, size) = measure(lambda: export_cursor(connection, db_type, query, args.fetch_size),
+                                        args.repeat)
+        results.append(['cursor', seconds, size])
+        if db_type == 'postgresql':
+            seconds, size = measure(lambda: export_copy(connection, query), args.repeat)
+            results.append(['copy', seconds, size])
+    finally:
+        cursor = connection.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    print()
+    print(f'{db_type}, {args.rows} rows, rtt={args.rtt_ms}ms')
+    print_table(['path', 'seconds', 'rows/s', 'CSV bytes'],
+                [[name, f'{seconds:.2f}', f'{args.rows / seconds:.0f}', size] for name, seconds, size in results])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: catalog introspection latency vs. number of tables.
+
+Compares the old per-table (N+1) introspection used by get_table_names()
+and /schema with the set-based load_catalog() now behind both.
+
+Creates N scratch tables named udbm_bench_t<i> (each with a foreign key
+to the previous one) in the target database, measures, and drops them.
+Use a scratch database.
+
+    python benchmarks/bench_introspection.py --type postgresql --user postgres \\
+        --password secret --database scratch --sizes 10,100,300,600 --rtt-ms 2
+"""
+from bench_common import CountingConnection, connect, connection_config, make_parser, measure, print_table
+
+from monitor import load_catalog
+
+TABLE_PREFIX = 'udbm_bench_t'
+
+
+def create_tables(connection, db_type, count, existing):
+    cursor = connection.cursor()
+    for i in range(existing, count):
+        name = f'{TABLE_PREFIX}{i}'
+        if db_type == 'postgresql':
+            ref = f', parent_id integer REFERENCES "{TABLE_PREFIX}{i - 1}"(id)' if i else ''
+            cursor.execute(f'CREATE TABLE "{name}" (id serial PRIMARY KEY, name text, created_at timestamp{ref})')
+        else:
+            ref = f', parent_id int, FOREIGN KEY (parent_id) REFERENCES `{TABLE_PREFIX}{i - 1}`(id)' if i else ''
+            cursor.execute(f'CREATE TABLE `{name}` (id int AUTO_INCREMENT PRIMARY KEY, name varchar(64), '
+                           f'created_at datetime{ref})')
+    connection.commit()
+    cursor.close()
+
+
+def drop_tables(connection, db_type, count):
+    cursor = connection.cursor()
+    for i in reversed(range(count)):
+        if db_type == 'postgresql':
+            cursor.execute(f'DROP TABLE IF EXISTS "{TABLE_PREFIX}{i}"')
+        else:
+            cursor.execute(f'DROP TABLE IF EXISTS `{TABLE_PREFIX}{i}`')
+    connection.commit()
+    cursor.close()
+
+
+def legacy_table_names(connection, db_type):
+    """The previous get_table_names(): one existence + one primary key query per table"""
+    cursor = connection.cursor()
+    tables = []
+    if db_type == 'postgresql':
+        cursor.execute("""
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
+        """)
+        for (table_name,) in cursor.fetchall():
+            cursor.execute("""
+                SELECT EXISTS (SELECT FROM information_schema.tables
+                               WHERE table_schema = 'public' AND table_name = %s)
+            """, (table_name,))
+            if cursor.fetchone()[0]:
+                cursor.execute("""
+                    SELECT a.attname FROM pg_index i
+                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                    WHERE i.indrelid = %s::regclass AND i.indisprimary
+                """, (f'"{table_name}"',))
+                pk = cursor.fetchone()
+                tables.append({'name': table_name, 'pk': pk[0] if pk else None})
+    else:
+        cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()")
+        existing = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SHOW TABLES")
+        for (table_name,) in cursor.fetchall():
+            if table_name in existing:
+                cursor.execute("""
+                    SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+                """, (table_name,))
+                pk = cursor.fetchone()
+                tables.append({'name': table_name, 'pk': pk[0] if pk else None})
+    cursor.close()
+    connection.rollback()
+    return tables
+
+
+def legacy_schema(connection, db_type):
+    """The previous /schema: one columns query plus one foreign key query per table"""
+    cursor = connection.cursor()
+    tables, relationships = {}, []
+    if db_type == 'postgresql':
+        cursor.execute("""
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
+        """)
+        for (table_name,) in cursor.fetchall():
+            cursor.execute("""
+                SELECT column_name, data_type, is_nullable, column_default
+                FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = %s
+                ORDER BY ordinal_position
+            """, (table_name,))
+            tables[table_name] = cursor.fetchall()
+            cursor.execute("""
+                SELECT src.relname, att.attname, dst.relname, att2.attname
+                FROM pg_constraint con
+                JOIN pg_class src ON src.oid = con.conrelid
+                JOIN pg_class dst ON dst.oid = con.confrelid
+                JOIN pg_namespace nsp ON nsp.oid = con.connamespace
+                JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = ANY(con.conkey)
+                JOIN pg_attribute att2 ON att2.attrelid = con.confrelid AND att2.attnum = ANY(con.confkey)
+                WHERE con.contype = 'f' AND nsp.nspname = 'public' AND src.relname = %s
+            """, (table_name,))
+            relationships.extend(cursor.fetchall())
+    else:
+        cursor.execute("SHOW TABLES")
+        for (table_name,) in cursor.fetchall():
+            cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+            tables[table_name] = cursor.fetchall()
+            cursor.execute("""
+                SELECT COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL
+            """, (table_name,))
+            relationships.extend(cursor.fetchall())
+    cursor.close()
+    connection.rollback()
+    return tables, relationships
+
+
+def set_based(connection, db_type):
+    catalog = load_catalog(connection, db_type)
+    connection.rollback()
+    return catalog
+
+
+def count_queries(connection, fn, db_type):
+    counting = CountingConnection(connection)
+    fn(counting, db_type)
+    return counting.queries
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,300,600', help='Comma-separated table counts')
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+
+    config = connection_config(args)
+    db_type = config['db_type']
+    admin = connect(config)
+    connection = connect(config)
+    rows = []
+    created = 0
+    try:
+        for size in sizes:
+            create_tables(admin, db_type, size, created)
+            created = size
+
+            legacy_names_time, _ = measure(lambda: legacy_table_names(connection, db_type), args.repeat)
+            legacy_schema_time, _ = measure(lambda: legacy_schema(connection, db_type), args.repeat)
+            catalog_time, catalog = measure(lambda: set_based(connection, db_type), args.repeat)
+
+            legacy_queries = (count_queries(connection, legacy_table_names, db_type)
+                              + count_queries(connection, legacy_schema, db_type))
+            catalog_queries = count_queries(connection, set_based, db_type)
+            legacy_total = legacy_names_time + legacy_schema_time
+            rows.append([
+                len(catalog.tables),
+                f'{legacy_names_time * 1000:.1f}',
+                f'{legacy_schema_time * 1000:.1f}',
+                legacy_queries,
+                f'{catalog_time * 1000:.1f}',
+                catalog_queries,
+                f'{legacy_total / catalog_time:.1f}x',
+            ])
+            print(f'measured {size} scratch tables', flush=True)
+    finally:
+        drop_tables(admin, db_type, created)
+        admin.close()
+        connection.close()
+
+    print()
+    print(f'{db_type}, rtt={args.rtt_ms}ms, median of {args.repeat} runs (times in ms)')
+    print_table(['tables', 'legacy names', 'legacy schema', 'legacy queries',
+                 'set-based', 'set-based queries', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: /data page and row count in one statement vs. two.
+
+Loads pages of a scratch table through load_table_page() with the exact
+count strategy, once with the count folded into the page query as a scalar
+subquery (the default) and once with a COUNT(*) statement of its own
+(UDBM_COMBINED_PAGE_COUNT=0), unfiltered and filtered, on the first page,
+a keyset page and an offset page. Each statement is one round trip, so the
+gap grows with --rtt-ms.
+
+Creates the table udbm_bench_page_count in the target database and drops
+it afterwards.
+
+    python benchmarks/bench_page_count.py --type postgresql --user postgres \\
+        --password secret --database scratch --rows 100000 --rtt-ms 20
+"""
+from types import SimpleNamespace
+
+from bench_common import CountingConnection, connect, connection_config, make_parser, measure, print_table
+
+import monitor
+
+TABLE = 'udbm_bench_page_count'
+
+
+def create_table(connection, db_type, rows):
+    cursor = connection.cursor()
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    if db_type == 'postgresql':
+        cursor.execute(f'CREATE TABLE {TABLE} (id serial PRIMARY KEY, category varchar(16), name text, '
+                       f'created_at timestamp)')
+        cursor.execute(f"""
+            INSERT INTO {TABLE} (category, name, created_at)
+            SELECT 'c' || (g % 10), md5(g::text), now() - g * interval '1 second'
+            FROM generate_series(1, {int(rows)}) g
+        """)
+    else:
+        cursor.execute(f'CREATE TABLE {TABLE} (id int AUTO_INCREMENT PRIMARY KEY, category varchar(16), '
+                       f'name varchar(64), created_at datetime)')
+        batch = 10000
+        for start in range(0, rows, batch):
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (category, name, created_at) VALUES (%s, %s, NOW() - INTERVAL %s SECOND)',
+                [(f'c{i % 10}', f'row {i}', i) for i in range(start, min(start + batch, rows))])
+    cursor.execute(f'CREATE INDEX {TABLE}_category ON {TABLE} (category)')
+    connection.commit()
+    if db_type == 'postgresql':
+        cursor.execute(f'ANALYZE {TABLE}')
+    else:
+        cursor.execute(f'ANALYZE TABLE {TABLE}')
+        cursor.fetchall()
+    connection.commit()
+    cursor.close()
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='Rows in the scratch table')
+    parser.add_argument('--limit', type=int, default=50, help='Rows per page')
+    args = parser.parse_args()
+
+    config = connection_config(args)
+    db_type = config['db_type']
+    connection = connect(config)
+    create_table(connection, db_type, args.rows)
+    context = SimpleNamespace(db_type=db_type, fingerprint='bench')
+    results = []
+    try:
+        metadata = monitor.load_table_metadata(connection, db_type, TABLE)
+        counting = CountingConnection(connection)
+
+        def load(filters, offset=0, page_cursor=None):
+            response, rows, _, _ = monitor.load_table_page(counting, context, metadata, filters, 'id', 'desc',
+                                                           args.limit, offset, 'exact', page_cursor)
+            connection.commit()
+            return response
+
+        first = load({})
+        cases = [('first page', {}, 0, None),
+                 ('keyset page 2', {}, 0, first['next_cursor']),
+                 (f'offset {args.limit * 10}', {}, args.limit * 10, None),
+                 ('filtered', {'category': ['c3']}, 0, None)]
+        for label, filters, offset, page_cursor in cases:
+            timings = {}
+            for combined in (False, True):
+                monitor.COMBINED_PAGE_COUNT = combined
+                counting.queries = 0
+                seconds, response = measure(lambda: load(filters, offset, page_cursor), args.repeat)
+                timings[combined] = (seconds, counting.queries // args.repeat, response['count'])
+            if timings[True][2] != timings[False][2]:
+                raise SystemExit(f'counts differ for {label}: {timings[True][2]} vs {timings[False][2]}')
+            (separate, separate_queries, count), (together, together_queries, _) = timings[False], timings[True]
+            results.append([label, count, separate_queries, f'{separate * 1000:.2f}', together_queries,
+                            f'{together * 1000:.2f}', f'{separate / together:.2f}x'])
+    finally:
+        cursor = connection.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    print()
+    print(f'{db_type}, {args.rows} rows, {args.limit} rows per page, rtt={args.rtt_ms}ms')
+    print_table(['page', 'count', 'statements', 'separate ms', 'statements', 'combined ms', 'speedup'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: OFFSET vs. keyset (seek) pagination latency at depth.
+
+Fetches one page of /data rows at increasing depths with the old
+LIMIT/OFFSET query and with the keyset condition load_table_page() now
+builds from a page cursor, sorted by the primary key and by an indexed
+timestamp column.
+
+Creates a scratch table udbm_bench_pages with --rows rows in the target
+database, measures, and drops it. Use a scratch database.
+
+    python benchmarks/bench_pagination.py --type postgresql --user postgres \\
+        --password secret --database scratch --rows 200000 --depths 0,1000,10000,100000
+"""
+from bench_common import connect, connection_config, make_parser, measure, print_table
+
+from monitor import build_keyset_condition, quote_identifier
+
+TABLE = 'udbm_bench_pages'
+
+
+def create_table(connection, db_type, rows):
+    cursor = connection.cursor()
+    if db_type == 'postgresql':
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        cursor.execute(f'CREATE TABLE {TABLE} (id serial PRIMARY KEY, name text, created_at timestamp)')
+        cursor.execute(f"""
+            INSERT INTO {TABLE} (name, created_at)
+            SELECT md5(g::text), now() - (g %% 5000) * interval '1 minute'
+            FROM generate_series(1, %s) g
+        """, (rows,))
+    else:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        cursor.execute(f'CREATE TABLE {TABLE} (id int AUTO_INCREMENT PRIMARY KEY, name varchar(64), '
+                       f'created_at datetime)')
+        batch = 10000
+        for start in range(0, rows, batch):
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (name, created_at) '
+                f'VALUES (%s, NOW() - INTERVAL %s MINUTE)',
+                [(f'row {i}', i % 5000) for i in range(start, min(start + batch, rows))])
+    cursor.execute(f'CREATE INDEX {TABLE}_created_at ON {TABLE} (created_at, id)')
+    connection.commit()
+    if db_type == 'postgresql':
+        cursor.execute(f'ANALYZE {TABLE}')
+    else:
+        cursor.execute(f'ANALYZE TABLE {TABLE}')
+        cursor.fetchall()
+    connection.commit()
+    cursor.close()
+
+
+def fetch(connection, sql, params):
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help='Rows in the scratch table')
+    parser.add_argument('--depths', default='0,1000,10000,100000', help='Comma-separated page offsets')
+    parser.add_argument('--limit', type=int, default=50, help='Rows per page')
+    args = parser.parse_args()
+
+    config = connection_config(args)
+    db_type = config['db_type']
+    depths = [d for d in (int(d) for d in args.depths.split(',')) if d < args.rows]
+
+    connection = connect(config)
+    create_table(connection, db_type, args.rows)
+    rows = []
+    try:
+        for label, keys in [('id desc', [('id', 'desc')]),
+                            ('created_at asc', [('created_at', 'asc'), ('id', 'asc')])]:
+            order = ', '.join(f'{quote_identifier(c, db_type)} {d.upper()}' for c, d in keys)
+            columns = ', '.join(quote_identifier(c, db_type) for c, _ in keys)
+            for depth in depths:
+                offset_sql = f'SELECT * FROM {TABLE} ORDER BY {order} LIMIT %s OFFSET %s'
+                offset_time, offset_rows = measure(
+                    lambda: fetch(connection, offset_sql, (args.limit, depth)), args.repeat)
+
+                # The cursor holds the sort key of the last row on the previous page
+                if depth:
+                    last = fetch(connection, f'SELECT {columns} FROM {TABLE} ORDER BY {order} '
+                                 f'LIMIT 1 OFFSET %s', (depth - 1,))[0]
+                    condition, params = build_keyset_condition(keys, list(last), db_type)
+                    keyset_sql = f'SELECT * FROM {TABLE} WHERE {condition} ORDER BY {order} LIMIT %s'
+                else:
+                    params, keyset_sql = [], f'SELECT * FROM {TABLE} ORDER BY {order} LIMIT %s'
+                keyset_time, keyset_rows = measure(
+                    lambda: fetch(connection, keyset_sql, (*params, args.limit)), args.repeat)
+                if [r[0] for r in keyset_rows] != [r[0] for r in offset_rows]:
+                    raise SystemExit(f'keyset page differs from OFFSET page ({label}, depth {depth})')
+
+                rows.append([label, depth, f'{offset_time * 1000:.2f}', f'{keyset_time * 1000:.2f}',
+                             f'{offset_time / keyset_time:.1f}x' if keyset_time else 'n/a'])
+    finally:
+        cursor = connection.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    print()
+    print(f'{db_type}, {args.rows} rows, {args.limit} rows per page, rtt={args.rtt_ms}ms')
+    print_table(['sort', 'depth', 'OFFSET ms', 'keyset ms', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: /data polls with and without prepared statements.
+
+Records the statements load_table_page() runs for one poll of a scratch
+table (exact count, keyset and offset pages, with and without filters) and
+replays them, once executing the SQL as is and once as prepared statements
+of the connection (statement_cache.py), which skips parsing and planning on
+the server after the first poll. Only the statements are timed, not the
+rest of the request.
+
+MySQL runs through mysql-connector's prepared cursors, which add a
+statement reset round trip per execution; try it with --rtt-ms to see
+where that stops paying off.
+
+Creates the table udbm_bench_prepared in the target database and drops it
+afterwards.
+
+    python benchmarks/bench_prepared.py --type postgresql --user postgres \\
+        --password secret --database scratch --rows 1000 --polls 2000
+"""
+import time
+from types import SimpleNamespace
+
+from bench_common import connect, connection_config, make_parser, print_table
+
+import monitor
+
+TABLE = 'udbm_bench_prepared'
+
+
+def create_table(connection, db_type, rows):
+    cursor = connection.cursor()
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    columns = ', '.join(f'c{i} int' for i in range(20))
+    if db_type == 'postgresql':
+        cursor.execute(f'CREATE TABLE {TABLE} (id serial PRIMARY KEY, category varchar(16), {columns})')
+        cursor.execute(f"""
+            INSERT INTO {TABLE} (category, {', '.join(f'c{i}' for i in range(20))})
+            SELECT 'c' || (g % 10), {', '.join(f'g % {i + 2}' for i in range(20))}
+            FROM generate_series(1, {int(rows)}) g
+        """)
+    else:
+        cursor.execute(f'CREATE TABLE {TABLE} (id int AUTO_INCREMENT PRIMARY KEY, category varchar(16), {columns})')
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (category, {', '.join(f'c{i}' for i in range(20))}) "
+            f"VALUES (%s, {', '.join(['%s'] * 20)})",
+            [(f'c{g % 10}', *(g % (i + 2) for i in range(20))) for g in range(rows)])
+    cursor.execute(f'CREATE INDEX {TABLE}_category ON {TABLE} (category, id)')
+    connection.commit()
+    cursor.close()
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000, help='Rows in the scratch table')
+    parser.add_argument('--polls', type=int, default=500, help='Polls per measurement')
+    parser.add_argument('--limit', type=int, default=50, help='Rows per page')
+    args = parser.parse_args()
+
+    config = connection_config(args)
+    db_type = config['db_type']
+    connection = connect(config)
+    create_table(connection, db_type, args.rows)
+    context = SimpleNamespace(db_type=db_type, fingerprint='bench')
+    monitor.PREPARED_MYSQL = True
+    results = []
+    try:
+        metadata = monitor.load_table_metadata(connection, db_type, TABLE)
+
+        run_query = monitor.run_query
+
+        def statements_of(filters, offset=0, page_cursor=None):
+            """The (sql, params) one poll runs, and the poll's response"""
+            recorded = []
+
+            def record(connection, db_type, cursor, sql, params, dictionary=False):
+                recorded.append((sql, list(params)))
+                return run_query(connection, db_type, cursor, sql, params, dictionary)
+            monitor.run_query = record
+            try:
+                response, _, _, _ = monitor.load_table_page(connection, context, metadata, filters, 'id', 'desc',
+                                                            args.limit, offset, 'exact', page_cursor, True)
+            finally:
+                monitor.run_query = run_query
+            connection.commit()
+            return recorded, response
+
+        def replay(statements):
+            cursor = connection.cursor()
+            for sql, params in statements:
+                run_query(connection, db_type, cursor, sql, params)
+            cursor.close()
+            connection.commit()
+
+        cases = [('first page', {}, 0, None),
+                 ('keyset page 2', {}, 0, statements_of({})[1]['next_cursor']),
+                 ('offset 500', {}, 500, None),
+                 ('filtered', {'category': ['c3', 'c4']}, 0, None)]
+        for label, filters, offset, page_cursor in cases:
+            statements, _ = statements_of(filters, offset, page_cursor)
+            timings = []
+            for prepared in (0, 64):
+                monitor.PREPARED_STATEMENTS = prepared
+                replay(statements)  # warm up (and prepare)
+                best = None
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    for _ in range(args.polls):
+                        replay(statements)
+                    seconds = (time.perf_counter() - started) / args.polls
+                    best = seconds if best is None else min(best, seconds)
+                timings.append(best)
+            results.append([label, len(statements), f'{timings[0] * 1000:.3f}', f'{timings[1] * 1000:.3f}',
+                            f'{timings[0] / timings[1]:.2f}x'])
+    finally:
+        cursor = connection.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    print()
+    print(f'{db_type}, {args.rows} rows, {args.limit} rows per page, rtt={args.rtt_ms}ms; '
+          f'{monitor.prepared_statements.stats()["prepared"]} statements prepared')
+    print_table(['poll', 'statements', 'plain ms', 'prepared ms', 'speedup'], results)
+
+
+if __name__ == '__main__':
+    main()
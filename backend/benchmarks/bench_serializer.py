@@ -0,0 +1,135 @@
+"""
+Benchmark: serializing pages of rows for JSON responses.
+
+Fetches one page of a scratch table with mixed column types (the same dict
+cursor /data uses) and times, per page,
+- legacy:  make_json_serializable() on every value, then Flask's JSON encoder
+- typed:   RowSerializer (one converter per column), then row_serializer.dumps()
+           (orjson when installed)
+
+Serialization and encoding are timed separately and together. Creates the
+table udbm_bench_serialize in the target database and drops it afterwards.
+
+    python benchmarks/bench_serializer.py --type postgresql --user postgres \\
+        --password secret --database scratch --page-size 50 --pages 2000
+"""
+import time
+
+from bench_common import connect, connection_config, make_parser, print_table
+
+from monitor import app, make_json_serializable
+from row_serializer import RowSerializer, dumps, orjson
+
+TABLE = 'udbm_bench_serialize'
+
+
+def create_table(connection, db_type, rows):
+    cursor = connection.cursor()
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    if db_type == 'postgresql':
+        cursor.execute(f'CREATE TABLE {TABLE} (id serial PRIMARY KEY, name text, email varchar(128), '
+                       f'amount numeric(12,2), score double precision, active boolean, '
+                       f'created_at timestamp, updated_at timestamptz, birthday date, attrs jsonb)')
+        cursor.execute(f"""
+            INSERT INTO {TABLE} (name, email, amount, score, active, created_at, updated_at, birthday, attrs)
+            SELECT 'customer ' || g, 'c' || g || '@example.com', g * 0.37, g / 7.0, g % 2 = 0,
+                   now() - g * interval '1 minute', now(), date '1990-01-01' + g,
+                   jsonb_build_object('tier', g % 5, 'tags', jsonb_build_array('a', 'b'))
+            FROM generate_series(1, {int(rows)}) g
+        """)
+    else:
+        cursor.execute(f'CREATE TABLE {TABLE} (id int AUTO_INCREMENT PRIMARY KEY, name varchar(64), '
+                       f'email varchar(128), amount decimal(12,2), score double, active boolean, '
+                       f'created_at datetime, updated_at timestamp, birthday date, attrs json)')
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (name, email, amount, score, active, created_at, updated_at, birthday, attrs) '
+            f'VALUES (%s, %s, %s, %s, %s, NOW() - INTERVAL %s MINUTE, NOW(), DATE(\'1990-01-01\') + INTERVAL %s DAY, %s)',
+            [(f'customer {i}', f'c{i}@example.com', i * 0.37, i / 7.0, i % 2 == 0, i, i,
+              f'{{"tier": {i % 5}, "tags": ["a", "b"]}}') for i in range(rows)])
+    connection.commit()
+    cursor.close()
+
+
+def fetch_page(connection, db_type, page_size):
+    if db_type == 'postgresql':
+        import psycopg2.extras
+        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    else:
+        cursor = connection.cursor(dictionary=True)
+    cursor.execute(f'SELECT * FROM {TABLE} ORDER BY id DESC LIMIT %s', (page_size,))
+    rows = cursor.fetchall()
+    description = cursor.description
+    cursor.close()
+    connection.commit()
+    return rows, description
+
+
+def legacy_serialize(rows, description, db_type):
+    """process_database_rows() before RowSerializer"""
+    return [{key: make_json_serializable(value) for key, value in row.items()} for row in rows]
+
+
+def typed_serialize(rows, description, db_type):
+    return RowSerializer(description, db_type).serialize_rows(rows)
+
+
+def legacy_encode(data):
+    return app.json.dumps({'data': data}).encode('utf-8')
+
+
+def typed_encode(data):
+    return dumps({'data': data})
+
+
+def time_pages(rows, description, db_type, serialize, encode, pages):
+    """Seconds spent serializing and encoding `pages` copies of the page"""
+    copies = [[dict(row) for row in rows] for _ in range(pages)]  # typed serialization works in place
+    serialize_seconds = encode_seconds = 0.0
+    size = 0
+    for page in copies:
+        started = time.perf_counter()
+        data = serialize(page, description, db_type)
+        encoded = time.perf_counter()
+        size = len(encode(data))
+        finished = time.perf_counter()
+        serialize_seconds += encoded - started
+        encode_seconds += finished - encoded
+    return serialize_seconds, encode_seconds, size
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--page-size', type=int, default=50, help='Rows per page')
+    parser.add_argument('--pages', type=int, default=2000, help='Pages serialized per repetition')
+    args = parser.parse_args()
+
+    config = connection_config(args)
+    db_type = config['db_type']
+    connection = connect(config)
+    create_table(connection, db_type, max(args.page_size, 1000))
+    try:
+        rows, description = fetch_page(connection, db_type, args.page_size)
+    finally:
+        cursor = connection.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    results = []
+    with app.app_context():
+        for name, serialize, encode in [('legacy', legacy_serialize, legacy_encode),
+                                        ('typed', typed_serialize, typed_encode)]:
+            runs = [time_pages(rows, description, db_type, serialize, encode, args.pages) for _ in range(args.repeat)]
+            serialize_seconds, encode_seconds, size = min(runs, key=lambda run: run[0] + run[1])
+            results.append([name, serialize_seconds, encode_seconds, size])
+
+    print()
+    print(f'{db_type}, {args.pages} pages of {len(rows)} rows, encoder: {"orjson" if orjson else "json"}')
+    per_page = lambda seconds: f'{seconds / args.pages * 1e6:.0f}'
+    print_table(['path', 'serialize us/page', 'encode us/page', 'total us/page', 'bytes'],
+                [[name, per_page(s), per_page(e), per_page(s + e), size] for name, s, e, size in results])
+
+
+if __name__ == '__main__':
+    main()
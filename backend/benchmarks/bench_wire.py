@@ -0,0 +1,177 @@
+"""
+Benchmark: wire formats for /data pages and query results.
+
+Fetches pages of a scratch table with mixed column types and times how
+long it takes to turn the fetched rows into a response body, and how big
+that body is, for
+- jsonify:  dict rows (RowSerializer) through Flask's jsonify, as before
+            the faster encoders
+- json:     dict rows (RowSerializer) through row_serializer.dumps, the
+            current default (orjson when installed)
+- compact:  tuple rows as arrays (?format=compact), row_serializer.dumps
+- msgpack:  tuple rows packed as they are (Accept: application/msgpack)
+- arrow:    tuple rows as an uncompressed Arrow IPC stream (pyarrow)
+
+Formats whose optional package is missing are skipped. Creates the table
+udbm_bench_wire in the target database and drops it afterwards.
+
+    python benchmarks/bench_wire.py --type postgresql --user postgres \\
+        --password secret --database scratch --page-sizes 50,1000,10000
+"""
+import io
+import time
+
+from bench_common import connect, connection_config, make_parser, print_table
+
+from monitor import app, export_text
+from row_serializer import RowSerializer, dumps, packb
+
+TABLE = 'udbm_bench_wire'
+
+
+def create_table(connection, db_type, rows):
+    cursor = connection.cursor()
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    if db_type == 'postgresql':
+        cursor.execute(f'CREATE TABLE {TABLE} (id serial PRIMARY KEY, name text, email varchar(128), '
+                       f'amount numeric(12,2), score double precision, active boolean, '
+                       f'created_at timestamp, birthday date, attrs jsonb)')
+        cursor.execute(f"""
+            INSERT INTO {TABLE} (name, email, amount, score, active, created_at, birthday, attrs)
+            SELECT 'customer ' || g, 'c' || g || '@example.com', g * 0.37, g / 7.0, g % 2 = 0,
+                   now() - g * interval '1 minute', date '1990-01-01' + g % 10000,
+                   jsonb_build_object('tier', g % 5)
+            FROM generate_series(1, {int(rows)}) g
+        """)
+    else:
+        cursor.execute(f'CREATE TABLE {TABLE} (id int AUTO_INCREMENT PRIMARY KEY, name varchar(64), '
+                       f'email varchar(128), amount decimal(12,2), score double, active boolean, '
+                       f'created_at datetime, birthday date, attrs json)')
+        batch = 10000
+        for start in range(0, rows, batch):
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (name, email, amount, score, active, created_at, birthday, attrs) '
+                f'VALUES (%s, %s, %s, %s, %s, NOW() - INTERVAL %s MINUTE, '
+                f'DATE(\'1990-01-01\') + INTERVAL %s DAY, %s)',
+                [(f'customer {i}', f'c{i}@example.com', i * 0.37, i / 7.0, i % 2 == 0, i, i % 10000,
+                  f'{{"tier": {i % 5}}}') for i in range(start, min(start + batch, rows))])
+    connection.commit()
+    cursor.close()
+
+
+def fetch(connection, db_type, page_size, as_dicts):
+    if not as_dicts:
+        cursor = connection.cursor()
+    elif db_type == 'postgresql':
+        import psycopg2.extras
+        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    else:
+        cursor = connection.cursor(dictionary=True)
+    cursor.execute(f'SELECT * FROM {TABLE} ORDER BY id DESC LIMIT %s', (page_size,))
+    rows = cursor.fetchall()
+    description = cursor.description
+    cursor.close()
+    connection.commit()
+    return rows, description
+
+
+def page(description, data, **extra):
+    return dict({'count': 1000000, 'columns': [column[0] for column in description], 'limited': True,
+                 'data': data}, **extra)
+
+
+def encode_jsonify(rows, description, db_type):
+    rows = RowSerializer(description, db_type).serialize_rows(rows)
+    return app.json.response(page(description, rows)).get_data()
+
+
+def encode_json(rows, description, db_type):
+    rows = RowSerializer(description, db_type).serialize_rows(rows)
+    return dumps(page(description, rows))
+
+
+def encode_compact(rows, description, db_type):
+    return dumps(page(description, RowSerializer(description, db_type).serialize_rows(rows), format='compact'))
+
+
+def encode_msgpack(rows, description, db_type):
+    return packb(page(description, rows, format='compact'))
+
+
+def encode_arrow(rows, description, db_type):
+    from arrow_export import BatchConverter
+    import pyarrow.ipc
+    converter = BatchConverter(description, db_type, export_text)
+    batch = converter.convert(rows)
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def available(encode, rows, description, db_type):
+    try:
+        encode([dict(row) if isinstance(row, dict) else row for row in rows], description, db_type)
+        return True
+    except (RuntimeError, ImportError):
+        return False
+
+
+def measure_encode(encode, rows, description, db_type, repeat):
+    """Best per-call seconds and the body size"""
+    calls = max(1, 20000 // max(len(rows), 1))
+    best = None
+    for _ in range(repeat):
+        # Dict rows are serialized in place, so every call gets its own copy (made untimed)
+        inputs = [[dict(row) for row in rows] if rows and isinstance(rows[0], dict) else rows
+                  for _ in range(calls)]
+        started = time.perf_counter()
+        for page_rows in inputs:
+            body = encode(page_rows, description, db_type)
+        seconds = (time.perf_counter() - started) / calls
+        best = seconds if best is None else min(best, seconds)
+    return best, len(body)
+
+
+def main():
+    parser = make_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--page-sizes', default='50,1000,10000', help='Comma-separated rows per page')
+    args = parser.parse_args()
+    page_sizes = [int(size) for size in args.page_sizes.split(',')]
+
+    config = connection_config(args)
+    db_type = config['db_type']
+    connection = connect(config)
+    create_table(connection, db_type, max(page_sizes))
+    try:
+        pages = {size: (fetch(connection, db_type, size, True), fetch(connection, db_type, size, False))
+                 for size in page_sizes}
+    finally:
+        cursor = connection.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    formats = [('jsonify', encode_jsonify, True), ('json', encode_json, True), ('compact', encode_compact, False),
+               ('msgpack', encode_msgpack, False), ('arrow', encode_arrow, False)]
+    results = []
+    with app.app_context():
+        for size in page_sizes:
+            baseline = None
+            for name, encode, as_dicts in formats:
+                rows, description = pages[size][0] if as_dicts else pages[size][1]
+                if not available(encode, rows, description, db_type):
+                    continue
+                seconds, body_size = measure_encode(encode, rows, description, db_type, args.repeat)
+                baseline = baseline or (seconds, body_size)
+                results.append([size, name, f'{seconds * 1e6:.0f}', f'{baseline[0] / seconds:.1f}x', body_size,
+                                f'{body_size / baseline[1]:.2f}'])
+
+    print()
+    print(f'{db_type}; encode time of one response body from fetched rows')
+    print_table(['rows', 'format', 'encode us', 'speedup', 'bytes', 'size vs jsonify'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,666 @@
+"""
+MySQL change capture from the row-based binary log.
+
+BinlogFileReader decodes binlog files (format v4) straight from disk: the
+server's own log directory when uDBM runs on the database host, a mirror
+kept up to date by `mysqlbinlog --read-from-remote-server --raw
+--stop-never`, or recorded files replayed for testing. BinlogStreamSource
+reads the same changes over a replication connection when the optional
+mysql-replication package is installed.
+
+Both yield RowChange items for the write and DDL events of the selected
+schemas/tables, followed by the BinlogPosition after each committed
+transaction, which is where a restarted reader resumes. BinlogChangeFeed
+runs a source on a background thread, reports each committed change per
+table and keeps a running insert/delete balance per table, so row counts
+can follow writes without COUNT(*) queries.
+"""
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+BinlogPosition = namedtuple('BinlogPosition', 'file pos')
+RowChange = namedtuple('RowChange', 'schema table operation rows timestamp')
+
+# Event types (libbinlogevents/include/binlog_event.h)
+QUERY_EVENT = 2
+STOP_EVENT = 3
+ROTATE_EVENT = 4
+FORMAT_DESCRIPTION_EVENT = 15
+XID_EVENT = 16
+TABLE_MAP_EVENT = 19
+ROWS_EVENTS = {
+    23: 'INSERT', 24: 'UPDATE', 25: 'DELETE',    # v1 (MySQL 5.1 - 5.5)
+    30: 'INSERT', 31: 'UPDATE', 32: 'DELETE',    # v2
+    39: 'UPDATE',                                # PARTIAL_UPDATE_ROWS_EVENT (partial JSON updates)
+}
+UPDATE_EVENTS = {24, 31, 39}
+ROWS_V2_EVENTS = {30, 31, 32, 39}
+
+BINLOG_MAGIC = b'\xfebin'
+HEADER_LENGTH = 19
+CHECKSUM_CRC32 = 1
+
+# Column types (include/field_types.h)
+T_DECIMAL, T_TINY, T_SHORT, T_LONG, T_FLOAT, T_DOUBLE, T_NULL, T_TIMESTAMP = range(8)
+T_LONGLONG, T_INT24, T_DATE, T_TIME, T_DATETIME, T_YEAR, T_NEWDATE, T_VARCHAR = range(8, 16)
+T_BIT, T_TIMESTAMP2, T_DATETIME2, T_TIME2 = 16, 17, 18, 19
+T_JSON, T_NEWDECIMAL, T_ENUM, T_SET = 245, 246, 247, 248
+T_TINY_BLOB, T_MEDIUM_BLOB, T_LONG_BLOB, T_BLOB = 249, 250, 251, 252
+T_VAR_STRING, T_STRING, T_GEOMETRY = 253, 254, 255
+
+FIXED_SIZES = {
+    T_TINY: 1, T_SHORT: 2, T_INT24: 3, T_LONG: 4, T_LONGLONG: 8, T_FLOAT: 4, T_DOUBLE: 8,
+    T_NULL: 0, T_YEAR: 1, T_DATE: 3, T_NEWDATE: 3, T_TIME: 3, T_TIMESTAMP: 4, T_DATETIME: 8,
+}
+FSP_BASE_SIZES = {T_TIMESTAMP2: 4, T_DATETIME2: 5, T_TIME2: 3}
+LENGTH_PREFIXED = {T_BLOB, T_TINY_BLOB, T_MEDIUM_BLOB, T_LONG_BLOB, T_GEOMETRY, T_JSON}
+ONE_BYTE_META = {T_FLOAT, T_DOUBLE, T_TIMESTAMP2, T_DATETIME2, T_TIME2} | LENGTH_PREFIXED
+NO_META = set(FIXED_SIZES) - {T_FLOAT, T_DOUBLE}
+DIG2BYTES = (0, 1, 1, 2, 2, 3, 3, 4, 4, 4)
+
+# Statements in QUERY events that change a table outside of row events
+TABLE_STATEMENT = re.compile(
+    r'^\s*(?:/\*.*?\*/\s*)*(?P<verb>'
+    r'TRUNCATE(?:\s+TABLE)?'
+    r'|ALTER\s+(?:ONLINE\s+|IGNORE\s+)?TABLE'
+    r'|DROP\s+(?:TEMPORARY\s+)?TABLE(?:\s+IF\s+EXISTS)?'
+    r'|CREATE\s+(?:TEMPORARY\s+)?TABLE(?:\s+IF\s+NOT\s+EXISTS)?'
+    r'|RENAME\s+TABLE'
+    r'|INSERT(?:\s+(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE))*(?:\s+INTO)?'
+    r'|REPLACE(?:\s+(?:LOW_PRIORITY|DELAYED))*(?:\s+INTO)?'
+    r'|UPDATE(?:\s+(?:LOW_PRIORITY|IGNORE))*'
+    r'|DELETE(?:\s+(?:LOW_PRIORITY|QUICK|IGNORE))*\s+FROM'
+    r')\s+(?P<name>(?:`[^`]+`|\w+)(?:\s*\.\s*(?:`[^`]+`|\w+))?)',
+    re.IGNORECASE | re.DOTALL
+)
+STATEMENT_OPERATIONS = {'TRUNCATE': 'TRUNCATE', 'INSERT': 'INSERT', 'REPLACE': 'INSERT',
+                        'UPDATE': 'UPDATE', 'DELETE': 'DELETE'}
+
+
+class BinlogError(Exception):
+    """Malformed or unsupported binlog data"""
+
+
+class _EndOfLog(Exception):
+    """Reached the end of the files in non-follow mode (or stop() was called)"""
+
+
+def _lenenc(data, offset):
+    """Decode a length-encoded integer; returns (value, new offset)"""
+    first = data[offset]
+    if first < 0xfb:
+        return first, offset + 1
+    size = {0xfc: 2, 0xfd: 3, 0xfe: 8}.get(first)
+    if size is None:
+        raise BinlogError(f'Invalid length-encoded integer prefix {first:#x}')
+    return int.from_bytes(data[offset + 1:offset + 1 + size], 'little'), offset + 1 + size
+
+
+def _bit(bitmap, index):
+    return bitmap[index >> 3] >> (index & 7) & 1
+
+
+def parse_statement(query, default_schema):
+    """(schema, table, operation) changed by a statement, or None"""
+    match = TABLE_STATEMENT.match(query)
+    if match is None:
+        return None
+    verb = match.group('verb').split()[0].upper()
+    parts = [part.strip().strip('`') for part in match.group('name').split('.')]
+    schema, table = (parts[0], parts[1]) if len(parts) == 2 else (default_schema, parts[0])
+    return schema, table, STATEMENT_OPERATIONS.get(verb, 'DDL')
+
+
+class _TableMap:
+    __slots__ = ('schema', 'table', 'columns')
+
+    def __init__(self, schema, table, columns):
+        self.schema = schema
+        self.table = table
+        self.columns = columns   # [(type, metadata)], or None when a column type is not understood
+
+
+def _parse_column_metadata(types, meta):
+    columns, i = [], 0
+    for column_type in types:
+        if column_type in ONE_BYTE_META:
+            columns.append((column_type, meta[i]))
+            i += 1
+        elif column_type == T_VARCHAR:
+            columns.append((column_type, meta[i] | meta[i + 1] << 8))
+            i += 2
+        elif column_type in (T_BIT, T_NEWDECIMAL):
+            columns.append((column_type, (meta[i], meta[i + 1])))
+            i += 2
+        elif column_type in (T_STRING, T_VAR_STRING, T_ENUM, T_SET):
+            columns.append((column_type, meta[i] << 8 | meta[i + 1]))
+            i += 2
+        elif column_type in NO_META:
+            columns.append((column_type, 0))
+        else:
+            return None
+    return columns
+
+
+def _value_size(column_type, meta, data, offset):
+    size = FIXED_SIZES.get(column_type)
+    if size is not None:
+        return size
+    if column_type in FSP_BASE_SIZES:
+        return FSP_BASE_SIZES[column_type] + (meta + 1) // 2
+    if column_type in LENGTH_PREFIXED:
+        return meta + int.from_bytes(data[offset:offset + meta], 'little')
+    if column_type == T_NEWDECIMAL:
+        precision, scale = meta
+        integral = precision - scale
+        return (integral // 9) * 4 + DIG2BYTES[integral % 9] + (scale // 9) * 4 + DIG2BYTES[scale % 9]
+    if column_type == T_BIT:
+        bits, whole_bytes = meta
+        return whole_bytes + (1 if bits else 0)
+    if column_type == T_VARCHAR:
+        max_length = meta
+    elif column_type in (T_ENUM, T_SET):
+        return meta & 0xff
+    else:
+        # STRING / VAR_STRING: the real type and the high bits of the length share the first byte
+        if (meta >> 8) in (T_ENUM, T_SET):
+            return meta & 0xff
+        max_length = (((meta >> 4) & 0x300) ^ 0x300) + (meta & 0xff)
+    prefix = 1 if max_length < 256 else 2
+    return prefix + int.from_bytes(data[offset:offset + prefix], 'little')
+
+
+def _skip_row_image(columns, present, data, offset):
+    image = [column for i, column in enumerate(columns) if _bit(present, i)]
+    nulls = data[offset:offset + (len(image) + 7) // 8]
+    offset += len(nulls)
+    for i, (column_type, meta) in enumerate(image):
+        if not _bit(nulls, i):
+            offset += _value_size(column_type, meta, data, offset)
+    return offset
+
+
+def count_rows(table_map, event_type, body):
+    """Number of rows in a rows event body (after the post-header), or None if it cannot be decoded"""
+    columns = table_map.columns
+    if columns is None or event_type == 39:
+        # Partial JSON updates store a diff instead of the after image
+        return None
+    try:
+        column_count, offset = _lenenc(body, 0)
+        if column_count != len(columns):
+            return None
+        bitmap_length = (column_count + 7) // 8
+        before = body[offset:offset + bitmap_length]
+        offset += bitmap_length
+        after = None
+        if event_type in UPDATE_EVENTS:
+            after = body[offset:offset + bitmap_length]
+            offset += bitmap_length
+        rows = 0
+        while offset < len(body):
+            offset = _skip_row_image(columns, before, body, offset)
+            if after is not None:
+                offset = _skip_row_image(columns, after, body, offset)
+            rows += 1
+        return rows if offset == len(body) else None
+    except (IndexError, BinlogError):
+        return None
+
+
+class BinlogFileReader:
+    """
+    Iterates the changes recorded in binlog files on disk.
+
+    path is a binlog directory or one binlog file. Reading starts at
+    position (a BinlogPosition at a transaction boundary), otherwise at the
+    beginning of the given file or of the oldest file in the directory. It
+    follows ROTATE events into the next file; with follow=True it then waits
+    for the files to grow instead of stopping at the end.
+    """
+
+    def __init__(self, path, position=None, only_schemas=None, only_tables=None, follow=False,
+                 poll_interval=0.2):
+        if os.path.isdir(path):
+            self.directory, first_file = path, None
+        else:
+            self.directory, first_file = os.path.split(os.path.abspath(path))
+        self.only_schemas = set(only_schemas) if only_schemas is not None else None
+        self.only_tables = set(only_tables) if only_tables is not None else None
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.position = position or BinlogPosition(first_file or self._binlog_files()[0], 4)
+        self._stopped = False
+        self._file = None
+        self._checksum = False
+        self._post_header = {}
+        self._tables = {}
+
+    def _binlog_files(self):
+        index = [name for name in os.listdir(self.directory) if name.endswith('.index')]
+        if index:
+            with open(os.path.join(self.directory, index[0])) as handle:
+                names = [os.path.basename(line.strip()) for line in handle if line.strip()]
+        else:
+            names = sorted(name for name in os.listdir(self.directory) if re.search(r'\.\d+$', name))
+        if not names:
+            raise BinlogError(f'No binlog files in {self.directory}')
+        return names
+
+    def _next_file(self, name):
+        """Name of the binlog file after name (mysql-bin.000041 -> mysql-bin.000042)"""
+        base, _, number = name.rpartition('.')
+        return f'{base}.{int(number) + 1:0{len(number)}d}'
+
+    def stop(self):
+        self._stopped = True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self, name, pos):
+        self.close()
+        self._file = open(os.path.join(self.directory, name), 'rb')
+        if self._file.read(4) != BINLOG_MAGIC:
+            raise BinlogError(f'{name} is not a binlog file')
+        self._tables.clear()
+        # The format description event right after the magic tells the checksum
+        # algorithm and post-header lengths, also when resuming further in
+        event = self._read_event()
+        while event is None:
+            self._wait()
+            event = self._read_event()
+        if event[0] != FORMAT_DESCRIPTION_EVENT:
+            raise BinlogError(f'{name} does not start with a format description event')
+        self._read_format_description(event[3])
+        if pos > self._file.tell():
+            self._file.seek(pos)
+        self.position = BinlogPosition(name, self._file.tell())
+
+    def _wait(self):
+        if not self.follow or self._stopped:
+            raise _EndOfLog()
+        time.sleep(self.poll_interval)
+
+    def _read_event(self):
+        """(type, timestamp, end offset, body) of the next event, or None at the current end of the file"""
+        start = self._file.tell()
+        header = self._file.read(HEADER_LENGTH)
+        if len(header) == HEADER_LENGTH:
+            timestamp, event_type, _, size, _, _ = struct.unpack('<IBIIIH', header)
+            if size < HEADER_LENGTH:
+                raise BinlogError(f'Event of {size} bytes at {self.position.file}:{start}')
+            body = self._file.read(size - HEADER_LENGTH)
+            if len(body) == size - HEADER_LENGTH:
+                if self._checksum and event_type != FORMAT_DESCRIPTION_EVENT:
+                    body, checksum = body[:-4], body[-4:]
+                    if zlib.crc32(header + body) != int.from_bytes(checksum, 'little'):
+                        raise BinlogError(f'Checksum mismatch at {self.position.file}:{start}')
+                return event_type, timestamp, start + size, body
+        # Incomplete event: the server is still writing it
+        self._file.seek(start)
+        return None
+
+    def _read_format_description(self, body):
+        version = body[2:52].split(b'\0', 1)[0].decode('ascii', 'replace')
+        numbers = tuple(int(part) for part in re.findall(r'\d+', version.split('-')[0])[:3])
+        checksum_aware = numbers >= (5, 6, 1) or 'mariadb' in version.lower()
+        lengths = body[57:len(body) - 5] if checksum_aware else body[57:]
+        self._post_header = {i + 1: length for i, length in enumerate(lengths)}
+        self._checksum = checksum_aware and body[-5] == CHECKSUM_CRC32
+
+    def _selected(self, schema, table):
+        if self.only_schemas is not None and schema not in self.only_schemas:
+            return False
+        return self.only_tables is None or table in self.only_tables
+
+    def __iter__(self):
+        self._open(*self.position)
+        try:
+            while not self._stopped:
+                event = self._read_event()
+                if event is None:
+                    self._wait()
+                    continue
+                event_type, timestamp, end, body = event
+                for item in self._decode(event_type, timestamp, end, body):
+                    yield item
+        except _EndOfLog:
+            return
+        finally:
+            self.close()
+
+    def _decode(self, event_type, timestamp, end, body):
+        post_header = self._post_header.get(event_type, 0)
+        if event_type == TABLE_MAP_EVENT:
+            table_id, offset = self._table_id(body, post_header)
+            schema_length = body[offset]
+            schema = body[offset + 1:offset + 1 + schema_length].decode('utf-8')
+            offset += schema_length + 2
+            table_length = body[offset]
+            table = body[offset + 1:offset + 1 + table_length].decode('utf-8')
+            offset += table_length + 2
+            if not self._selected(schema, table):
+                self._tables.pop(table_id, None)
+                return
+            column_count, offset = _lenenc(body, offset)
+            types = body[offset:offset + column_count]
+            meta_length, offset = _lenenc(body, offset + column_count)
+            columns = _parse_column_metadata(types, body[offset:offset + meta_length])
+            self._tables[table_id] = _TableMap(schema, table, columns)
+
+        elif event_type in ROWS_EVENTS:
+            table_id, offset = self._table_id(body, post_header)
+            table_map = self._tables.get(table_id)
+            if table_map is None:
+                return
+            if event_type in ROWS_V2_EVENTS:
+                # The post-header ends with the extra-data length, which counts its own two bytes
+                offset = post_header + int.from_bytes(body[post_header - 2:post_header], 'little') - 2
+            yield RowChange(table_map.schema, table_map.table, ROWS_EVENTS[event_type],
+                            count_rows(table_map, event_type, body[offset:]), timestamp)
+
+        elif event_type == XID_EVENT:
+            self.position = BinlogPosition(self.position.file, end)
+            yield self.position
+
+        elif event_type == QUERY_EVENT:
+            schema_length = body[8]
+            status_length = int.from_bytes(body[11:13], 'little')
+            offset = post_header + status_length
+            schema = body[offset:offset + schema_length].decode('utf-8', 'replace')
+            query = body[offset + schema_length + 1:].decode('utf-8', 'replace')
+            if query == 'BEGIN':
+                return
+            statement = parse_statement(query, schema)
+            if statement is not None and self._selected(statement[0], statement[1]):
+                yield RowChange(statement[0], statement[1], statement[2], None, timestamp)
+            if not self._in_transaction(query):
+                self.position = BinlogPosition(self.position.file, end)
+                yield self.position
+
+        elif event_type == ROTATE_EVENT:
+            name = body[post_header:].decode('utf-8')
+            pos = int.from_bytes(body[:8], 'little')
+            while not os.path.exists(os.path.join(self.directory, name)):
+                self._wait()
+            self._open(name, pos)
+
+        elif event_type == STOP_EVENT:
+            # Clean server shutdown: the next start writes a new file
+            name = self._next_file(self.position.file)
+            while not os.path.exists(os.path.join(self.directory, name)):
+                self._wait()
+            self._open(name, 4)
+
+        elif event_type == FORMAT_DESCRIPTION_EVENT:
+            self._read_format_description(body)
+
+    @staticmethod
+    def _in_transaction(query):
+        # Statement-based DML sits between BEGIN and an XID (or a COMMIT query)
+        return query != 'COMMIT' and re.match(r'\s*(INSERT|REPLACE|UPDATE|DELETE)\b', query, re.IGNORECASE)
+
+    def _table_id(self, body, post_header):
+        # MySQL 5.1.4+ uses 6-byte table ids; a 6-byte post-header means the old 4-byte ids
+        size = 4 if post_header == 6 else 6
+        return int.from_bytes(body[:size], 'little'), size + 2
+
+
+class BinlogStreamSource:
+    """
+    Reads changes over a replication connection (requires the optional
+    mysql-replication package and the REPLICATION SLAVE / REPLICATION CLIENT
+    privileges). Iterates RowChange / BinlogPosition like BinlogFileReader.
+    """
+
+    def __init__(self, config, server_id, position=None, only_schemas=None, only_tables=None):
+        try:
+            from pymysqlreplication import BinLogStreamReader
+            from pymysqlreplication.event import QueryEvent, XidEvent
+            from pymysqlreplication.row_event import DeleteRowsEvent, UpdateRowsEvent, WriteRowsEvent
+        except ImportError:
+            raise RuntimeError('Live binlog capture needs the mysql-replication package '
+                               '(pip install mysql-replication)')
+        self._events = {WriteRowsEvent: 'INSERT', UpdateRowsEvent: 'UPDATE', DeleteRowsEvent: 'DELETE'}
+        self._query_event, self._xid_event = QueryEvent, XidEvent
+        self.only_schemas = set(only_schemas) if only_schemas is not None else None
+        self.only_tables = set(only_tables) if only_tables is not None else None
+        self.position = position
+        settings = {'host': config['host'], 'port': int(config.get('port', 3306)),
+                    'user': config['user'], 'passwd': config.get('password', '')}
+        self._stream = BinLogStreamReader(
+            connection_settings=settings,
+            server_id=server_id,
+            blocking=True,
+            resume_stream=position is not None,
+            log_file=position.file if position else None,
+            log_pos=position.pos if position else None,
+            only_events=list(self._events) + [QueryEvent, XidEvent],
+            only_schemas=list(only_schemas) if only_schemas is not None else None,
+            only_tables=list(only_tables) if only_tables is not None else None,
+        )
+
+    def stop(self):
+        self._stream.close()
+
+    def __iter__(self):
+        try:
+            for event in self._stream:
+                timestamp = event.timestamp
+                operation = self._events.get(type(event))
+                if operation is not None:
+                    yield RowChange(event.schema, event.table, operation, len(event.rows), timestamp)
+                    continue
+                if isinstance(event, self._query_event):
+                    query = event.query if isinstance(event.query, str) else event.query.decode('utf-8', 'replace')
+                    if query == 'BEGIN':
+                        continue
+                    schema = event.schema if isinstance(event.schema, str) else event.schema.decode('utf-8')
+                    statement = parse_statement(query, schema)
+                    if statement is not None and (self.only_schemas is None or statement[0] in self.only_schemas) \
+                            and (self.only_tables is None or statement[1] in self.only_tables):
+                        yield RowChange(statement[0], statement[1], statement[2], None, timestamp)
+                    if BinlogFileReader._in_transaction(query):
+                        continue
+                self.position = BinlogPosition(self._stream.log_file, self._stream.log_pos)
+                yield self.position
+        finally:
+            self._stream.close()
+
+
+class PositionStore:
+    """Resume positions per feed, persisted as JSON (written at most once per flush_interval)"""
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._positions = {}
+        self._dirty = False
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as handle:
+                    self._positions = json.load(handle)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable binlog positions in {path}: {e}")
+
+    def get(self, key):
+        value = self._positions.get(key)
+        return BinlogPosition(value['file'], value['pos']) if value else None
+
+    def save(self, key, position):
+        with self._lock:
+            self._positions[key] = {'file': position.file, 'pos': position.pos}
+            self._dirty = True
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def forget(self, key):
+        with self._lock:
+            self._dirty = self._positions.pop(key, None) is not None or self._dirty
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            temporary = f'{self.path}.tmp'
+            with open(temporary, 'w') as handle:
+                json.dump(self._positions, handle)
+            os.replace(temporary, self.path)
+            self._dirty = False
+            self._flushed_at = time.monotonic()
+
+
+class BinlogChangeFeed:
+    """
+    Runs a change source on a background thread.
+
+    - open_source(position):       returns a BinlogFileReader / BinlogStreamSource starting at position
+    - on_change(table, operation): called once per table and committed transaction
+    - on_status(connected):        called when the feed starts delivering and when it stops
+
+    Changes are applied at commit, so a feed restarted from the last saved
+    position never counts a transaction twice. row_delta() exposes the net
+    rows inserted into a table since the feed started, together with an
+    epoch that changes whenever the balance cannot be trusted (TRUNCATE,
+    DDL, statement-based writes).
+    """
+
+    def __init__(self, open_source, on_change, on_status=None, position=None, position_store=None,
+                 store_key=None, name='binlog-feed', reconnect_delay=1.0, max_reconnect_delay=30.0):
+        self.name = name
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.position = position
+        self._open_source = open_source
+        self._on_change = on_change
+        self._on_status = on_status or (lambda connected: None)
+        self._store = position_store
+        self._store_key = store_key
+        self._stop = threading.Event()
+        self._source = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._net = {}        # table -> rows inserted minus rows deleted
+        self._epochs = {}     # table -> epoch of the balance
+        self.connected = False
+        self.finished = False
+        self.transactions = 0
+        self.changes = 0
+        self.reconnects = 0
+        self.last_event_at = None
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        source = self._source
+        if source is not None:
+            source.stop()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._store is not None:
+            self._store.flush()
+
+    def row_delta(self, table_name):
+        """(epoch, net rows inserted) for a table, or None while the feed is not live"""
+        if not self.connected:
+            return None
+        with self._lock:
+            return self._epochs.get(table_name, 0), self._net.get(table_name, 0)
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            try:
+                self._source = self._open_source(self.position)
+                self.connected = True
+                self.last_error = None
+                self._on_status(True)
+                self._consume(self._source)
+                if not self._stop.is_set():
+                    # A replay (non-following file reader) reached the end of the recorded files
+                    self.finished = True
+                    return
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"{self.name}: {e}; restarting in {delay:g}s")
+                self.reconnects += 1
+            finally:
+                self._source = None
+                if self.connected:
+                    self.connected = False
+                    self._on_status(False)
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _consume(self, source):
+        pending = {}   # table -> [net rows, balance still exact, last operation]
+        for item in source:
+            if self._stop.is_set():
+                return
+            if isinstance(item, RowChange):
+                entry = pending.setdefault(item.table, [0, True, item.operation])
+                entry[2] = item.operation
+                if item.rows is None or item.operation in ('TRUNCATE', 'DDL'):
+                    entry[1] = item.operation == 'UPDATE' and entry[1]
+                elif item.operation == 'INSERT':
+                    entry[0] += item.rows
+                elif item.operation == 'DELETE':
+                    entry[0] -= item.rows
+                continue
+
+            # Transaction committed: publish its changes and remember where to resume
+            with self._lock:
+                for table_name, (net, exact, _) in pending.items():
+                    if exact:
+                        self._net[table_name] = self._net.get(table_name, 0) + net
+                    else:
+                        self._epochs[table_name] = self._epochs.get(table_name, 0) + 1
+                        self._net[table_name] = 0
+            self.position = item
+            if self._store is not None:
+                self._store.save(self._store_key, item)
+            if pending:
+                self.transactions += 1
+                self.changes += len(pending)
+                self.last_event_at = time.time()
+                for table_name, (_, _, operation) in pending.items():
+                    try:
+                        self._on_change(table_name, operation)
+                    except Exception as e:
+                        logger.error(f"{self.name}: change handler failed: {e}")
+                pending = {}
+
+    def stats(self):
+        with self._lock:
+            tables = {table_name: {'net_rows': net, 'epoch': self._epochs.get(table_name, 0)}
+                      for table_name, net in self._net.items()}
+        return {
+            'connected': self.connected,
+            'finished': self.finished,
+            'position': self.position._asdict() if self.position else None,
+            'transactions': self.transactions,
+            'changes': self.changes,
+            'reconnects': self.reconnects,
+            'last_event_at': self.last_event_at,
+            'last_error': self.last_error,
+            'tables': tables,
+        }
@@ -0,0 +1,133 @@
+"""
+HTTP response compression negotiated through Accept-Encoding.
+
+compress_response() is called on every response (from after_request) and
+compresses it in place when
+- the client accepts zstd (optional zstandard package), gzip or deflate;
+  on equal quality values the first of ENCODINGS wins
+- the content type is compressible (JSON, MessagePack, Arrow streams, text)
+  and the body is not already encoded
+- a buffered body is at least min_size bytes; streamed bodies (CSV exports)
+  are always compressed, chunk by chunk, with a sync flush after each chunk
+  so the client receives data as soon as it is produced
+
+Server-sent events, 304s and other bodiless responses, partial content and
+responses advertising byte ranges are left alone: a range of the encoded
+body would not match the file the server slices.
+"""
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ENCODINGS = ('zstd', 'gzip', 'deflate')
+
+_COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+    'application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack',
+    'application/vnd.apache.arrow.stream',
+}
+
+
+def available_encodings():
+    return [encoding for encoding in ENCODINGS if encoding != 'zstd' or zstandard is not None]
+
+
+def is_compressible(mimetype):
+    if not mimetype or mimetype == 'text/event-stream':
+        return False
+    return mimetype.startswith('text/') or mimetype in _COMPRESSIBLE_TYPES
+
+
+class _ZlibCompressor:
+    def __init__(self, level, wbits):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def make_compressor(encoding, level):
+    """A compressor for one body; levels are zlib's 1-9 (used as is for zstd)"""
+    if encoding == 'gzip':
+        return _ZlibCompressor(level, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        # HTTP "deflate" is the zlib format
+        return _ZlibCompressor(level, zlib.MAX_WBITS)
+    if encoding == 'zstd':
+        return _ZstdCompressor(level)
+    raise ValueError(f'Unsupported content encoding: {encoding}')
+
+
+def compress_chunks(chunks, encoding, level):
+    """Compress an iterable of byte chunks, emitting each chunk's output right away"""
+    compressor = make_compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush()
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response, accept_encodings, level, min_size):
+    """
+    Compress a Flask/Werkzeug response in place if the negotiation allows
+    it. accept_encodings is the request's parsed Accept-Encoding header.
+    Returns the encoding used, or None.
+    """
+    if response.status_code == 304:
+        # A 304 repeats the Vary of the 200 it stands for (the ETag-validated responses are all compressible)
+        response.vary.add('Accept-Encoding')
+        return None
+    if response.status_code < 200 or response.status_code in (204, 206):
+        return None
+    if not is_compressible(response.mimetype) or 'Content-Encoding' in response.headers:
+        return None
+    if 'Accept-Ranges' in response.headers or 'Content-Range' in response.headers:
+        return None
+    # The representation depends on Accept-Encoding from here on, whatever is chosen
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return None
+
+    if response.is_streamed or response.direct_passthrough:
+        response.direct_passthrough = False
+        response.response = compress_chunks(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return None
+        compressor = make_compressor(encoding, level)
+        response.set_data(compressor.compress(data) + compressor.finish())
+    response.headers['Content-Encoding'] = encoding
+    return encoding
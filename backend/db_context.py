@@ -0,0 +1,164 @@
+"""
+Per-session database contexts.
+
+A DatabaseContext is an immutable view of one database configuration
+together with the resources shared by everyone monitoring that database
+(its connection pool and metadata cache). Browser sessions are mapped to
+contexts through a server-side SessionRegistry, so concurrent users
+watching different databases never overwrite each other's configuration.
+
+The ContextRegistry only holds contexts weakly: a context (and the
+credentials in it) lives as long as a session, stream or change feed
+refers to it, and is forgotten once its last session expires.
+"""
+import secrets
+import threading
+import time
+import weakref
+from types import MappingProxyType
+
+
+class DatabaseContext:
+    """Read-only database configuration plus its shared resources"""
+
+    __slots__ = ('config', 'fingerprint', 'db_type', 'label', 'metadata', '_pool_getter', '__weakref__')
+
+    def __init__(self, config, fingerprint, pool_getter, metadata_factory=None):
+        db_type = 'postgresql' if config.get('db_type') == 'postgresql' else 'mysql'
+        object.__setattr__(self, 'config', MappingProxyType(dict(config)))
+        object.__setattr__(self, 'fingerprint', fingerprint)
+        object.__setattr__(self, 'db_type', db_type)
+        object.__setattr__(self, 'label', f"{config.get('host')}/{config.get('database')}")
+        object.__setattr__(self, '_pool_getter', pool_getter)
+        object.__setattr__(self, 'metadata', metadata_factory(self) if metadata_factory else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('DatabaseContext is immutable')
+
+    @property
+    def pool(self):
+        return self._pool_getter(self)
+
+    def connect(self):
+        """Check out a pooled connection for this database"""
+        return self.pool.acquire()
+
+
+class ContextRegistry:
+    """
+    Maps a configuration fingerprint to its (single) DatabaseContext.
+    on_evict(fingerprint) runs once the last reference to a context is gone.
+    """
+
+    def __init__(self, fingerprint, pool_getter, metadata_factory=None, on_evict=None):
+        self._fingerprint = fingerprint
+        self._pool_getter = pool_getter
+        self._metadata_factory = metadata_factory
+        self._on_evict = on_evict
+        self._contexts = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, config):
+        key = self._fingerprint(config)
+        context = self._contexts.get(key)
+        if context is None:
+            with self._lock:
+                context = self._contexts.get(key)
+                if context is None:
+                    context = DatabaseContext(config, key, self._pool_getter, self._metadata_factory)
+                    self._contexts[key] = context
+                    if self._on_evict is not None:
+                        weakref.finalize(context, self._evicted, key)
+        return context
+
+    def _evicted(self, key):
+        # A newer context may already have taken the fingerprint over
+        if key not in self._contexts:
+            self._on_evict(key)
+
+    def by_fingerprint(self, fingerprint):
+        return self._contexts.get(fingerprint)
+
+    def all(self):
+        return list(self._contexts.values())
+
+    def __len__(self):
+        return len(self._contexts)
+
+
+class MonitorSession:
+    """Mutable per-browser state: the bound context and the pause flag"""
+
+    __slots__ = ('token', 'context', 'paused', 'cookie_signature', 'last_seen')
+
+    def __init__(self, token):
+        self.token = token
+        self.context = None
+        self.paused = False
+        # Raw cookie values the context was last derived from
+        self.cookie_signature = None
+        self.last_seen = time.monotonic()
+
+
+class SessionRegistry:
+    """
+    Server-side session table keyed by an opaque session token. Sessions
+    unseen for `ttl` seconds are treated as missing, and swept out at most
+    every `purge_interval` seconds.
+
+    new() hands out a session that is not stored yet; keep() stores it once
+    it holds state worth remembering, so clients that never pick a database
+    do not fill the table.
+    """
+
+    def __init__(self, ttl=7 * 24 * 3600, purge_interval=300):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._purged_at = time.monotonic()
+
+    def get(self, token):
+        now = time.monotonic()
+        self._purge_if_due(now)
+        session = self._sessions.get(token) if token else None
+        if session is None:
+            return None
+        if now - session.last_seen > self.ttl:
+            # Expired since the last purge
+            with self._lock:
+                if self._sessions.get(token) is session:
+                    del self._sessions[token]
+            return None
+        session.last_seen = now
+        return session
+
+    def new(self):
+        return MonitorSession(secrets.token_urlsafe(24))
+
+    def keep(self, session):
+        session.last_seen = time.monotonic()
+        self._purge_if_due(session.last_seen)
+        with self._lock:
+            self._sessions[session.token] = session
+        return session
+
+    def create(self):
+        return self.keep(self.new())
+
+    def _purge_if_due(self, now):
+        if now - self._purged_at < self.purge_interval:
+            return
+        with self._lock:
+            if now - self._purged_at < self.purge_interval:
+                return
+            self._purged_at = now
+            cutoff = now - self.ttl
+            for token in [t for t, s in self._sessions.items() if s.last_seen < cutoff]:
+                del self._sessions[token]
+
+    def __contains__(self, session):
+        return self._sessions.get(session.token) is session
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,327 @@
+"""
+Connection pooling for the monitor backend.
+
+Each database configuration gets its own ConnectionPool so the polling
+endpoints reuse warm connections instead of opening a new TCP connection
+(and authenticating) for every request.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no connection becomes available before the checkout timeout"""
+
+
+class PooledConnection:
+    """
+    Thin proxy around a raw DB-API connection.
+
+    Everything is delegated to the underlying connection except close(),
+    which hands the connection back to its pool instead of closing it, so
+    existing `connection.close()` calls keep working unchanged.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._discard = False
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            raise RuntimeError("Connection has already been returned to the pool")
+        return self._raw
+
+    def discard(self):
+        """Close the underlying connection on release instead of reusing it"""
+        self._discard = True
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool.release(raw, discard=self._discard)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __setattr__(self, name, value):
+        # Attribute writes such as `connection.autocommit = True` go to the real connection
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.raw, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._discard = True
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of connections for one database configuration.
+
+    - connect():       opens a new raw connection
+    - validate(raw):   returns True if the connection is still usable
+    - reset(raw):      returns the connection to a clean state before reuse
+    """
+
+    def __init__(self, connect, validate=None, reset=None, min_size=1, max_size=10,
+                 idle_timeout=300.0, validate_after=30.0, checkout_timeout=10.0, name='pool'):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.name = name
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.checkout_timeout = checkout_timeout
+        self._connect = connect
+        self._validate = validate
+        self._reset = reset
+        self._cond = threading.Condition()
+        self._idle = deque()   # (raw, last_used) pairs, most recently used on the right
+        self._in_use = 0
+        self._opening = 0
+        self._closed = False
+        self.last_used = time.monotonic()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'closed': 0,
+            'evicted': 0,
+            'validation_failures': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+
+    def _total(self):
+        return len(self._idle) + self._in_use + self._opening
+
+    def acquire(self):
+        """Check out a connection, reusing an idle one when possible"""
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            raw = None
+            idle_for = 0.0
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool {self.name} is closed")
+                waited = False
+                while not self._idle and self._total() >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolExhaustedError(
+                            f"No connection available in pool {self.name} "
+                            f"(max_size={self.max_size}) after {self.checkout_timeout}s")
+                    if not waited:
+                        self._stats['waits'] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+                self.last_used = time.monotonic()
+                if self._idle:
+                    # LIFO: hot connections stay hot, the cold tail ages out
+                    raw, last_used = self._idle.pop()
+                    idle_for = self.last_used - last_used
+                    self._in_use += 1
+                else:
+                    self._opening += 1
+
+            if raw is None:
+                try:
+                    raw = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._in_use += 1
+                    self._stats['created'] += 1
+                return PooledConnection(self, raw)
+
+            # Health check on checkout; only ping connections that sat idle for a while
+            if self._is_healthy(raw, idle_for):
+                with self._cond:
+                    self._stats['reused'] += 1
+                return PooledConnection(self, raw)
+
+            with self._cond:
+                self._stats['validation_failures'] += 1
+            self._drop(raw)
+
+    def _is_healthy(self, raw, idle_for):
+        if self._validate is None:
+            return True
+        try:
+            return bool(self._validate(raw, idle_for >= self.validate_after))
+        except Exception as e:
+            logger.warning(f"Pool {self.name}: connection failed validation: {e}")
+            return False
+
+    def release(self, raw, discard=False):
+        """Return a connection to the pool (or close it if it is unusable)"""
+        if not discard and self._reset is not None:
+            try:
+                self._reset(raw)
+            except Exception as e:
+                logger.warning(f"Pool {self.name}: discarding connection that failed to reset: {e}")
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            keep = not discard and not self._closed
+            if keep:
+                self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+        if not keep:
+            self._close_raw(raw)
+
+    def _drop(self, raw):
+        """Close a checked-out connection that will not be returned"""
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+        self._close_raw(raw)
+
+    def _close_raw(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['closed'] += 1
+
+    def warm(self):
+        """Open connections until min_size are available"""
+        opened = []
+        missing = 0
+        try:
+            with self._cond:
+                missing = self.min_size - self._total()
+                self._opening += max(0, missing)
+            for _ in range(max(0, missing)):
+                opened.append(self._connect())
+        finally:
+            now = time.monotonic()
+            with self._cond:
+                self._opening -= max(0, missing)
+                for raw in opened:
+                    self._idle.appendleft((raw, now))
+                    self._stats['created'] += 1
+                self._cond.notify_all()
+
+    def evict_idle(self, now=None):
+        """Close connections idle longer than idle_timeout, keeping min_size around"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._cond:
+            # Oldest connections sit on the left of the deque
+            while self._idle and self._total() > self.min_size:
+                raw, last_used = self._idle[0]
+                if now - last_used < self.idle_timeout:
+                    break
+                self._idle.popleft()
+                expired.append(raw)
+            self._stats['evicted'] += len(expired)
+        for raw in expired:
+            self._close_raw(raw)
+        return len(expired)
+
+    def close(self):
+        """Close idle connections and refuse new checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for raw in idle:
+            self._close_raw(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'name': self.name,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._total(),
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'idle_timeout': self.idle_timeout,
+                'seconds_since_last_use': round(time.monotonic() - self.last_used, 3),
+                **self._stats,
+            }
+
+
+class PoolRegistry:
+    """
+    Keeps one ConnectionPool per configuration key and runs a background
+    reaper that evicts idle connections and forgets pools nobody uses.
+    """
+
+    def __init__(self, reap_interval=30.0, pool_ttl=1800.0):
+        self.reap_interval = reap_interval
+        self.pool_ttl = pool_ttl
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def get(self, key, factory):
+        """Return the pool for key, creating it with factory() on first use"""
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = factory()
+                    self._pools[key] = pool
+                    self._ensure_reaper()
+        return pool
+
+    def discard(self, key):
+        with self._lock:
+            pool = self._pools.pop(key, None)
+        if pool is not None:
+            pool.close()
+
+    def reap(self):
+        now = time.monotonic()
+        with self._lock:
+            pools = list(self._pools.items())
+        for key, pool in pools:
+            pool.evict_idle(now)
+            stats = pool.stats()
+            if stats['in_use'] == 0 and now - pool.last_used > self.pool_ttl:
+                logger.info(f"Closing unused connection pool {pool.name}")
+                self.discard(key)
+
+    def _ensure_reaper(self):
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(target=self._reap_forever, name='db-pool-reaper', daemon=True)
+        self._reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error(f"Error evicting idle connections: {e}")
+
+    def stats(self):
+        with self._lock:
+            pools = list(self._pools.values())
+        return [pool.stats() for pool in pools]
@@ -0,0 +1,546 @@
+"""
+Single-pass table exports.
+
+Exports used to page through the table with LIMIT/OFFSET, which re-reads
+every skipped row on each page (quadratic in the table size) and can skip
+or repeat rows when the table changes between pages. An ExportReader runs
+the export SELECT once, inside a read-only REPEATABLE READ snapshot, and
+reads it through a server-side cursor in batches of fetch_size rows:
+
+- PostgreSQL: a named cursor (DECLARE ... CURSOR), so the server keeps the
+  result and sends fetch_size rows per round trip
+- MySQL:      an unbuffered cursor, which streams rows off the socket as
+  they are fetched instead of loading the whole result first
+
+Memory therefore stays bounded by one batch however large the table is.
+
+iter_csv() turns a reader into encoded CSV chunks for a streamed response.
+The WSGI server pulls the next chunk only once the previous one has been
+written to the socket, so a slow client slows the database reads down
+instead of piling rows up in memory, and closing the generator (the client
+went away) closes the reader.
+
+On PostgreSQL, a CopyReader skips Python row handling altogether: the
+server formats the CSV itself (COPY (...) TO STDOUT) and the bytes are
+passed through to the response as they arrive.
+
+write_xlsx() writes a reader into an XLSX file with xlsxwriter's
+constant_memory mode, which flushes each row to disk as soon as the next
+one starts. Cells keep their types (numbers, booleans, dates) through one
+writer per column chosen from the cursor description, and exports longer
+than Excel's row limit continue on additional sheets.
+"""
+import csv
+import datetime
+import itertools
+import logging
+import queue
+import re
+import threading
+import zlib
+
+import xlsxwriter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_SIZE = 5000
+STREAM_CHUNK_SIZE = 64 * 1024  # characters of CSV per streamed chunk
+
+_cursor_names = itertools.count(1)
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export whose reader was cancelled from another thread"""
+
+
+def begin_snapshot(connection, db_type, snapshot=None):
+    """
+    Start a read-only REPEATABLE READ transaction; everything read until it
+    ends sees one snapshot. On PostgreSQL, snapshot (an id from
+    export_snapshot()) makes the transaction share another one's snapshot.
+    """
+    connection.rollback()
+    cursor = connection.cursor()
+    try:
+        if db_type == 'postgresql':
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+            if snapshot is not None:
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', (snapshot,))
+        else:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY')
+    finally:
+        cursor.close()
+
+
+def export_snapshot(connection):
+    """
+    Start a snapshot on connection and return its id (PostgreSQL) so that
+    other connections can read the same snapshot through begin_snapshot().
+    The id stays valid while this transaction is open.
+    """
+    begin_snapshot(connection, 'postgresql')
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT pg_export_snapshot()')
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+class ExportReader:
+    """
+    Reads one query through a server-side cursor.
+
+    - open():    starts the snapshot, runs the query and reads the first batch
+                 (after which description/columns are available)
+    - batches(): yields lists of row tuples until the result is exhausted
+    - cancel():  (from another thread) makes batches() raise ExportCancelled
+                 at the next batch; a running PostgreSQL statement is cancelled
+    - close():   releases the cursor and ends the snapshot; a MySQL result
+                 abandoned half-way cannot be skipped cheaply, so the
+                 connection is discarded instead of returned to the pool
+
+    Use it as a context manager so an interrupted export still closes it.
+    """
+
+    def __init__(self, connection, db_type, query, params=(), fetch_size=DEFAULT_FETCH_SIZE, snapshot=None):
+        self.connection = connection
+        self.db_type = db_type
+        self.query = query
+        self.params = list(params)
+        self.fetch_size = max(1, int(fetch_size))
+        self.snapshot = snapshot
+        self.description = None
+        self.rows_read = 0
+        self.cancelled = False
+        self._cursor = None
+        self._pending = None
+        self._exhausted = False
+
+    @property
+    def columns(self):
+        return [column[0] for column in self.description or ()]
+
+    def open(self):
+        begin_snapshot(self.connection, self.db_type, self.snapshot)
+        if self.db_type == 'postgresql':
+            self._cursor = self.connection.cursor(name=f'udbm_export_{next(_cursor_names)}')
+            self._cursor.itersize = self.fetch_size
+        else:
+            self._cursor = self.connection.cursor(buffered=False)
+        self._cursor.execute(self.query, self.params)
+        # A named cursor only describes its result after the first fetch
+        self._pending = self._fetch()
+        self.description = self._cursor.description
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+        if self.db_type == 'postgresql' and self._cursor is not None:
+            self.connection.cancel()
+
+    def _fetch(self):
+        if self.cancelled:
+            raise ExportCancelled()
+        rows = self._cursor.fetchmany(self.fetch_size)
+        if len(rows) < self.fetch_size:
+            self._exhausted = True
+        self.rows_read += len(rows)
+        return rows
+
+    def batches(self):
+        if self._cursor is None:
+            self.open()
+        if self._pending:
+            batch, self._pending = self._pending, None
+            yield batch
+        while not self._exhausted:
+            batch = self._fetch()
+            if batch:
+                yield batch
+
+    def close(self):
+        if self._cursor is None:
+            return
+        cursor, self._cursor = self._cursor, None
+        try:
+            if self.db_type != 'postgresql' and not self._exhausted:
+                # A raw (unpooled) connection is left for its owner to close
+                discard = getattr(self.connection, 'discard', None)
+                if discard is not None:
+                    discard()
+                return
+            cursor.close()
+            self.connection.rollback()
+        except Exception as e:
+            logger.warning(f"Closing export cursor failed: {e}")
+            discard = getattr(self.connection, 'discard', None)
+            if discard is not None:
+                discard()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class CursorReader:
+    """
+    ExportReader interface over a cursor that has already executed its query.
+    Used for custom SQL, which may not be a plain SELECT and so cannot be
+    wrapped in a named cursor or a read-only snapshot.
+    """
+
+    def __init__(self, cursor, fetch_size=DEFAULT_FETCH_SIZE):
+        self.description = cursor.description
+        self.fetch_size = max(1, int(fetch_size))
+        self.rows_read = 0
+        self.cancelled = False
+        self._cursor = cursor
+
+    @property
+    def columns(self):
+        return [column[0] for column in self.description or ()]
+
+    def cancel(self):
+        self.cancelled = True
+
+    def batches(self):
+        while self._cursor is not None:
+            if self.cancelled:
+                raise ExportCancelled()
+            rows = self._cursor.fetchmany(self.fetch_size)
+            if not rows:
+                return
+            self.rows_read += len(rows)
+            yield rows
+
+    def close(self):
+        if self._cursor is not None:
+            cursor, self._cursor = self._cursor, None
+            cursor.close()
+
+
+class _TextBuffer:
+    """File-like target for csv.writer that hands its output over in chunks"""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+
+    def take(self):
+        text = ''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        return text
+
+
+def iter_csv(reader, header, format_row, chunk_size=STREAM_CHUNK_SIZE, lineterminator='\r\n'):
+    """
+    Yield UTF-8 CSV chunks of the header and every row of reader, formatted
+    by format_row(row) -> [text]. The reader is closed when the generator
+    finishes or is closed early.
+    """
+    buffer = _TextBuffer()
+    writer = csv.writer(buffer, lineterminator=lineterminator)
+    try:
+        # The header goes out at once so the download starts before the first batch is formatted
+        writer.writerow(header)
+        yield buffer.take().encode('utf-8')
+        for rows in reader.batches():
+            for row in rows:
+                writer.writerow(format_row(row))
+                if buffer.size >= chunk_size:
+                    yield buffer.take().encode('utf-8')
+        yield buffer.take().encode('utf-8')
+    finally:
+        reader.close()
+
+
+def iter_gzip(chunks, level=6):
+    """
+    Gzip a stream of byte chunks on the fly. Every chunk is flushed so the
+    client can decode it as it arrives; closing this generator closes chunks.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush(zlib.Z_FINISH)
+    finally:
+        chunks.close()
+
+
+class _CopySink:
+    """File object handed to copy_expert(); batches COPY's per-row writes into chunks"""
+
+    def __init__(self, owner):
+        self._owner = owner
+        self._buffer = bytearray()
+
+    def write(self, data):
+        if self._owner.cancelled:
+            return
+        self._buffer += data if isinstance(data, bytes) else data.encode('utf-8')
+        if len(self._buffer) >= STREAM_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._owner._put(bytes(self._buffer))
+            self._buffer = bytearray()
+
+
+class CopyReader:
+    """
+    Streams `COPY (query) TO STDOUT WITH (FORMAT csv, HEADER)` (PostgreSQL).
+
+    psycopg2's copy_expert() pushes the whole result into a file object and
+    only returns at the end, so it runs on a worker thread that fills a small
+    bounded queue; chunks() drains it. A full queue blocks the COPY, which
+    keeps a slow client from buffering the table in memory.
+
+    - open():   starts the snapshot and the COPY, and waits for the first
+                chunk so a failing statement raises here, not mid-response
+    - chunks(): yields the CSV bytes, header first
+    - cancel(): (from another thread) aborts the COPY; chunks() raises ExportCancelled
+    - close():  cancels an unfinished COPY and ends the snapshot
+    """
+
+    _DONE = object()
+
+    def __init__(self, connection, query, params=(), queue_size=8, snapshot=None):
+        self.connection = connection
+        self.query = query
+        self.params = list(params)
+        self.snapshot = snapshot
+        self.cancelled = False
+        self.bytes_read = 0
+        self.lines_read = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._first = None
+        self._error = None
+
+    @property
+    def rows_read(self):
+        # Approximate: values with embedded newlines count as several rows
+        return max(0, self.lines_read - 1)
+
+    def cancel(self):
+        if not self.cancelled and self._thread is not None:
+            self.cancelled = True
+            self.connection.cancel()
+
+    def _put(self, item):
+        while not self.cancelled:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self):
+        while True:
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.cancelled:
+                    raise ExportCancelled()
+
+    def _run(self, sql):
+        sink = _CopySink(self)
+        cursor = self.connection.cursor()
+        try:
+            cursor.copy_expert(sql, sink)
+            sink.flush()
+        except Exception as e:
+            self._error = e
+        finally:
+            cursor.close()
+            self._put(self._DONE)
+
+    def open(self):
+        begin_snapshot(self.connection, 'postgresql', self.snapshot)
+        cursor = self.connection.cursor()
+        try:
+            # COPY takes no bind parameters; mogrify() quotes them client-side
+            statement = cursor.mogrify(self.query, self.params).decode('utf-8')
+        finally:
+            cursor.close()
+        sql = f'COPY ({statement}) TO STDOUT WITH (FORMAT csv, HEADER)'
+        self._thread = threading.Thread(target=self._run, args=(sql,), name='udbm-copy', daemon=True)
+        self._thread.start()
+        try:
+            self._first = self._get()
+            if self._first is self._DONE and self._error is not None:
+                raise self._error
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def chunks(self):
+        if self._thread is None:
+            self.open()
+        try:
+            item, self._first = self._first, None
+            while item is not self._DONE:
+                if self.cancelled:
+                    raise ExportCancelled()
+                self.bytes_read += len(item)
+                self.lines_read += item.count(b'\n')
+                yield item
+                item = self._get()
+            if self.cancelled:
+                raise ExportCancelled()
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.close()
+
+    def close(self):
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        if thread.is_alive():
+            self.cancelled = True
+            self.connection.cancel()
+            thread.join(30)
+        try:
+            self.connection.rollback()
+        except Exception as e:
+            logger.warning(f"Ending COPY export failed: {e}")
+            discard = getattr(self.connection, 'discard', None)
+            if discard is not None:
+                discard()
+
+
+XLSX_MAX_ROWS = 1048576  # rows per worksheet, header included
+
+# Column kinds by cursor description type code
+_PG_KINDS = {
+    16: 'bool', 17: 'binary',
+    20: 'integer', 21: 'integer', 23: 'integer', 26: 'integer',
+    700: 'number', 701: 'number', 1700: 'number',
+    1082: 'date', 1114: 'datetime', 1184: 'datetime', 1083: 'time',
+    114: 'json', 3802: 'json',
+}
+_MYSQL_KINDS = {
+    1: 'integer', 2: 'integer', 3: 'integer', 8: 'integer', 9: 'integer', 13: 'integer',
+    4: 'number', 5: 'number', 0: 'number', 246: 'number',
+    7: 'datetime', 12: 'datetime', 10: 'date',
+    245: 'json',
+}
+
+
+def column_kinds(description, db_type):
+    """Kind of each result column ('integer', 'number', 'bool', 'date', 'datetime', 'time', 'json', 'binary' or 'text')"""
+    kinds = _PG_KINDS if db_type == 'postgresql' else _MYSQL_KINDS
+    return [kinds.get(column[1], 'text') for column in description]
+
+
+def _sheet_names(base):
+    """Valid, distinct worksheet names: base, base (2), base (3), ..."""
+    base = re.sub(r'[\[\]:*?/\\]', '_', base).strip("'") or 'Sheet'
+    yield base[:31]
+    for number in itertools.count(2):
+        suffix = f' ({number})'
+        yield base[:31 - len(suffix)] + suffix
+
+
+def _cell_writers(worksheet, kinds, formats, format_text):
+    """One function per column writing a non-NULL value into (row, col) with a native cell type"""
+    write_string = worksheet.write_string
+
+    def text(row, col, value):
+        write_string(row, col, format_text(value))
+
+    def integer(row, col, value):
+        # Excel numbers are doubles; keep larger integers exact as text
+        if isinstance(value, int) and abs(value) < 2 ** 53:
+            worksheet.write_number(row, col, value)
+        else:
+            text(row, col, value)
+
+    def number(row, col, value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return text(row, col, value)
+        if value != value or value in (float('inf'), float('-inf')):
+            return text(row, col, value)
+        worksheet.write_number(row, col, value)
+
+    def boolean(row, col, value):
+        worksheet.write_boolean(row, col, bool(value))
+
+    def temporal(cell_format, python_type):
+        def write(row, col, value):
+            if isinstance(value, python_type):
+                worksheet.write_datetime(row, col, value, cell_format)
+            else:
+                # MySQL TIME (timedelta), zero dates and other oddities
+                text(row, col, value)
+        return write
+
+    writers = {
+        'integer': integer,
+        'number': number,
+        'bool': boolean,
+        'date': temporal(formats['date'], datetime.date),
+        'datetime': temporal(formats['datetime'], datetime.datetime),
+        'time': temporal(formats['time'], datetime.time),
+    }
+    return [writers.get(kind, text) for kind in kinds]
+
+
+def write_xlsx(reader, target, sheet_name, format_text, db_type):
+    """
+    Write the header and every row of reader to an XLSX file (a path or a binary file object).
+    format_text(value) renders values stored as text (JSON, strings, and
+    whatever does not fit a native cell). Returns the number of rows written.
+    """
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'remove_timezone': True,
+                                          'strings_to_numbers': False, 'strings_to_urls': False,
+                                          'strings_to_formulas': False})
+    try:
+        if reader.description is None:
+            reader.open()
+        header = reader.columns
+        kinds = column_kinds(reader.description, db_type)
+        formats = {
+            'date': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+            'datetime': workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'}),
+            'time': workbook.add_format({'num_format': 'hh:mm:ss'}),
+        }
+        names = _sheet_names(sheet_name)
+        worksheet, writers, row_num = None, None, XLSX_MAX_ROWS
+        written = 0
+        for rows in reader.batches():
+            for row in rows:
+                if row_num == XLSX_MAX_ROWS:
+                    worksheet = workbook.add_worksheet(next(names))
+                    worksheet.write_row(0, 0, header)
+                    writers = _cell_writers(worksheet, kinds, formats, format_text)
+                    row_num = 1
+                for col_num, value in enumerate(row):
+                    if value is not None:
+                        writers[col_num](row_num, col_num, value)
+                row_num += 1
+                written += 1
+        if worksheet is None:
+            workbook.add_worksheet(next(names)).write_row(0, 0, header)
+    finally:
+        reader.close()
+        workbook.close()
+    return written
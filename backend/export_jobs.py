@@ -0,0 +1,236 @@
+"""
+Background export jobs.
+
+Long exports run on a small worker pool instead of in the request thread:
+a client submits a job, polls its progress, and downloads the finished file
+separately (with HTTP Range support, so an interrupted download resumes
+where it stopped). Results are spooled to files in one directory. Finished
+files are kept for `retention` seconds, and when the directory grows past
+`max_spool_bytes` the oldest finished results are removed first.
+
+Jobs belong to the session that submitted them; every lookup passes the
+owner, and other sessions cannot see or touch them.
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from export_engine import ExportCancelled
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = 'udbm-export-'
+
+
+class ExportJob:
+    """One submitted export. `context` is handed back untouched to the run function."""
+
+    def __init__(self, owner, table, format, params, filename, context=None):
+        self.id = secrets.token_urlsafe(12)
+        self.owner = owner
+        self.table = table
+        self.format = format
+        self.params = params
+        self.filename = filename
+        self.context = context
+        self.state = 'queued'  # queued, running, done, failed or cancelled
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.estimated_rows = None
+        self.rows = 0
+        self.path = None
+        self.size = None
+        self._reader = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def track(self, reader):
+        """Attach the export's reader for progress and cancellation"""
+        self._reader = reader
+        if self.cancelled:
+            reader.cancel()
+            raise ExportCancelled()
+
+    def cancel(self):
+        self._cancel.set()
+        reader = self._reader
+        if reader is not None:
+            reader.cancel()
+
+    def to_dict(self):
+        reader = self._reader
+        rows = reader.rows_read if reader is not None else self.rows
+        if self.state == 'done':
+            progress = 1.0
+        elif self.state == 'running' and self.estimated_rows:
+            # Estimates can be low; never claim completion before the file is written
+            progress = min(rows / self.estimated_rows, 0.99)
+        else:
+            progress = None
+        return {
+            'id': self.id,
+            'table': self.table,
+            'format': self.format,
+            'params': self.params,
+            'state': self.state,
+            'error': self.error,
+            'rows': rows,
+            'estimated_rows': self.estimated_rows,
+            'progress': progress,
+            'size': self.size,
+            'filename': self.filename,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class ExportJobManager:
+    """
+    Runs export jobs on a bounded worker pool and manages their spooled files.
+
+    - run(job, path): writes the export to path and returns the number of rows;
+                      calls job.track(reader) so progress and cancel() work
+    """
+
+    def __init__(self, run, spool_dir, max_workers=2, retention=3600.0, max_spool_bytes=2 * 1024 ** 3):
+        self.spool_dir = spool_dir
+        self.retention = retention
+        self.max_spool_bytes = max_spool_bytes
+        self._run = run
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='udbm-export')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'done': 0, 'failed': 0, 'cancelled': 0, 'expired': 0}
+        os.makedirs(spool_dir, exist_ok=True)
+        self._remove_orphans()
+
+    def _remove_orphans(self):
+        """Results of a previous process can no longer be downloaded (their jobs are gone)"""
+        for name in os.listdir(self.spool_dir):
+            if name.startswith(FILE_PREFIX):
+                try:
+                    os.remove(os.path.join(self.spool_dir, name))
+                except OSError:
+                    pass
+
+    def submit(self, owner, table, format, params, filename, context=None):
+        self.purge()
+        job = ExportJob(owner, table, format, params, filename, context)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._stats['submitted'] += 1
+        self._executor.submit(self._execute, job)
+        return job
+
+    def _execute(self, job):
+        if job.cancelled:
+            self._finish(job, 'cancelled')
+            return
+        job.state = 'running'
+        job.started_at = time.time()
+        extension = job.filename.rsplit('.', 1)[-1] if '.' in job.filename else job.format
+        path = os.path.join(self.spool_dir, f'{FILE_PREFIX}{job.id}.{extension}')
+        partial = path + '.part'
+        try:
+            job.rows = self._run(job, partial)
+            os.replace(partial, path)
+            job.path = path
+            job.size = os.path.getsize(path)
+            self._finish(job, 'done')
+        except Exception as e:
+            self._remove_file(partial)
+            if job.cancelled or isinstance(e, ExportCancelled):
+                self._finish(job, 'cancelled')
+            else:
+                logger.error(f"Export job {job.id} ({job.table}.{job.format}) failed: {e}")
+                job.error = str(e)
+                self._finish(job, 'failed')
+        self._enforce_spool_limit()
+
+    def _finish(self, job, state):
+        reader = job._reader
+        if reader is not None:
+            job.rows = reader.rows_read if state != 'done' else job.rows
+        job._reader = None
+        job.state = state
+        job.finished_at = time.time()
+        with self._lock:
+            self._stats[state] += 1
+
+    def get(self, job_id, owner):
+        job = self._jobs.get(job_id)
+        return job if job is not None and job.owner == owner else None
+
+    def list(self, owner):
+        self.purge()
+        return sorted((job for job in list(self._jobs.values()) if job.owner == owner),
+                      key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id, owner):
+        """Cancel a queued or running job, or delete a finished one and its file"""
+        job = self.get(job_id, owner)
+        if job is None:
+            return None
+        if job.state in ('queued', 'running'):
+            job.cancel()
+        else:
+            self._forget(job)
+        return job
+
+    def _forget(self, job):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        if job.path is not None:
+            self._remove_file(job.path)
+            job.path = None
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def purge(self, now=None):
+        """Drop finished jobs (and their files) older than the retention period"""
+        cutoff = (now or time.time()) - self.retention
+        expired = [job for job in list(self._jobs.values())
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job in expired:
+            self._forget(job)
+        if expired:
+            with self._lock:
+                self._stats['expired'] += len(expired)
+        return len(expired)
+
+    def _enforce_spool_limit(self):
+        finished = sorted((job for job in list(self._jobs.values()) if job.path is not None),
+                          key=lambda job: job.finished_at)
+        total = sum(job.size or 0 for job in finished)
+        while finished and total > self.max_spool_bytes:
+            job = finished.pop(0)
+            total -= job.size or 0
+            logger.info(f"Export spool over its limit; removing the result of job {job.id}")
+            self._forget(job)
+            with self._lock:
+                self._stats['expired'] += 1
+
+    def stats(self):
+        jobs = list(self._jobs.values())
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'spool_dir': self.spool_dir,
+            'spool_bytes': sum(job.size or 0 for job in jobs if job.path is not None),
+            'queued': sum(1 for job in jobs if job.state == 'queued'),
+            'running': sum(1 for job in jobs if job.state == 'running'),
+        })
+        return stats
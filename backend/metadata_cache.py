@@ -0,0 +1,153 @@
+"""
+In-process cache of table metadata (existence, columns, primary keys).
+
+Entries are trusted for `ttl` seconds. After that a single cheap schema
+version probe decides whether the cached catalog is still valid: if the
+version is unchanged the entries are kept, otherwise everything is
+dropped and reloaded lazily. Routes can also invalidate explicitly.
+
+The whole catalog (all tables, columns, primary and foreign keys) can be
+loaded at once with a constant number of queries; doing so also fills the
+per-table entries.
+"""
+import threading
+import time
+
+# Sentinel stored for tables known not to exist
+_MISSING = object()
+
+
+class TableMetadata:
+    """Columns and primary key of one table"""
+
+    __slots__ = ('name', 'columns', 'column_names', 'primary_keys', '_column_set')
+
+    def __init__(self, name, columns):
+        self.name = name
+        # Each column: {'name', 'type', 'data_type', 'is_nullable', 'default', 'is_primary', 'extra'}
+        self.columns = columns
+        self.column_names = [col['name'] for col in columns]
+        self.primary_keys = [col['name'] for col in columns if col['is_primary']]
+        self._column_set = set(self.column_names)
+
+    @property
+    def pk(self):
+        return self.primary_keys[0] if self.primary_keys else None
+
+    def has_column(self, column_name):
+        return column_name in self._column_set
+
+
+class SchemaCatalog:
+    """Snapshot of every table in the database and the foreign keys between them"""
+
+    __slots__ = ('tables', 'relationships', 'version')
+
+    def __init__(self, tables, relationships, version=None):
+        # tables: {name: TableMetadata} in display order
+        self.tables = tables
+        # relationships: [{'from': {'table', 'column'}, 'to': {'table', 'column'}}]
+        self.relationships = relationships
+        self.version = version
+
+
+class MetadataCache:
+    """
+    Per-database metadata cache.
+
+    - load_table(connection, table_name): returns TableMetadata, or None if the table does not exist
+    - load_catalog(connection): returns a SchemaCatalog for the whole database
+    - probe_version(connection): returns a value that changes whenever the schema changes
+    - on_change():               called when a probe finds the schema changed since the last one
+    """
+
+    def __init__(self, load_table, probe_version, load_catalog=None, ttl=30.0, on_change=None):
+        self.ttl = ttl
+        self._on_change = on_change or (lambda: None)
+        self._load_table = load_table
+        self._load_catalog = load_catalog
+        self._probe_version = probe_version
+        self._tables = {}
+        self._catalog = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'version_checks': 0, 'invalidations': 0}
+
+    def _revalidate(self, connection):
+        """Run the schema version probe once the TTL has expired"""
+        now = time.monotonic()
+        if now - self._checked_at < self.ttl:
+            return
+        version = self._probe_version(connection)
+        with self._lock:
+            self._stats['version_checks'] += 1
+            changed = self._version is not None and version != self._version
+            if version != self._version:
+                if changed:
+                    self._stats['invalidations'] += 1
+                self._tables.clear()
+                self._catalog = None
+                self._version = version
+            self._checked_at = now
+        if changed:
+            self._on_change()
+
+    def version(self, connection):
+        """Current schema version (probed at most once per TTL)"""
+        self._revalidate(connection)
+        return self._version
+
+    def table(self, connection, table_name):
+        """Return TableMetadata for table_name, or None if the table does not exist"""
+        self._revalidate(connection)
+        entry = self._tables.get(table_name)
+        if entry is not None:
+            self._stats['hits'] += 1
+            return None if entry is _MISSING else entry
+
+        self._stats['misses'] += 1
+        metadata = self._load_table(connection, table_name)
+        with self._lock:
+            self._tables[table_name] = _MISSING if metadata is None else metadata
+        return metadata
+
+    def catalog(self, connection):
+        """Return the SchemaCatalog, loading it with set-based queries on a miss"""
+        self._revalidate(connection)
+        catalog = self._catalog
+        if catalog is not None:
+            self._stats['hits'] += 1
+            return catalog
+
+        self._stats['misses'] += 1
+        catalog = self._load_catalog(connection)
+        with self._lock:
+            catalog.version = self._version
+            self._catalog = catalog
+            self._tables.update(catalog.tables)
+        return catalog
+
+    def invalidate(self, table_name=None):
+        """Forget one table (or everything) and force a version probe on next use"""
+        with self._lock:
+            if table_name is None:
+                self._tables.clear()
+                self._version = None
+            else:
+                self._tables.pop(table_name, None)
+            self._catalog = None
+            self._checked_at = 0.0
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ttl': self.ttl,
+                'tables': sum(1 for entry in self._tables.values() if entry is not _MISSING),
+                'missing_tables': sum(1 for entry in self._tables.values() if entry is _MISSING),
+                'catalog_loaded': self._catalog is not None,
+                'version': self._version,
+                'seconds_since_check': round(time.monotonic() - self._checked_at, 3) if self._checked_at else None,
+                **self._stats,
+            }
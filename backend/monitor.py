@@ -1,18 +1,40 @@
-from flask import Flask, render_template, jsonify, request, make_response, url_for, send_file
+from flask import Flask, Response, render_template, jsonify, request, make_response, url_for, send_file, g
 from flask_cors import CORS
+from werkzeug.local import LocalProxy
 import mysql.connector
 import psycopg2
 
+import psycopg2.extensions
 import psycopg2.extras
 import time
+import threading
 import logging
 import os
 import json
+import hashlib
+import base64
 import io
-import csv
+import tempfile
 import pandas as pd
-from datetime import timedelta, datetime, date
-from decimal import Decimal
+from datetime import timedelta, datetime, date, time as dt_time
+from concurrent.futures import ThreadPoolExecutor
+
+from archive_export import ParallelExport, iter_archive
+from arrow_export import ARROW_FORMATS, require_pyarrow, write_arrow
+from binlog_cdc import BinlogChangeFeed, BinlogFileReader, BinlogPosition, BinlogStreamSource, PositionStore
+from compression import compress_response
+from db_context import ContextRegistry, SessionRegistry
+from db_pool import ConnectionPool, PoolRegistry
+from export_engine import (DEFAULT_FETCH_SIZE, CopyReader, CursorReader, ExportReader, export_snapshot, iter_csv,
+                           iter_gzip, write_xlsx)
+from export_jobs import ExportJobManager
+from metadata_cache import MetadataCache, SchemaCatalog, TableMetadata
+from page_cache import CachedPage, PageCache
+from pg_notify_cdc import DEFAULT_CHANNEL, PgChangeListener, install_triggers, triggered_tables, uninstall_triggers
+from row_counts import COUNT_STRATEGIES, RowCounter
+from row_serializer import RowSerializer, dumps as json_dumps, make_json_serializable, packb, require_msgpack
+from statement_cache import PreparedStatements
+from stream_hub import StreamHub, format_event
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,34 +45,13 @@ logging.getLogger('mysql.connector').setLevel(logging.WARNING)
 logging.getLogger('werkzeug').setLevel(logging.WARNING)
 
 
-def make_json_serializable(obj):
+def process_database_rows(rows, description=None, db_type=None):
     """
-    Convert non-JSON-serializable objects to JSON-serializable formats.
-    Handles timedelta, datetime, date, Decimal, and other common PostgreSQL types.
-    """
-    if isinstance(obj, timedelta):
-        # Convert timedelta to string representation (e.g., "0:01:23.456789")
-        return str(obj)
-    elif isinstance(obj, (datetime, date)):
-        # Convert datetime/date to ISO format string
-        return obj.isoformat()
-    elif isinstance(obj, Decimal):
-        # Convert Decimal to float
-        return float(obj)
-    elif isinstance(obj, (dict, list)):
-        # Recursively process dictionaries and lists
-        if isinstance(obj, dict):
-            return {key: make_json_serializable(value) for key, value in obj.items()}
-        else:
-            return [make_json_serializable(item) for item in obj]
-    else:
-        # Return as-is for JSON-serializable types
-        return obj
-
-def process_database_rows(rows):
-    """
-    Process database rows to make them JSON serializable.
+    Process database rows to make them JSON serializable. With the cursor
+    description the conversion is chosen per column (see row_serializer.py).
     """
+    if description is not None:
+        return RowSerializer(description, db_type).serialize_rows(rows)
     processed_rows = []
     for row in rows:
         if isinstance(row, dict):
@@ -62,6 +63,57 @@ def process_database_rows(rows):
         processed_rows.append(processed_row)
     return processed_rows
 
+def json_response(payload, status=200):
+    """JSON response encoded with the fast encoder (orjson when installed)"""
+    return Response(json_dumps(payload), status=status, mimetype='application/json')
+
+# Shapes of the rows in /data responses (?format=):
+# - objects:  a list of {column: value} objects (the default)
+# - compact:  a list of row arrays, in the order of "columns"
+# - columnar: one array of values per column, in the order of "columns"
+DATA_FORMATS = ('objects', 'compact', 'columnar')
+
+# Binary encodings a client can ask for with Accept instead of JSON
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+def negotiate_mimetype(offered):
+    """
+    The mimetype among JSON and offered that the request's Accept header
+    prefers; JSON wins ties (and */*). Encodings whose optional package is
+    missing are left out, so those clients get JSON.
+    """
+    available = []
+    for mimetype in offered:
+        try:
+            if mimetype in MSGPACK_MIMETYPES:
+                require_msgpack()
+            elif mimetype == ARROW_STREAM_MIMETYPE:
+                require_pyarrow()
+        except RuntimeError:
+            continue
+        available.append(mimetype)
+    if not available:
+        return 'application/json'
+    return request.accept_mimetypes.best_match(['application/json'] + available, default='application/json')
+
+def render_page_data(response, rows, description, db_type, data_format):
+    """Set the serialized rows of a /data response in the requested format"""
+    if data_format == 'objects':
+        response['data'] = process_database_rows(rows, description, db_type)
+        return response
+    serializer = RowSerializer(description, db_type)
+    if description is not None:
+        # Tuple rows follow the cursor, which is also right when the cached column list is stale
+        response['columns'] = serializer.columns
+    response['format'] = data_format
+    if data_format == 'columnar':
+        response['data'] = serializer.serialize_columns(rows) if description is not None \
+            else [[] for _ in response['columns']]
+    else:
+        response['data'] = serializer.serialize_rows(rows)
+    return response
+
 print(f"Script directory: {os.path.dirname(os.path.abspath(__file__))}")
 
 # Ensure template directory is correctly set
@@ -77,45 +129,427 @@ CORS(app, supports_credentials=True)
 # Add this after CORS(app)
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 
-# Add new global variables
-current_db_config = None
-is_monitoring_paused = False  # New global variable for pause state
+# Connection pool settings (override through environment variables)
+POOL_MIN_SIZE = int(os.environ.get('UDBM_POOL_MIN_SIZE', 1))
+POOL_MAX_SIZE = int(os.environ.get('UDBM_POOL_MAX_SIZE', 10))
+POOL_IDLE_TIMEOUT = float(os.environ.get('UDBM_POOL_IDLE_TIMEOUT', 300))  # seconds
+POOL_VALIDATE_AFTER = float(os.environ.get('UDBM_POOL_VALIDATE_AFTER', 30))  # seconds idle before ping
+POOL_CHECKOUT_TIMEOUT = float(os.environ.get('UDBM_POOL_CHECKOUT_TIMEOUT', 10))  # seconds
 
-# Remove hardcoded credentials and make connection dependent on configuration
-def get_db_connection():
-    global current_db_config
-    if not current_db_config:
-        raise Exception("No database configured")
+pool_registry = PoolRegistry()
+
+# Prepared statements of the polling queries, kept per pooled connection (see statement_cache.py)
+PREPARED_STATEMENTS = int(os.environ.get('UDBM_PREPARED_STATEMENTS', 64))  # per connection; 0 turns them off
+# mysql-connector resets a prepared statement with an extra round trip on every execution,
+# which costs more than the parse it saves on distant servers
+PREPARED_MYSQL = os.environ.get('UDBM_PREPARED_MYSQL', '0') == '1'
+
+prepared_statements = PreparedStatements(max_statements=PREPARED_STATEMENTS)
 
-    if current_db_config.get('db_type') == 'postgresql':
+def run_query(connection, db_type, cursor, sql, params, dictionary=False):
+    """
+    Run a read-only polling query; returns (rows, description). The query runs
+    as a prepared statement of the connection when enabled, and otherwise on
+    cursor. dictionary: MySQL rows as dicts (like cursor(dictionary=True)).
+    """
+    if PREPARED_STATEMENTS > 0 and (db_type == 'postgresql' or PREPARED_MYSQL):
+        return prepared_statements.query(connection, db_type, sql, params, cursor, dictionary)
+    cursor.execute(sql, params)
+    return cursor.fetchall(), cursor.description
+
+def config_fingerprint(config):
+    """Stable key identifying a database configuration (used to key pools)"""
+    db_type = config.get('db_type') or config.get('type') or 'mysql'
+    relevant = {k: v for k, v in config.items() if k not in ['db_type', 'type']}
+    relevant['db_type'] = db_type
+    digest = hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+def open_raw_connection(config):
+    """Open a new, unpooled connection for the given configuration"""
+    if config.get('db_type') == 'postgresql':
         # PostgreSQL connection
         conn_params = {
-            'host': current_db_config['host'],
-            'user': current_db_config['user'],
-            'password': current_db_config['password'],
-            'database': current_db_config['database']
+            'host': config['host'],
+            'user': config['user'],
+            'password': config['password'],
+            'database': config['database']
         }
         return psycopg2.connect(**conn_params)
     else:
         # MySQL connection (default)
-        return mysql.connector.connect(**{k: v for k, v in current_db_config.items() if k not in ['db_type', 'type']})
+        return mysql.connector.connect(**{k: v for k, v in config.items() if k not in ['db_type', 'type']})
 
-def load_last_used_database():
-    global current_db_config
+def _validate_pooled_connection(db_type):
+    def validate(raw, deep):
+        if db_type == 'postgresql':
+            if raw.closed:
+                return False
+            if deep:
+                cursor = raw.cursor()
+                cursor.execute('SELECT 1')
+                cursor.close()
+                raw.rollback()
+            return True
+        # mysql-connector's is_connected() pings the server
+        return raw.is_connected() if deep else True
+    return validate
+
+def _reset_pooled_connection(db_type):
+    def reset(raw):
+        if db_type == 'postgresql':
+            if raw.closed:
+                raise psycopg2.InterfaceError('connection already closed')
+            if raw.autocommit:
+                raw.autocommit = False
+            # End the implicit transaction so pooled connections don't hold snapshots or locks
+            if raw.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                raw.rollback()
+        else:
+            raw.rollback()
+    return reset
+
+def get_connection_pool(config, fingerprint=None):
+    """Return the connection pool for a configuration, creating it on first use"""
+    db_type = 'postgresql' if config.get('db_type') == 'postgresql' else 'mysql'
+
+    def create_pool():
+        return ConnectionPool(
+            connect=lambda: open_raw_connection(config),
+            validate=_validate_pooled_connection(db_type),
+            reset=_reset_pooled_connection(db_type),
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            idle_timeout=POOL_IDLE_TIMEOUT,
+            validate_after=POOL_VALIDATE_AFTER,
+            checkout_timeout=POOL_CHECKOUT_TIMEOUT,
+            name=f"{db_type}://{config.get('user')}@{config.get('host')}/{config.get('database')}"
+        )
+
+    return pool_registry.get(fingerprint or config_fingerprint(config), create_pool)
+
+# Metadata cache settings
+METADATA_TTL = float(os.environ.get('UDBM_METADATA_TTL', 30))  # seconds before the schema version is re-checked
+
+def _text(value):
+    """information_schema values may come back as bytes from mysql-connector"""
+    return value.decode('utf-8') if isinstance(value, (bytes, bytearray)) else value
+
+def load_table_metadata(connection, db_type, table_name):
+    """Load the columns and primary key of one table (None if the table does not exist)"""
+    cursor = connection.cursor()
+    try:
+        if db_type == 'postgresql':
+            cursor.execute("""
+                SELECT
+                    c.column_name,
+                    c.data_type,
+                    c.is_nullable,
+                    c.column_default,
+                    COALESCE(i.indisprimary, false) as is_primary
+                FROM information_schema.columns c
+                JOIN pg_class t ON t.relname = c.table_name
+                    AND t.relnamespace = 'public'::regnamespace
+                JOIN pg_attribute a ON a.attrelid = t.oid AND a.attname = c.column_name
+                LEFT JOIN pg_index i ON i.indrelid = t.oid AND i.indisprimary
+                    AND a.attnum = ANY(i.indkey)
+                WHERE c.table_schema = 'public'
+                AND c.table_name = %s
+                ORDER BY c.ordinal_position
+            """, (table_name,))
+            columns = [{
+                'name': row[0],
+                'type': row[1],
+                'data_type': row[1],
+                'is_nullable': row[2] == 'YES',
+                'default': row[3],
+                'is_primary': bool(row[4]),
+                'extra': ''
+            } for row in cursor.fetchall()]
+            exists_query = """
+                SELECT COUNT(*) FROM information_schema.tables
+                WHERE table_schema = 'public'
+                AND table_name = %s
+            """
+        else:
+            cursor.execute("""
+                SELECT COLUMN_NAME, COLUMN_TYPE, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA
+                FROM information_schema.columns
+                WHERE table_schema = DATABASE()
+                AND table_name = %s
+                ORDER BY ORDINAL_POSITION
+            """, (table_name,))
+            columns = [{
+                'name': _text(row[0]),
+                'type': _text(row[1]),
+                'data_type': _text(row[2]),
+                'is_nullable': _text(row[3]) == 'YES',
+                'default': _text(row[4]),
+                'is_primary': _text(row[5]) == 'PRI',
+                'extra': _text(row[6]) or ''
+            } for row in cursor.fetchall()]
+            exists_query = """
+                SELECT COUNT(*) FROM information_schema.tables
+                WHERE table_schema = DATABASE()
+                AND table_name = %s
+            """
+
+        if not columns:
+            # Distinguish a missing table from one without (visible) columns
+            cursor.execute(exists_query, (table_name,))
+            if not cursor.fetchone()[0]:
+                return None
+        return TableMetadata(table_name, columns)
+    finally:
+        cursor.close()
+
+def load_catalog(connection, db_type):
+    """Load all tables, columns, primary keys and foreign keys with a constant number of queries"""
+    cursor = connection.cursor()
+    try:
+        if db_type == 'postgresql':
+            cursor.execute("""
+                SELECT table_name
+                FROM information_schema.tables
+                WHERE table_schema = 'public'
+                AND table_type = 'BASE TABLE'
+                ORDER BY table_name
+            """)
+            table_names = [_text(row[0]) for row in cursor.fetchall()]
+
+            cursor.execute("""
+                SELECT
+                    c.table_name,
+                    c.column_name,
+                    c.data_type,
+                    c.is_nullable,
+                    c.column_default,
+                    COALESCE(i.indisprimary, false) as is_primary
+                FROM information_schema.columns c
+                JOIN pg_class t ON t.relname = c.table_name
+                    AND t.relnamespace = 'public'::regnamespace
+                JOIN pg_attribute a ON a.attrelid = t.oid AND a.attname = c.column_name
+                LEFT JOIN pg_index i ON i.indrelid = t.oid AND i.indisprimary
+                    AND a.attnum = ANY(i.indkey)
+                WHERE c.table_schema = 'public'
+                ORDER BY c.table_name, c.ordinal_position
+            """)
+            columns_by_table = {}
+            for row in cursor.fetchall():
+                columns_by_table.setdefault(row[0], []).append({
+                    'name': row[1],
+                    'type': row[2],
+                    'data_type': row[2],
+                    'is_nullable': row[3] == 'YES',
+                    'default': row[4],
+                    'is_primary': bool(row[5]),
+                    'extra': ''
+                })
+
+            # unnest() pairs the columns of composite foreign keys positionally
+            cursor.execute("""
+                SELECT
+                    src.relname as table_name,
+                    att.attname as column_name,
+                    dst.relname as foreign_table_name,
+                    att2.attname as foreign_column_name
+                FROM pg_constraint con
+                JOIN pg_class src ON src.oid = con.conrelid
+                JOIN pg_class dst ON dst.oid = con.confrelid
+                JOIN pg_namespace nsp ON nsp.oid = con.connamespace
+                CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(src_attnum, dst_attnum)
+                JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = k.src_attnum
+                JOIN pg_attribute att2 ON att2.attrelid = con.confrelid AND att2.attnum = k.dst_attnum
+                WHERE con.contype = 'f'
+                AND nsp.nspname = 'public'
+                ORDER BY src.relname, con.conname
+            """)
+            foreign_keys = cursor.fetchall()
+        else:
+            cursor.execute("""
+                SELECT TABLE_NAME
+                FROM information_schema.tables
+                WHERE table_schema = DATABASE()
+                ORDER BY TABLE_NAME
+            """)
+            table_names = [_text(row[0]) for row in cursor.fetchall()]
+
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA
+                FROM information_schema.columns
+                WHERE table_schema = DATABASE()
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """)
+            columns_by_table = {}
+            for row in cursor.fetchall():
+                columns_by_table.setdefault(_text(row[0]), []).append({
+                    'name': _text(row[1]),
+                    'type': _text(row[2]),
+                    'data_type': _text(row[3]),
+                    'is_nullable': _text(row[4]) == 'YES',
+                    'default': _text(row[5]),
+                    'is_primary': _text(row[6]) == 'PRI',
+                    'extra': _text(row[7]) or ''
+                })
+
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND REFERENCED_TABLE_NAME IS NOT NULL
+                ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+            """)
+            foreign_keys = cursor.fetchall()
+
+        tables = {name: TableMetadata(name, columns_by_table.get(name, [])) for name in table_names}
+        relationships = [{
+            'from': {'table': _text(fk[0]), 'column': _text(fk[1])},
+            'to': {'table': _text(fk[2]), 'column': _text(fk[3])}
+        } for fk in foreign_keys if _text(fk[0]) in tables]
+        return SchemaCatalog(tables, relationships)
+    finally:
+        cursor.close()
+
+def probe_schema_version(connection, db_type):
+    """Cheap fingerprint of the schema; changes after any DDL on the monitored tables"""
+    cursor = connection.cursor()
+    try:
+        if db_type == 'postgresql':
+            # Catalog rows get a new xmin whenever DDL rewrites them
+            cursor.execute("""
+                SELECT md5(COALESCE(string_agg(v, ',' ORDER BY v), ''))
+                FROM (
+                    SELECT 'c' || c.oid || ':' || c.xmin AS v
+                    FROM pg_class c
+                    WHERE c.relnamespace = 'public'::regnamespace AND c.relkind IN ('r', 'p')
+                    UNION ALL
+                    SELECT 'a' || a.attrelid || ':' || a.attnum || ':' || a.xmin
+                    FROM pg_attribute a
+                    JOIN pg_class c ON c.oid = a.attrelid
+                    WHERE c.relnamespace = 'public'::regnamespace AND c.relkind IN ('r', 'p')
+                    AND a.attnum > 0
+                    UNION ALL
+                    SELECT 'k' || k.oid || ':' || k.xmin
+                    FROM pg_constraint k
+                    WHERE k.connamespace = 'public'::regnamespace
+                ) catalog_rows
+            """)
+        else:
+            cursor.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE()),
+                    (SELECT MAX(CREATE_TIME) FROM information_schema.tables WHERE table_schema = DATABASE()),
+                    (SELECT COALESCE(SUM(CRC32(CONCAT_WS(':', TABLE_NAME, COLUMN_NAME, COLUMN_TYPE,
+                                                         COLUMN_KEY, ORDINAL_POSITION))), 0)
+                     FROM information_schema.columns WHERE table_schema = DATABASE()),
+                    (SELECT COALESCE(SUM(CRC32(CONCAT_WS(':', TABLE_NAME, COLUMN_NAME, CONSTRAINT_NAME,
+                                                         REFERENCED_TABLE_NAME))), 0)
+                     FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = DATABASE())
+            """)
+        return tuple(str(_text(value)) for value in cursor.fetchone())
+    finally:
+        cursor.close()
+
+def create_metadata_cache(context):
+    # Only capture the type: a cache referring back to its context would keep it from being evicted
+    db_type = context.db_type
+    return MetadataCache(
+        load_table=lambda connection, table_name: load_table_metadata(connection, db_type, table_name),
+        probe_version=lambda connection: probe_schema_version(connection, db_type),
+        load_catalog=lambda connection: load_catalog(connection, db_type),
+        ttl=METADATA_TTL,
+        # DDL from elsewhere: drop the prepared statements before they fail on the changed tables
+        on_change=lambda: prepared_statements.invalidate()
+    )
+
+def get_table_metadata(connection, table_name, context=None):
+    """Cached TableMetadata for a table of the current database (None if it does not exist)"""
+    context = context or current_db_context()
+    return context.metadata.table(connection, table_name)
+
+def get_schema_catalog(connection, context=None):
+    """Cached SchemaCatalog (all tables, columns and foreign keys) of the current database"""
+    context = context or current_db_context()
+    return context.metadata.catalog(connection)
+
+def invalidate_table_metadata(table_name=None, context=None):
+    context = context or current_db_context()
+    if context is not None:
+        context.metadata.invalidate(table_name)
+        row_counter.forget(context.fingerprint, table_name)
+    # Statements prepared before DDL may no longer match the tables
+    prepared_statements.invalidate()
+
+# Server-side sessions: every browser gets an opaque token mapped to its own database context,
+# so concurrent users monitoring different databases never overwrite each other's configuration
+SESSION_COOKIE = 'udbm_session'
+SESSION_IDLE_TTL = float(os.environ.get('UDBM_SESSION_IDLE_TTL', 1800))  # seconds a session survives unused
+
+def forget_context(fingerprint):
+    """Drop what is cached for a database nobody monitors any more"""
+    row_counter.forget(fingerprint)
+    page_cache.invalidate(fingerprint)
+
+context_registry = ContextRegistry(
+    config_fingerprint,
+    lambda context: get_connection_pool(context.config, context.fingerprint),
+    create_metadata_cache,
+    on_evict=forget_context
+)
+session_registry = SessionRegistry(ttl=SESSION_IDLE_TTL)
+
+def current_session():
+    """Resolve the monitor session for this request from its session cookie.
+
+    Without a valid cookie the request gets a new session that is only stored
+    (and handed to the client) once it holds state, see keep_session().
+    """
+    session = g.get('monitor_session')
+    if session is None:
+        session = session_registry.get(request.cookies.get(SESSION_COOKIE))
+        if session is None:
+            session = session_registry.new()
+            # New (or expired) session: derive its database from the client's cookies once
+            sync_session_with_cookies(session)
+        g.monitor_session = session
+    return session
+
+def keep_session(response):
+    """Store a new session that got a database or paused polling, and set its cookie"""
+    session = g.get('monitor_session')
+    if session is None or session in session_registry:
+        return
+    if session.context is not None or session.paused:
+        session_registry.keep(session)
+        response.set_cookie(SESSION_COOKIE, session.token, httponly=True, samesite='Lax')
+
+def current_db_context():
+    """DatabaseContext bound to the current session (None if no database is selected)"""
+    return current_session().context
+
+# Read-only view of the active configuration for the current request
+current_db_config = LocalProxy(lambda: getattr(current_db_context(), 'config', None))
+
+def get_db_connection(context=None):
+    """Check out a pooled connection; calling close() returns it to the pool"""
+    context = context or current_db_context()
+    if context is None:
+        raise Exception("No database configured")
+
+    return context.connect()
+
+def config_from_cookies(db_configs_raw, last_used):
+    """Pick the last used (or first) configuration from the client's cookies"""
     try:
-        db_configs_raw = request.cookies.get('db_configs', '{}')
         if not db_configs_raw:
-            current_db_config = None
-            return False
+            return None
 
         from urllib.parse import unquote
         db_configs = json.loads(unquote(db_configs_raw))
 
         if not db_configs:
-            current_db_config = None
-            return False
+            return None
 
-        last_used = request.cookies.get('last_used_db')
         if last_used and last_used in db_configs:
             config = db_configs[last_used]
             # Ensure both type and db_type are set correctly
@@ -124,31 +558,46 @@ def load_last_used_database():
                 'type': db_type,
                 'db_type': db_type
             })
-            current_db_config = config
-            return True
+            return config
         else:
             # If no last_used but configs exist, use the first one
             first_config = next(iter(db_configs.values()))
             first_config['db_type'] = first_config.get('type', 'mysql')
-            current_db_config = first_config
-            return True
+            return first_config
     except Exception as e:
         logger.error(f"Error loading last database: {e}")
-        current_db_config = None
-        return False
+        return None
+
+def sync_session_with_cookies(session):
+    """Bind a session to the database selected in its cookies.
+
+    Cookies are only re-parsed when their raw value changed since the last sync.
+    """
+    signature = (request.cookies.get('db_configs', '{}'), request.cookies.get('last_used_db'))
+    if signature != session.cookie_signature:
+        config = config_from_cookies(*signature)
+        session.context = context_registry.get(config) if config else None
+        session.cookie_signature = signature
+    return session.context is not None
+
+def load_last_used_database():
+    return sync_session_with_cookies(current_session())
+
+def reset_session_database(session=None):
+    """Unbind the session from its database; cookies are re-read on the next sync"""
+    session = session or current_session()
+    session.context = None
+    session.cookie_signature = None
 
 @app.route('/api/database', methods=['GET', 'POST', 'DELETE'])
 def handle_database():
-    global current_db_config
-
     # For GET requests, always try to sync with client cookies first
     if request.method == 'GET':
         if not load_last_used_database():
-            current_db_config = None
             return jsonify({})
 
     if request.method == 'DELETE':
-        current_db_config = None
+        reset_session_database()
         response = make_response(jsonify({
             'status': 'success',
             'message': 'Database configuration cleared'
@@ -162,25 +611,7 @@ def handle_database():
         try:
             db_type = data.get('type', 'mysql')  # Use 'type' from frontend form
 
-            # Test connection based on database type
-            if db_type == 'postgresql':
-                connection = psycopg2.connect(
-                    host=data['host'],
-                    user=data['user'],
-                    password=data['password'],
-                    database=data['database']
-                )
-            else:
-                connection = mysql.connector.connect(
-                    host=data['host'],
-                    user=data['user'],
-                    password=data['password'],
-                    database=data['database']
-                )
-            connection.close()
-
-            # If successful, update current config
-            current_db_config = {
+            config = {
                 'host': data['host'],
                 'user': data['user'],
                 'password': data['password'],
@@ -188,6 +619,20 @@ def handle_database():
                 'type': db_type,  # Always store the type field
                 'db_type': db_type  # Keep db_type for backward compatibility
             }
+            context = context_registry.get(config)
+
+            # Test connection through the context's pool so the connection stays warm
+            try:
+                connection = context.connect()
+            except Exception:
+                pool_registry.discard(context.fingerprint)
+                raise
+            connection.close()
+
+            # If successful, bind this session to the new database
+            session = current_session()
+            session.context = context
+            session.cookie_signature = None
 
             response = make_response(jsonify({
                 'status': 'success',
@@ -200,7 +645,7 @@ def handle_database():
                 db_configs = {}
 
             db_key = f"{data['host']}/{data['database']}"
-            db_configs[db_key] = current_db_config
+            db_configs[db_key] = config
 
             # URL encode the JSON string before setting cookie
             from urllib.parse import quote
@@ -216,11 +661,7 @@ def handle_database():
                 'message': str(e)
             }), 400
 
-    # GET method - check if we actually have a config
-    if not current_db_config:
-        # Try to load from cookies
-        load_last_used_database()
-
+    # GET method - return the active config without its password
     safe_config = dict(current_db_config or {})
     if 'password' in safe_config:
         safe_config['password'] = '********'
@@ -363,10 +804,7 @@ def build_where_clause(filters, db_type='mysql'):
             continue
 
         # Escape column name based on database type
-        if db_type == 'postgresql':
-            escaped_column = f'"{column}"'
-        else:
-            escaped_column = f'`{column}`'
+        escaped_column = quote_identifier(column, db_type)
 
         if len(values) == 1:
             where_conditions.append(f"{escaped_column} = %s")
@@ -380,20 +818,165 @@ def build_where_clause(filters, db_type='mysql'):
     where_clause = " WHERE " + " AND ".join(where_conditions) if where_conditions else ""
     return where_clause, params
 
+def quote_identifier(name, db_type='mysql'):
+    """Quote a table or column name for the given database type"""
+    if db_type == 'postgresql':
+        return '"' + name.replace('"', '""') + '"'
+    return '`' + name.replace('`', '``') + '`'
+
+def parse_filter_args(args):
+    """Collect filter_<column>=v1,v2 query parameters into {column: [values]}"""
+    filters = {}
+    for key, value in args.items():
+        if key.startswith('filter_'):
+            column_name = key[7:]  # Remove 'filter_' prefix
+            if value:  # Only add non-empty filters
+                # Parse multiple values separated by commas
+                filter_values = [v.strip() for v in value.split(',') if v.strip()]
+                if filter_values:
+                    filters[column_name] = filter_values
+    return filters
+
+def parse_sort_args(args):
+    """Return (sort_column, sort_direction) from query parameters"""
+    sort_column = args.get('sort_column')
+    sort_direction = args.get('sort_direction', 'desc').lower()
+    if sort_direction not in ['asc', 'desc']:
+        sort_direction = 'desc'
+    return sort_column, sort_direction
+
+def is_stale_metadata_error(e):
+    """True if a database error means a table or column no longer exists"""
+    if isinstance(e, psycopg2.Error):
+        return getattr(e, 'pgcode', None) in ('42P01', '42703')  # undefined_table / undefined_column
+    return getattr(e, 'errno', None) in (1146, 1054)  # ER_NO_SUCH_TABLE / ER_BAD_FIELD_ERROR
+
+def _etag_value(value):
+    """value with every object whose repr holds its address (bytea memoryviews) replaced by its contents"""
+    if isinstance(value, memoryview):
+        return bytes(value)
+    if isinstance(value, dict):
+        return {key: _etag_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_etag_value(item) for item in value]
+    if ' at 0x' in repr(value):
+        return (type(value).__name__, str(value))
+    return value
+
+def make_etag(*parts):
+    """Weak validator computed from the raw values a response is built from"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        text = repr(part)
+        if ' at 0x' in text:
+            # Only walk values whose repr would change from one fetch to the next
+            text = repr(_etag_value(part))
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds this version, otherwise None"""
+    if request.if_none_match.contains_weak(etag):
+        return with_etag(make_response('', 304), etag)
+    return None
+
+def with_etag(response, etag):
+    # no-cache: clients may store the body but must revalidate it on every poll
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 def build_order_clause(sort_column, sort_direction, db_type='mysql'):
     """Build ORDER BY clause from sort parameters"""
     if not sort_column:
         return ""
 
     # Escape column name based on database type
-    if db_type == 'postgresql':
-        escaped_column = f'"{sort_column}"'
-    else:
-        escaped_column = f'`{sort_column}`'
+    escaped_column = quote_identifier(sort_column, db_type)
 
     direction = "ASC" if sort_direction == 'asc' else "DESC"
     return f" ORDER BY {escaped_column} {direction}"
 
+# Keyset pagination: a page continues from an opaque cursor holding the sort key of the row
+# it starts after, so deep pages cost as much as the first one and concurrent inserts do not
+# shift rows between pages. The primary key breaks ties in the sort column.
+def keyset_order(metadata, sort_column, sort_direction):
+    """[(column, direction)] giving a unique row order, or None when the table has no primary key"""
+    if not metadata.primary_keys:
+        return None
+    keys = [(sort_column, sort_direction)]
+    keys += [(pk, sort_direction) for pk in metadata.primary_keys if pk != sort_column]
+    return keys
+
+def build_keyset_condition(keys, values, db_type, nullable=False):
+    """
+    Condition selecting the rows after `values` in ORDER BY order of keys.
+    nullable: the first key column may hold NULLs, which PostgreSQL sorts as
+    the largest value and MySQL as the smallest.
+    """
+    def after(i):
+        column, direction = keys[i]
+        quoted = quote_identifier(column, db_type)
+        op = '>' if direction == 'asc' else '<'
+        if i == len(keys) - 1:
+            return f"{quoted} {op} %s", [values[i]]
+        tail, tail_params = after(i + 1)
+        if i == 0 and nullable:
+            nulls_last = (direction == 'asc') == (db_type == 'postgresql')
+            if values[0] is None:
+                sql = f"({quoted} IS NULL AND {tail})"
+                return (sql if nulls_last else f"({sql} OR {quoted} IS NOT NULL)"), tail_params
+            sql = f"{quoted} {op} %s OR ({quoted} = %s AND {tail})"
+            if nulls_last:
+                sql += f" OR {quoted} IS NULL"
+            return f"({sql})", [values[0], values[0]] + tail_params
+        return f"({quoted} {op} %s OR ({quoted} = %s AND {tail}))", [values[i], values[i]] + tail_params
+
+    condition, params = after(0)
+    if not nullable:
+        # A plain range on the leading column lets both databases seek the index directly
+        column, direction = keys[0]
+        bound = '>=' if direction == 'asc' else '<='
+        if db_type == 'postgresql' and len({direction for _, direction in keys}) == 1:
+            quoted = ', '.join(quote_identifier(column, db_type) for column, _ in keys)
+            return f"({quoted}) {bound[0]} ({', '.join(['%s'] * len(keys))})", list(values)
+        condition = f"{quote_identifier(column, db_type)} {bound} %s AND {condition}"
+        params = [values[0]] + params
+    return condition, params
+
+def _cursor_value(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'b': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, timedelta):
+        # MySQL TIME columns come back as timedelta
+        micros = int(value.total_seconds() * 1000000)
+        sign, micros = ('-' if micros < 0 else ''), abs(micros)
+        seconds, micros = divmod(micros, 1000000)
+        return f"{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}.{micros:06d}"
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+def encode_page_cursor(signature, direction, values):
+    payload = json.dumps([signature, direction, [_cursor_value(v) for v in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_page_cursor(token, signature):
+    """Return (direction, values) of a cursor issued for the same table, sort and filters"""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_signature, direction, values = json.loads(payload)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+    if cursor_signature != signature or direction not in ('next', 'prev'):
+        raise ValueError('Cursor does not match the current table, sort or filters')
+    return direction, [base64.b64decode(v['b']) if isinstance(v, dict) else v for v in values]
+
 def get_table_names():
     """Get table names with better connection handling and retries"""
     max_retries = 3
@@ -403,81 +986,16 @@ def get_table_names():
 
     for attempt in range(max_retries):
         connection = None
-        cursor = None
         try:
             # Attempt database connection
             connection = get_db_connection()
-            cursor = connection.cursor()
 
-            # Get table information based on database type
-            if current_db_config.get('db_type') == 'postgresql':
-                # PostgreSQL query
-                cursor.execute("""
-                    SELECT table_name
-                    FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                    AND table_type = 'BASE TABLE'
-                """)
-                table_names = [table[0] for table in cursor.fetchall()]
-
-                for table_name in table_names:
-                    if table_name not in IGNORED_TABLES:
-                        try:
-                            # Check if table exists
-                            cursor.execute("""
-                                SELECT EXISTS (
-                                    SELECT FROM information_schema.tables
-                                    WHERE table_schema = 'public'
-                                    AND table_name = %s
-                                )
-                            """, (table_name,))
-                            result = cursor.fetchone()
-                            exists = result[0] if result else False
-                            if exists:  # Only add if table exists
-                                # Get primary key info for PostgreSQL
-                                cursor.execute("""
-                                    SELECT a.attname
-                                    FROM pg_index i
-                                    JOIN pg_attribute a ON a.attrelid = i.indrelid
-                                    AND a.attnum = ANY(i.indkey)
-                                    WHERE i.indrelid = %s::regclass
-                                    AND i.indisprimary
-                                """, (table_name,))
-                                pk = cursor.fetchone()
-                                tables.append({
-                                    'name': table_name,
-                                    'pk': pk[0] if pk else None
-                                })
-                        except psycopg2.Error as e:
-                            logger.error(f"Error getting primary key for table {table_name}: {e}")
-                            continue
-            else:
-                # MySQL query
-                # First get list of existing tables
-                cursor.execute("""
-                    SELECT table_name
-                    FROM information_schema.tables
-                    WHERE table_schema = DATABASE()
-                """)
-                existing_tables = {table[0] for table in cursor.fetchall()}
-
-                cursor.execute("SHOW TABLES")
-                for table in cursor.fetchall():
-                    table_name = table[0]
-                    if table_name not in IGNORED_TABLES and table_name in existing_tables:
-                        # Get primary key info for MySQL
-                        cursor.execute("""
-                            SELECT COLUMN_NAME
-                            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-                            WHERE TABLE_SCHEMA = DATABASE()
-                            AND TABLE_NAME = %s
-                            AND CONSTRAINT_NAME = 'PRIMARY'
-                        """, (table_name,))
-                        pk = cursor.fetchone()
-                        tables.append({
-                            'name': table_name,
-                            'pk': pk[0] if pk else None
-                        })
+            # Tables and primary keys come from one set-based catalog load
+            catalog = get_schema_catalog(connection)
+            tables = [{
+                'name': table_name,
+                'pk': metadata.pk
+            } for table_name, metadata in catalog.tables.items() if table_name not in IGNORED_TABLES]
 
             # If we get here, query was successful
             return tables
@@ -485,16 +1003,14 @@ def get_table_names():
         except Exception as e:
             last_error = e
             logger.error(f"Error in get_table_names() attempt {attempt + 1}: {e}")
+            if connection:
+                # Retry on a fresh connection rather than a possibly broken pooled one
+                connection.discard()
             if attempt < max_retries - 1:
                 time.sleep(retry_delay)
 
         finally:
             # Clean up database resources
-            if cursor:
-                try:
-                    cursor.close()
-                except:
-                    pass
             if connection:
                 try:
                     connection.close()
@@ -509,11 +1025,9 @@ def get_table_names():
 # Update the index route without referrer check
 @app.route('/')
 def index():
-    global current_db_config
     try:
         # Always sync with client cookies first
         if not load_last_used_database():
-            current_db_config = None
             tables = []
         else:
             try:
@@ -522,7 +1036,7 @@ def index():
                 tables = get_table_names()
             except Exception as e:
                 logger.error(f"Database connection test failed: {e}")
-                current_db_config = None
+                reset_session_database()
                 tables = []
         app.jinja_env.cache = {}
 
@@ -564,14 +1078,55 @@ def check_connection():
         logger.error(f"Connection check failed: {e}")
         return jsonify({"status": "disconnected"}), 503
 
+# Connection pool statistics
+@app.route('/api/pool/stats')
+def get_pool_stats():
+    return jsonify({
+        'settings': {
+            'min_size': POOL_MIN_SIZE,
+            'max_size': POOL_MAX_SIZE,
+            'idle_timeout': POOL_IDLE_TIMEOUT,
+            'validate_after': POOL_VALIDATE_AFTER,
+            'checkout_timeout': POOL_CHECKOUT_TIMEOUT
+        },
+        'pools': pool_registry.stats(),
+        'prepared_statements': prepared_statements.stats()
+    })
+
+# Metadata cache statistics and explicit invalidation
+@app.route('/api/metadata', methods=['GET', 'DELETE'])
+def handle_metadata_cache():
+    context = current_db_context()
+    if context is None:
+        return jsonify({'error': 'No database configured'}), 400
+
+    if request.method == 'DELETE':
+        # Optional ?table=<name> to drop a single table
+        invalidate_table_metadata(request.args.get('table') or None, context)
+        return jsonify({'status': 'success'})
+
+    return jsonify(context.metadata.stats())
+
+# /data page cache statistics and explicit invalidation
+@app.route('/api/page-cache', methods=['GET', 'DELETE'])
+def handle_page_cache():
+    if request.method == 'DELETE':
+        context = current_db_context()
+        if context is None:
+            return jsonify({'error': 'No database configured'}), 400
+        # Optional ?table=<name> to drop a single table
+        invalidate_table_pages(request.args.get('table') or None, context)
+        return jsonify({'status': 'success'})
+    return jsonify(page_cache.stats())
+
 # Add new endpoint to handle monitoring pause state
 @app.route('/monitoring/state', methods=['POST'])
 def set_monitoring_state():
-    global is_monitoring_paused
     try:
         data = request.json
-        is_monitoring_paused = data.get('paused', False)
-        return jsonify({'status': 'success', 'paused': is_monitoring_paused})
+        session = current_session()
+        session.paused = bool(data.get('paused', False))
+        return jsonify({'status': 'success', 'paused': session.paused})
     except Exception as e:
         logger.error(f"Error setting monitoring state: {e}")
         return jsonify({'error': str(e)}), 500
@@ -584,38 +1139,26 @@ def get_column_values(table_name, column_name):
 
     try:
         connection = get_db_connection()
+        db_type = 'postgresql' if current_db_config.get('db_type') == 'postgresql' else 'mysql'
 
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor = connection.cursor()
-            # Verify column exists
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_schema = 'public' AND table_name = %s AND column_name = %s
-            """, (table_name, column_name))
-            if not cursor.fetchone():
-                return jsonify({'error': f'Column {column_name} does not exist in table {table_name}'}), 404
-
-            # Get unique values (limit to reasonable number)
-            query = f'SELECT DISTINCT "{column_name}" FROM "{table_name}" WHERE "{column_name}" IS NOT NULL ORDER BY "{column_name}" LIMIT 1000'
-            cursor.execute(query)
-            results = cursor.fetchall()
-            values = [row[0] for row in results if row[0] is not None]
-        else:
-            cursor = connection.cursor(dictionary=True)
-            # Verify column exists
-            cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE %s", (column_name,))
-            if not cursor.fetchone():
-                return jsonify({'error': f'Column {column_name} does not exist in table {table_name}'}), 404
+        # Verify column exists (from the metadata cache)
+        metadata = get_table_metadata(connection, table_name)
+        if metadata is None or not metadata.has_column(column_name):
+            return jsonify({'error': f'Column {column_name} does not exist in table {table_name}'}), 404
 
-            # Get unique values (limit to reasonable number)
-            query = f"SELECT DISTINCT `{column_name}` FROM {table_name} WHERE `{column_name}` IS NOT NULL ORDER BY `{column_name}` LIMIT 1000"
-            cursor.execute(query)
-            results = cursor.fetchall()
-            values = [row[column_name] for row in results if row[column_name] is not None]
+        # Get unique values (limit to reasonable number)
+        cursor = connection.cursor()
+        column = quote_identifier(column_name, db_type)
+        query = f"SELECT DISTINCT {column} FROM {quote_identifier(table_name, db_type)} WHERE {column} IS NOT NULL ORDER BY {column} LIMIT 1000"
+        cursor.execute(query)
+        results = cursor.fetchall()
+        values = [row[0] for row in results if row[0] is not None]
 
         return jsonify({'values': values})
     except (mysql.connector.Error, psycopg2.Error) as e:
         logger.error(f"Error getting column values for {table_name}.{column_name}: {e}")
+        if is_stale_metadata_error(e):
+            invalidate_table_metadata(table_name)
         return jsonify({'error': str(e)}), 500
     except Exception as e:
         logger.error(f"Error getting column values for {table_name}.{column_name}: {e}")
@@ -624,13 +1167,287 @@ def get_column_values(table_name, column_name):
         if 'connection' in locals():
             connection.close()
 
+# Row count strategies (see row_counts.py); 'exact' unless a request or UDBM_COUNT_STRATEGY opts in
+COUNT_STRATEGY = os.environ.get('UDBM_COUNT_STRATEGY', 'exact')
+COUNT_ESTIMATE_THRESHOLD = int(os.environ.get('UDBM_COUNT_ESTIMATE_THRESHOLD', 1000000))  # rows
+
+# Exact counts ride along with the page query as a scalar subquery, saving a round trip per poll
+COMBINED_PAGE_COUNT = os.environ.get('UDBM_COMBINED_PAGE_COUNT', '1') != '0'
+# Result column carrying that count; tables with a column of this name count separately
+TOTAL_COLUMN = 'udbm_total_rows'
+
+# Primary key types whose maximum can serve as an insert watermark
+WATERMARK_TYPES = {'smallint', 'integer', 'bigint', 'numeric', 'decimal',
+                   'tinyint', 'mediumint', 'int'}
+
+def count_rows_exact(connection, db_type, table_name, filters):
+    cursor = connection.cursor()
+    try:
+        where_clause, params = build_where_clause(filters, db_type)
+        rows, _ = run_query(connection, db_type, cursor,
+                            f"SELECT COUNT(*) FROM {quote_identifier(table_name, db_type)}{where_clause}", params)
+        return int(rows[0][0])
+    finally:
+        cursor.close()
+
+def estimate_row_count(connection, db_type, table_name, filters):
+    """Row count from planner statistics; None if the database has no estimate yet"""
+    cursor = connection.cursor()
+    try:
+        quoted_table = quote_identifier(table_name, db_type)
+        if not filters:
+            if db_type == 'postgresql':
+                # reltuples only moves on ANALYZE / autovacuum, which keeps hybrid counts stable;
+                # it is -1 until the table is first analyzed
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", (quoted_table,))
+            else:
+                cursor.execute("""
+                    SELECT TABLE_ROWS
+                    FROM information_schema.tables
+                    WHERE table_schema = DATABASE() AND table_name = %s
+                """, (table_name,))
+            row = cursor.fetchone()
+            if row is not None and row[0] is not None and row[0] >= 0:
+                return int(row[0])
+
+        # The planner's estimate for the (filtered) scan
+        where_clause, params = build_where_clause(filters, db_type)
+        if db_type == 'postgresql':
+            cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {quoted_table}{where_clause}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        cursor.execute(f"EXPLAIN SELECT 1 FROM {quoted_table}{where_clause}", params)
+        columns = [column[0] for column in cursor.description]
+        row = cursor.fetchall()[0]
+        rows = row[columns.index('rows')]
+        filtered = row[columns.index('filtered')] if 'filtered' in columns else 100
+        return None if rows is None else int(float(rows) * float(filtered or 100) / 100)
+    finally:
+        cursor.close()
+
+def max_key_value(connection, db_type, table_name, pk):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT MAX({quote_identifier(pk, db_type)}) FROM {quote_identifier(table_name, db_type)}")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+def count_rows_since(connection, db_type, table_name, filters, pk, watermark):
+    """(rows whose primary key is above the watermark, their largest key)"""
+    cursor = connection.cursor()
+    try:
+        quoted_pk = quote_identifier(pk, db_type)
+        where_clause, params = build_where_clause(filters, db_type)
+        if watermark is not None:
+            where_clause += f" AND {quoted_pk} > %s" if where_clause else f" WHERE {quoted_pk} > %s"
+            params = params + [watermark]
+        cursor.execute(f"SELECT COUNT(*), MAX({quoted_pk}) FROM {quote_identifier(table_name, db_type)}"
+                       f"{where_clause}", params)
+        inserted, newest = cursor.fetchone()
+        return int(inserted), newest
+    finally:
+        cursor.close()
+
+row_counter = RowCounter(
+    exact=count_rows_exact,
+    estimate=estimate_row_count,
+    max_key=max_key_value,
+    count_since=count_rows_since,
+    threshold=COUNT_ESTIMATE_THRESHOLD,
+    row_delta=lambda fingerprint, table_name: change_feed_row_delta(fingerprint, table_name)
+)
+
+def count_table_rows(connection, context, metadata, filters, strategy):
+    """Count rows of a table with the given strategy; returns (count, strategy used, estimated)"""
+    pk = None
+    if len(metadata.primary_keys) == 1:
+        pk_column = next(col for col in metadata.columns if col['name'] == metadata.pk)
+        if (pk_column['data_type'] or '').lower() in WATERMARK_TYPES:
+            pk = metadata.pk
+    return row_counter.count(connection, context, metadata.name, filters, strategy, pk)
+
+def load_table_page(connection, context, metadata, filters, sort_column, sort_direction, limit, offset,
+                    count_strategy, page_cursor=None, as_tuples=False):
+    """
+    Count a table and fetch one page of it. Returns (response dict, raw rows,
+    etag, cursor description); the rows are left unserialized so callers can
+    skip serialization when the etag shows nothing changed.
+
+    Tables with a primary key are paged by keyset: the first page, or the page
+    after/before page_cursor. An explicit offset without a cursor (and tables
+    without a primary key) still use LIMIT/OFFSET.
+
+    Rows are dicts, or plain tuples with as_tuples (for the compact formats).
+
+    Exact counts of a non-empty page come from the page query itself: a
+    scalar COUNT(*) subquery is added as a last column, so the total and the
+    rows are read in one round trip and from one snapshot. Other strategies,
+    empty pages and COMBINED_PAGE_COUNT=0 count with a statement of their own.
+    """
+    db_type = context.db_type
+    columns = metadata.column_names
+    if as_tuples:
+        cursor = connection.cursor()
+    elif db_type == 'postgresql':
+        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    else:
+        cursor = connection.cursor(dictionary=True)
+    try:
+        quoted_table = quote_identifier(metadata.name, db_type)
+        where_clause, filter_params = build_where_clause(filters, db_type)
+
+        # Always initialize data array in response
+        response = {
+            'count': None,
+            'count_strategy': 'exact',
+            'count_estimated': False,
+            'columns': columns,
+            'limited': False,
+            'data': []
+        }
+        rows = []
+        description = None
+        fetch_page = bool(limit and limit > 0)
+        combined = (COMBINED_PAGE_COUNT and fetch_page and count_strategy == 'exact'
+                    and not metadata.has_column(TOTAL_COLUMN))
+        if combined:
+            select = f"{quoted_table}.*, (SELECT COUNT(*) FROM {quoted_table}{where_clause}) AS {TOTAL_COLUMN}"
+            select_params = filter_params
+        else:
+            # Get row count (exact unless the table opted into an estimated strategy)
+            select, select_params = '*', []
+            response['count'], response['count_strategy'], response['count_estimated'] = count_table_rows(
+                connection, context, metadata, filters, count_strategy)
+
+        # Only fetch data if a positive limit is specified
+        if limit and limit > 0:
+            # Use provided sort column or default to first column
+            if sort_column and sort_column in columns:
+                effective_sort_column = sort_column
+            else:
+                effective_sort_column = columns[0]
+                if not sort_column:
+                    sort_direction = 'desc'  # Default to desc for first column
+
+            def run(sql, params):
+                return run_query(connection, db_type, cursor, sql, params, dictionary=not as_tuples)
+
+            keys = keyset_order(metadata, effective_sort_column, sort_direction)
+            if keys is not None and not (offset and page_cursor is None):
+                rows, description = fetch_keyset_page(run, db_type, metadata, keys, where_clause, filter_params,
+                                                      filters, limit, page_cursor, response, select, select_params)
+            else:
+                if page_cursor is not None:
+                    raise ValueError(f'Table {metadata.name} has no primary key to page by cursor')
+                # Build ORDER BY clause
+                order_clause = build_order_clause(effective_sort_column, sort_direction, db_type)
+                data_query = f"SELECT {select} FROM {quoted_table}{where_clause}{order_clause} LIMIT %s OFFSET %s"
+                query_params = select_params + filter_params + [limit, offset]
+                rows, description = run(data_query, query_params)
+                response['pagination'] = 'offset'
+
+        if combined:
+            if rows:
+                rows, response['count'] = split_total_column(rows)
+                description = description[:-1]
+            else:
+                # No row to carry the total (empty table, or a page past the end)
+                response['count'] = count_rows_exact(connection, db_type, metadata.name, filters)
+        if response.get('pagination') == 'offset':
+            response['limited'] = offset + limit < response['count']
+
+        # Digest of the raw rows, taken before any serialization
+        etag = make_etag(response['count'], response['count_strategy'], columns, rows,
+                         response.get('next_cursor'), response.get('prev_cursor'))
+        return response, rows, etag, description
+    finally:
+        cursor.close()
+
+def split_total_column(rows):
+    """Strip the trailing TOTAL_COLUMN from page rows; returns (rows, total)"""
+    if isinstance(rows[0], dict):
+        for row in rows:
+            total = row.pop(TOTAL_COLUMN)
+        return rows, int(total)
+    return [row[:-1] for row in rows], int(rows[0][-1])
+
+def fetch_keyset_page(run, db_type, metadata, keys, where_clause, filter_params, filters, limit, page_cursor,
+                      response, select='*', select_params=()):
+    """
+    Fetch one page by seeking past a cursor; sets the pagination fields of the
+    response and returns (rows, description). run(sql, params) executes the
+    query; select (with its select_params) replaces the * select list.
+    """
+    signature = make_etag(metadata.name, keys, sorted(filters.items()))
+    direction, values = decode_page_cursor(page_cursor, signature) if page_cursor else ('next', None)
+    if values is not None and len(values) != len(keys):
+        raise ValueError('Cursor does not match the current table, sort or filters')
+
+    # Backward pages run the inverted order and are reversed afterwards
+    flip = {'asc': 'desc', 'desc': 'asc'}
+    seek_keys = keys if direction == 'next' else [(column, flip[d]) for column, d in keys]
+    params = list(select_params) + list(filter_params)
+    if values is not None:
+        sort_column = next(col for col in metadata.columns if col['name'] == keys[0][0])
+        condition, seek_params = build_keyset_condition(seek_keys, values, db_type, sort_column['is_nullable'])
+        where_clause = f"{where_clause} AND {condition}" if where_clause else f" WHERE {condition}"
+        params += seek_params
+    order_clause = ', '.join(f"{quote_identifier(column, db_type)} {d.upper()}" for column, d in seek_keys)
+
+    # One extra row tells whether another page follows in this direction
+    rows, description = run(f"SELECT {select} FROM {quote_identifier(metadata.name, db_type)}{where_clause} "
+                            f"ORDER BY {order_clause} LIMIT %s", params + [limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'prev':
+        rows.reverse()
+
+    if rows and not isinstance(rows[0], dict):
+        # Tuple rows: look the key columns up by position
+        positions = {column[0]: i for i, column in enumerate(description)}
+        keys_at = [positions[column] for column, _ in keys]
+    else:
+        keys_at = [column for column, _ in keys]
+
+    def cursor_at(row, towards):
+        return encode_page_cursor(signature, towards, [row[key] for key in keys_at])
+
+    has_next = more if direction == 'next' else True
+    has_prev = values is not None if direction == 'next' else more
+    response['pagination'] = 'keyset'
+    response['next_cursor'] = cursor_at(rows[-1], 'next') if rows and has_next else None
+    response['prev_cursor'] = cursor_at(rows[0], 'prev') if rows and has_prev else None
+    response['limited'] = response['next_cursor'] is not None
+    return rows, description
+
+# Identical /data requests (same database, table, filters, sort and page) share one query while it
+# runs, and its result for a moment after; writes through this server and the change feed invalidate it
+PAGE_CACHE_TTL = float(os.environ.get('UDBM_PAGE_CACHE_TTL', 1.0))  # seconds; 0 only coalesces
+PAGE_CACHE_SIZE = int(os.environ.get('UDBM_PAGE_CACHE_SIZE', 256))  # cached pages
+
+page_cache = PageCache(ttl=PAGE_CACHE_TTL, max_entries=PAGE_CACHE_SIZE)
+
+def invalidate_table_pages(table_name=None, context=None):
+    """Drop cached /data pages of a table (or of every table) after a write"""
+    context = context or current_db_context()
+    if context is not None:
+        page_cache.invalidate(context.fingerprint, table_name)
+
+class PageError(Exception):
+    """A /data request that cannot be answered with a page; carries the HTTP status"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
 # Update data endpoint without referrer check
 @app.route('/data/<table_name>')
 def data_table(table_name):
-    global is_monitoring_paused
-
     # If monitoring is paused and this is not an explicit data request (no limit param)
-    if is_monitoring_paused and 'limit' not in request.args:
+    if current_session().paused and 'limit' not in request.args:
         return jsonify({'paused': True}), 202
 
     if table_name in IGNORED_TABLES:
@@ -639,176 +1456,80 @@ def data_table(table_name):
         limit = request.args.get('limit', default=50, type=int)
         offset = request.args.get('offset', default=0, type=int)
 
-        # Get filter parameters
-        filters = {}
-        for key, value in request.args.items():
-            if key.startswith('filter_'):
-                column_name = key[7:]  # Remove 'filter_' prefix
-                if value:  # Only add non-empty filters
-                    # Parse multiple values separated by commas
-                    filter_values = [v.strip() for v in value.split(',') if v.strip()]
-                    if filter_values:
-                        filters[column_name] = filter_values
-
-        # Get sort parameters
-        sort_column = request.args.get('sort_column')
-        sort_direction = request.args.get('sort_direction', 'desc').lower()
-        if sort_direction not in ['asc', 'desc']:
-            sort_direction = 'desc'
-
-        connection = get_db_connection()
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            # Check if table exists
-            try:
-                # First check if table exists
-                cursor.execute("""
-                    SELECT EXISTS (
-                        SELECT 1 FROM information_schema.tables
-                        WHERE table_schema = 'public'
-                        AND table_name = %s
-                    )
-                """, (table_name,))
-                result = cursor.fetchone()
-                exists = result[0] if not isinstance(result, dict) else result['exists']
-                if not exists:
-                    return jsonify({'error': f'Table {table_name} does not exist'}), 404
-
-                # Verify table is queryable
-                cursor.execute('SELECT 1 FROM information_schema.columns WHERE table_name = %s LIMIT 1', (table_name,))
-                if not cursor.fetchone():
-                    return jsonify({'error': f'Table {table_name} exists but has no columns'}), 500
-            except psycopg2.Error as e:
-                logger.error(f"Error checking table {table_name}: {e}")
-                return jsonify({'error': str(e)}), 500
-        else:
-            cursor = connection.cursor(dictionary=True)
-            # Check if table exists
-            cursor.execute("""
-                SELECT COUNT(*)
-                FROM information_schema.tables
-                WHERE table_schema = DATABASE()
-                AND table_name = %s
-            """, (table_name,))
-            if not cursor.fetchone()['COUNT(*)']:
-                return jsonify({'error': f'Table {table_name} does not exist'}), 404
-
-        # Get row count
-        if current_db_config.get('db_type') == 'postgresql':
+        # Get filter and sort parameters
+        filters = parse_filter_args(request.args)
+        sort_column, sort_direction = parse_sort_args(request.args)
+        count_strategy = request.args.get('count_strategy') or COUNT_STRATEGY
+        if count_strategy not in COUNT_STRATEGIES:
+            return jsonify({'error': f'Unknown count strategy {count_strategy}'}), 400
+        data_format = request.args.get('format') or 'objects'
+        if data_format not in DATA_FORMATS:
+            return jsonify({'error': f'Unknown format {data_format}; expected one of {", ".join(DATA_FORMATS)}'}), 400
+        mimetype = negotiate_mimetype(MSGPACK_MIMETYPES)
+        if mimetype != 'application/json':
+            # MessagePack pages pack the cursor tuples as they are
+            data_format = 'compact'
+        page_cursor = request.args.get('cursor') or None
+        context = current_db_context()
+
+        def load():
+            connection = get_db_connection(context)
             try:
-                # Build WHERE clause for filters
-                where_clause, filter_params = build_where_clause(filters, 'postgresql')
+                # Table existence and column list come from the metadata cache, so a warm
+                # poll only runs the count and page queries
+                metadata = get_table_metadata(connection, table_name, context)
+                if metadata is None:
+                    raise PageError(f'Table {table_name} does not exist', 404)
+                if not metadata.column_names:
+                    logger.error(f"No columns found for table {table_name}")
+                    raise PageError(f'Table {table_name} exists but has no columns', 500)
+
+                response, rows, etag, description = load_table_page(connection, context, metadata, filters,
+                                                                    sort_column, sort_direction, limit, offset,
+                                                                    count_strategy, page_cursor,
+                                                                    as_tuples=data_format != 'objects')
+            finally:
+                connection.close()
 
-                # Get count with better error handling
-                try:
-                    count_query = f'SELECT COUNT(*) as count FROM "{table_name}"{where_clause}'
-                    cursor.execute(count_query, filter_params)
-                    result = cursor.fetchone()
-                    row_count = result['count'] if isinstance(result, dict) else result[0]
-                except psycopg2.Error as e:
-                    logger.error(f"Error getting count for table {table_name}: {e}")
-                    return jsonify({'error': f'Error getting count: {str(e)}'}), 500
-
-                # Get the columns in order for PostgreSQL with error handling
-                try:
-                    cursor.execute("""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_schema = 'public'
-                        AND table_name = %s
-                        ORDER BY ordinal_position""", (table_name,))
-                    columns_info = cursor.fetchall()
-                    columns = [col['column_name'] for col in columns_info]  # Use column name since using RealDictCursor
-
-                    if not columns:
-                        logger.error(f"No columns found for table {table_name}")
-                        return jsonify({'error': f'No columns found for table {table_name}'}), 500
-                except psycopg2.Error as e:
-                    logger.error(f"Error getting columns for table {table_name}: {e}")
-                    return jsonify({'error': f'Error getting columns: {str(e)}'}), 500
-
-                # Build response
-                response = {
-                    'count': row_count,
-                    'columns': columns,
-                    'limited': False,
-                    'data': []  # Initialize empty data array
-                }
-
-                # Fetch data only if a non-zero limit is specified
-                if limit > 0:
-                    try:
-                        # Use provided sort column or default to first column
-                        if not columns:
-                            raise ValueError("No columns available for sorting")
-
-                        # Use provided sort column or default to first column
-                        if sort_column and sort_column in columns:
-                            effective_sort_column = sort_column
-                        else:
-                            effective_sort_column = columns[0]
-                            if not sort_column:
-                                sort_direction = 'desc'  # Default to desc for first column
-
-                        # Build ORDER BY clause
-                        order_clause = build_order_clause(effective_sort_column, sort_direction, 'postgresql')
-                        query = f'SELECT * FROM "{table_name}"{where_clause}{order_clause} LIMIT %s OFFSET %s'
-
-                        # Combine filter params with limit/offset params
-                        query_params = filter_params + [limit, offset]
-                        cursor.execute(query, query_params)
-                        rows = cursor.fetchall()
-                        # RealDictCursor already returns dict-like objects, process for JSON serialization
-                        response['data'] = process_database_rows(rows)
-                        response['limited'] = offset + limit < row_count
-                    except (psycopg2.Error, ValueError) as e:
-                        logger.error(f"Error fetching data from table {table_name}: {e}")
-                        return jsonify({'error': f'Error fetching data: {str(e)}'}), 500
-            except Exception as e:
-                logger.error(f"PostgreSQL specific error for {table_name}: {str(e)}")
-                raise
+            if mimetype != 'application/json':
+                etag = make_etag(etag, mimetype)
+
+            def render():
+                if mimetype != 'application/json':
+                    if description is not None:
+                        response['columns'] = [column[0] for column in description]
+                    response['format'] = data_format
+                    response['data'] = rows
+                    return packb(response)
+                return json_dumps(render_page_data(response, rows, description, context.db_type, data_format))
+            return CachedPage(etag, render)
+
+        if context is None:
+            page = load()
         else:
-            # MySQL logic with filters
-            where_clause, filter_params = build_where_clause(filters, 'mysql')
-
-            count_query = f"SELECT COUNT(*) as count FROM {table_name}{where_clause}"
-            cursor.execute(count_query, filter_params)
-            row_count = cursor.fetchone()['count']
-
-            cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-            columns_info = cursor.fetchall()
-            columns = [col['Field'] for col in columns_info]
-
-            # Always initialize data array in response
-            response = {
-                'count': row_count,
-                'columns': columns,
-                'limited': False,
-                'data': []  # Initialize empty data array for both paths
-            }
-
-            # Only fetch data if a positive limit is specified
-            if limit and limit > 0:
-                # Use provided sort column or default to first column
-                if sort_column and sort_column in columns:
-                    effective_sort_column = sort_column
-                else:
-                    effective_sort_column = columns[0]
-                    if not sort_column:
-                        sort_direction = 'desc'  # Default to desc for first column
-
-                # Build ORDER BY clause
-                order_clause = build_order_clause(effective_sort_column, sort_direction, 'mysql')
-                data_query = f"SELECT * FROM {table_name}{where_clause}{order_clause} LIMIT %s OFFSET %s"
-                query_params = filter_params + [limit, offset]
-                cursor.execute(data_query, query_params)
-                rows = cursor.fetchall()
-                response['data'] = process_database_rows(rows)
-                response['limited'] = offset + limit < row_count
-
-        return jsonify(response)
+            page = page_cache.get((context.fingerprint, table_name, tuple(sorted(
+                (column, tuple(values)) for column, values in filters.items())), sort_column, sort_direction,
+                limit, offset, page_cursor, count_strategy, data_format, mimetype), load)
+
+        # An unchanged page is answered with 304 before any serialization
+        cached = not_modified(page.etag)
+        if cached is not None:
+            cached.vary.add('Accept')
+            return cached
+
+        result = Response(page.body(), mimetype=mimetype)
+        result.vary.add('Accept')
+        return with_etag(result, page.etag)
+    except PageError as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        # Malformed or stale page cursor
+        return jsonify({'error': str(e)}), 400
     except (mysql.connector.Error, psycopg2.Error) as e:
         error_msg = str(e)
+        if is_stale_metadata_error(e):
+            # The table or a column disappeared since it was cached
+            invalidate_table_metadata(table_name)
         if isinstance(e, psycopg2.Error):
             logger.error(f"PostgreSQL error for table {table_name}: {e}")
             if 'does not exist' in str(e):
@@ -819,11 +1540,541 @@ def data_table(table_name):
     except Exception as e:
         logger.error(f"Error fetching data for table {table_name}: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if 'connection' in locals():
-            connection.close()
 
-@app.route('/add/<table_name>', methods=['POST'])
+# Batch row counts: one request (and a few UNION ALL statements) per polling tick
+COUNT_BATCH_SIZE = int(os.environ.get('UDBM_COUNT_BATCH_SIZE', 50))  # tables per UNION ALL statement
+COUNT_TIMEOUT_MS = int(os.environ.get('UDBM_COUNT_TIMEOUT_MS', 5000))  # per statement
+
+count_executor = ThreadPoolExecutor(max_workers=POOL_MAX_SIZE, thread_name_prefix='udbm-count')
+
+def run_count_statement(connection, db_type, items, timeout_ms):
+    """Count rows of [(table_name, filters)] with one UNION ALL statement; returns counts in order"""
+    cursor = connection.cursor()
+    try:
+        if db_type == 'postgresql':
+            cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+        parts, params = [], []
+        for index, (table_name, filters) in enumerate(items):
+            where_clause, filter_params = build_where_clause(filters, db_type)
+            # MySQL takes the timeout as an optimizer hint after the first SELECT of the statement
+            hint = f"/*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */ " if db_type == 'mysql' and index == 0 else ''
+            parts.append(f"SELECT {hint}{index} AS idx, COUNT(*) AS count "
+                         f"FROM {quote_identifier(table_name, db_type)}{where_clause}")
+            params.extend(filter_params)
+        rows, _ = run_query(connection, db_type, cursor, " UNION ALL ".join(parts), params)
+        counts = [None] * len(items)
+        for index, count in rows:
+            counts[int(index)] = int(count)
+        return counts
+    finally:
+        cursor.close()
+
+def count_table_batch(context, items, timeout_ms):
+    """
+    Count one batch of tables on its own pooled connection. If the combined
+    statement fails (a timeout, or a table dropped since it was cached) each
+    table is counted separately so one bad table does not hide the others.
+    Returns ({table: count}, {table: error}).
+    """
+    connection = get_db_connection(context)
+    try:
+        try:
+            counts = run_count_statement(connection, context.db_type, items, timeout_ms)
+            return {table_name: count for (table_name, _), count in zip(items, counts)}, {}
+        except (mysql.connector.Error, psycopg2.Error) as e:
+            if len(items) == 1:
+                if is_stale_metadata_error(e):
+                    invalidate_table_metadata(items[0][0], context)
+                return {}, {items[0][0]: str(e)}
+            logger.warning(f"Batched count of {len(items)} tables failed, counting one by one: {e}")
+
+        counts, errors = {}, {}
+        for table_name, filters in items:
+            connection.rollback()
+            try:
+                counts[table_name] = run_count_statement(connection, context.db_type,
+                                                         [(table_name, filters)], timeout_ms)[0]
+            except (mysql.connector.Error, psycopg2.Error) as e:
+                errors[table_name] = str(e)
+                if is_stale_metadata_error(e):
+                    invalidate_table_metadata(table_name, context)
+        return counts, errors
+    except Exception:
+        connection.discard()
+        raise
+    finally:
+        connection.close()
+
+def set_mysql_execution_time(connection, timeout_ms):
+    """Limit every SELECT of the MySQL session to timeout_ms (None: back to the server default)"""
+    cursor = connection.cursor()
+    try:
+        if timeout_ms is None:
+            cursor.execute("SET SESSION max_execution_time = DEFAULT")
+        else:
+            cursor.execute("SET SESSION max_execution_time = %s", (int(timeout_ms),))
+    finally:
+        cursor.close()
+
+def count_table_estimated(context, items, timeout_ms):
+    """Count tables that opted into an estimated strategy, one at a time on one connection"""
+    counts, errors, strategies = {}, {}, {}
+    connection = get_db_connection(context)
+    try:
+        if context.db_type == 'mysql':
+            # These strategies run several statements per table (statistics, MAX(pk), COUNT(*) of new
+            # rows), so the limit goes on the session instead of a hint on each of them
+            set_mysql_execution_time(connection, timeout_ms)
+        for metadata, filters, strategy in items:
+            try:
+                if context.db_type == 'postgresql':
+                    cursor = connection.cursor()
+                    cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+                    cursor.close()
+                counts[metadata.name], strategies[metadata.name], _ = count_table_rows(
+                    connection, context, metadata, filters, strategy)
+            except (mysql.connector.Error, psycopg2.Error) as e:
+                errors[metadata.name] = str(e)
+                if is_stale_metadata_error(e):
+                    invalidate_table_metadata(metadata.name, context)
+            connection.rollback()
+        if context.db_type == 'mysql':
+            # Lift the limit before the connection goes back to the pool
+            set_mysql_execution_time(connection, None)
+        return counts, errors, strategies
+    except Exception:
+        connection.discard()
+        raise
+    finally:
+        connection.close()
+
+def count_table_lane(context, tasks, timeout_ms):
+    """Run several count tasks one after another (one worker thread)"""
+    counts, errors, strategies = {}, {}, {}
+    for kind, batch in tasks:
+        try:
+            if kind == 'exact':
+                batch_counts, batch_errors = count_table_batch(context, batch, timeout_ms)
+                batch_strategies = dict.fromkeys(batch_counts, 'exact')
+            else:
+                batch_counts, batch_errors, batch_strategies = count_table_estimated(context, batch, timeout_ms)
+            counts.update(batch_counts)
+            errors.update(batch_errors)
+            strategies.update(batch_strategies)
+        except Exception as e:
+            logger.error(f"Error counting rows for {len(batch)} tables: {e}")
+            names = [item[0] if kind == 'exact' else item[0].name for item in batch]
+            errors.update({table_name: str(e) for table_name in names})
+    return counts, errors, strategies
+
+def normalize_count_filters(filters):
+    """Accept {column: [values]} or {column: 'v1,v2'} and return {column: [values]}"""
+    normalized = {}
+    for column_name, values in (filters or {}).items():
+        if isinstance(values, str):
+            values = [v.strip() for v in values.split(',') if v.strip()]
+        elif not isinstance(values, list):
+            values = [values]
+        if values:
+            normalized[column_name] = values
+    return normalized
+
+def is_table_list(tables):
+    """True for None (every table) or a list of table names"""
+    return tables is None or (isinstance(tables, list) and all(isinstance(name, str) for name in tables))
+
+def count_tables(context, requested=None, filters_by_table=None, default_strategy=None, strategy_by_table=None,
+                 timeout_ms=COUNT_TIMEOUT_MS):
+    """
+    Row counts for many tables. requested defaults to every table; returns
+    {'counts': {...}, 'strategies': {...}, 'errors': {...}}.
+    """
+    filters_by_table = filters_by_table or {}
+    strategy_by_table = strategy_by_table or {}
+    default_strategy = default_strategy or COUNT_STRATEGY
+
+    connection = get_db_connection(context)
+    try:
+        catalog = get_schema_catalog(connection, context)
+    finally:
+        connection.close()
+
+    if requested is None:
+        requested = [name for name in catalog.tables if name not in IGNORED_TABLES]
+
+    # Validate every table and filter column against the cached catalog first
+    items, estimated_items, errors = [], [], {}
+    for table_name in dict.fromkeys(requested):
+        metadata = catalog.tables.get(table_name)
+        strategy = strategy_by_table.get(table_name) or default_strategy
+        if table_name in IGNORED_TABLES:
+            errors[table_name] = 'Table is ignored'
+        elif metadata is None:
+            errors[table_name] = f'Table {table_name} does not exist'
+        elif strategy not in COUNT_STRATEGIES:
+            errors[table_name] = f'Unknown count strategy {strategy}'
+        else:
+            filters = normalize_count_filters(filters_by_table.get(table_name))
+            unknown = [column for column in filters if not metadata.has_column(column)]
+            if unknown:
+                errors[table_name] = f"Unknown column(s) in filters: {', '.join(unknown)}"
+            elif strategy == 'exact':
+                items.append((table_name, filters))
+            else:
+                estimated_items.append((metadata, filters, strategy))
+
+    # Exact counts go out as UNION ALL batches, estimated ones as their own tasks;
+    # the tasks run in parallel lanes, leaving half of the pool to the other endpoints
+    tasks = [('exact', items[i:i + COUNT_BATCH_SIZE]) for i in range(0, len(items), COUNT_BATCH_SIZE)]
+    tasks += [('estimated', estimated_items[i:i + COUNT_BATCH_SIZE])
+              for i in range(0, len(estimated_items), COUNT_BATCH_SIZE)]
+    lanes = max(1, min(len(tasks), context.pool.max_size // 2))
+    futures = [count_executor.submit(count_table_lane, context, tasks[lane::lanes], timeout_ms)
+               for lane in range(lanes)]
+    counts, strategies = {}, {}
+    for future in futures:
+        lane_counts, lane_errors, lane_strategies = future.result()
+        counts.update(lane_counts)
+        errors.update(lane_errors)
+        strategies.update(lane_strategies)
+
+    return {'counts': counts, 'strategies': strategies, 'errors': errors}
+
+# Row counts for many tables in one round trip. POST only, so GET /data/counts
+# still reaches data_table() for a table that happens to be called "counts".
+@app.route('/data/counts', methods=['POST'])
+def batch_table_counts():
+    context = current_db_context()
+    if context is None:
+        return jsonify({'error': 'No database configured'}), 400
+
+    data = request.get_json(silent=True) or {}
+    try:
+        timeout_ms = int(data.get('timeout_ms') or COUNT_TIMEOUT_MS)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'timeout_ms must be an integer'}), 400
+    timeout_ms = max(1, min(timeout_ms, COUNT_TIMEOUT_MS))
+    if not is_table_list(data.get('tables')):
+        return jsonify({'error': 'tables must be a list of table names'}), 400
+    for key in ('filters', 'count_strategies'):
+        if not isinstance(data.get(key) or {}, dict):
+            return jsonify({'error': f'{key} must be an object keyed by table name'}), 400
+
+    try:
+        return jsonify(count_tables(context, data.get('tables'), data.get('filters'), data.get('count_strategy'),
+                                    data.get('count_strategies'), timeout_ms))
+    except Exception as e:
+        logger.error(f"Error counting table rows: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Server-sent events: one stream per browser tab, one poller per distinct view (see stream_hub.py)
+STREAM_MIN_INTERVAL = float(os.environ.get('UDBM_STREAM_MIN_INTERVAL', 0.5))  # seconds between polls of a view
+CHANGE_CAPTURE_REFRESH = float(os.environ.get('UDBM_CHANGE_CAPTURE_REFRESH', 0))  # seconds; 0 = idle views never re-poll
+
+stream_hub = StreamHub(min_interval=STREAM_MIN_INTERVAL, change_refresh=CHANGE_CAPTURE_REFRESH)
+
+def table_view_poll(context, table_name, params):
+    """Poll function for a table page view; params are the /data/<table> query parameters"""
+    filters = parse_filter_args(params)
+    sort_column, sort_direction = parse_sort_args(params)
+    limit = int(params.get('limit', 50))
+    offset = int(params.get('offset', 0))
+    count_strategy = params.get('count_strategy') or COUNT_STRATEGY
+    data_format = params.get('format') or 'objects'
+
+    def poll():
+        connection = get_db_connection(context)
+        try:
+            metadata = context.metadata.table(connection, table_name)
+            if metadata is None:
+                raise LookupError(f'Table {table_name} does not exist')
+            response, rows, etag, description = load_table_page(connection, context, metadata, filters,
+                                                                sort_column, sort_direction, limit, offset,
+                                                                count_strategy, params.get('cursor') or None,
+                                                                as_tuples=data_format != 'objects')
+        except (mysql.connector.Error, psycopg2.Error) as e:
+            if is_stale_metadata_error(e):
+                invalidate_table_metadata(table_name, context)
+            raise
+        finally:
+            connection.close()
+
+        def render():
+            return render_page_data(response, rows, description, context.db_type, data_format)
+        return etag, render
+    return poll
+
+def counts_view_poll(context, tables, strategies):
+    """Poll function for the row counts of a list of tables"""
+    def poll():
+        result = count_tables(context, tables, strategy_by_table=strategies)
+        return make_etag(result), lambda: result
+    return poll
+
+def parse_stream_view(context, spec):
+    """Return (key, poll, tables read) for a view subscription sent by the dashboard"""
+    view_type = spec.get('type')
+    if view_type == 'data':
+        table_name = spec.get('table')
+        if not isinstance(table_name, str) or table_name in IGNORED_TABLES:
+            raise ValueError(f'Invalid table {table_name!r}')
+        params = {str(k): str(v) for k, v in (spec.get('params') or {}).items()}
+        if (params.get('count_strategy') or COUNT_STRATEGY) not in COUNT_STRATEGIES:
+            raise ValueError(f"Unknown count strategy {params['count_strategy']}")
+        if (params.get('format') or 'objects') not in DATA_FORMATS:
+            raise ValueError(f"Unknown format {params['format']}")
+        key = (context.fingerprint, 'data', table_name, tuple(sorted(params.items())))
+        return key, table_view_poll(context, table_name, params), [table_name]
+    if view_type == 'counts':
+        tables = spec.get('tables')
+        if not is_table_list(tables):
+            raise ValueError('tables must be a list of table names')
+        strategies = {str(k): str(v) for k, v in (spec.get('count_strategies') or {}).items()}
+        key = (context.fingerprint, 'counts', tuple(tables) if tables is not None else None,
+               tuple(sorted(strategies.items())))
+        return key, counts_view_poll(context, tables, strategies), tables
+    raise ValueError(f'Unknown view type {view_type!r}')
+
+@app.route('/stream')
+def event_stream():
+    context = current_db_context()
+    if context is None:
+        return jsonify({'error': 'No database configured'}), 400
+
+    interval = request.args.get('interval', default=5000, type=int) / 1000.0
+    session = current_session()
+    client = stream_hub.connect(session.token, context, interval)
+
+    def generate():
+        try:
+            yield format_event('hello', json.dumps({'client_id': client.id}))
+            while not client.closed:
+                # An open stream is use: keep its session (and the PUTs that need it) from idling out
+                session.last_seen = time.monotonic()
+                messages = client.next_messages(stream_hub.heartbeat)
+                # The comment line doubles as heartbeat and disconnect probe
+                yield ''.join(messages) if messages else ': keepalive\n\n'
+        finally:
+            stream_hub.disconnect(client)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Replace the views a stream is subscribed to: {"views": {"<view id>": {"type": "data" | "counts", ...}}}
+@app.route('/stream/<client_id>', methods=['PUT'])
+def update_stream_views(client_id):
+    client = stream_hub.client(client_id)
+    if client is None or client.session_token != current_session().token:
+        return jsonify({'error': 'Unknown stream'}), 404
+
+    data = request.get_json(silent=True) or {}
+    try:
+        views = {str(view_id): parse_stream_view(client.context, spec)
+                 for view_id, spec in (data.get('views') or {}).items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    stream_hub.set_views(client, views)
+    return jsonify({'status': 'success', 'views': len(views)})
+
+@app.route('/api/stream/stats')
+def get_stream_stats():
+    return jsonify(stream_hub.stats())
+
+# Change capture: a change feed per database wakes the stream pollers instead of timed polling.
+# PostgreSQL uses notify triggers (see pg_notify_cdc.py), MySQL the row-based binlog (see binlog_cdc.py).
+CHANGE_CAPTURE_CHANNEL = os.environ.get('UDBM_PG_NOTIFY_CHANNEL', DEFAULT_CHANNEL)
+BINLOG_DIR = os.environ.get('UDBM_BINLOG_DIR', '')  # server binlog directory or a `mysqlbinlog --raw` mirror
+BINLOG_SERVER_ID = int(os.environ.get('UDBM_BINLOG_SERVER_ID', 4061))  # replica server id for live capture
+BINLOG_POSITIONS = os.environ.get('UDBM_BINLOG_POSITIONS', '')  # JSON file keeping resume positions
+
+change_listeners = {}   # fingerprint -> PgChangeListener | BinlogChangeFeed
+change_listeners_lock = threading.Lock()
+binlog_positions = PositionStore(BINLOG_POSITIONS)
+
+def change_feed_row_delta(fingerprint, table_name):
+    """Net rows inserted into a table according to its binlog feed (None without one)"""
+    listener = change_listeners.get(fingerprint)
+    return listener.row_delta(table_name) if isinstance(listener, BinlogChangeFeed) else None
+
+def change_handler(context):
+    fingerprint = context.fingerprint
+
+    def on_change(table_name, operation):
+        if operation in ('TRUNCATE', 'DDL'):
+            invalidate_table_metadata(table_name, context)
+        invalidate_table_pages(table_name, context)
+        stream_hub.notify_change(fingerprint, table_name)
+    return on_change
+
+def start_change_capture(context, create):
+    """Start (or return) the change feed of a database; create(on_change, on_status) builds it"""
+    fingerprint = context.fingerprint
+    with change_listeners_lock:
+        listener = change_listeners.get(fingerprint)
+        if listener is None:
+            # Views only stop polling while the feed is actually connected
+            listener = create(change_handler(context),
+                              lambda connected: stream_hub.set_change_driven(fingerprint, connected))
+            change_listeners[fingerprint] = listener
+            listener.start()
+        return listener
+
+def stop_change_capture(context):
+    with change_listeners_lock:
+        listener = change_listeners.pop(context.fingerprint, None)
+    if listener is not None:
+        listener.stop()
+    stream_hub.set_change_driven(context.fingerprint, False)
+    return listener is not None
+
+def current_binlog_position(context):
+    """The server's current binlog file and position"""
+    connection = get_db_connection(context)
+    cursor = connection.cursor()
+    try:
+        try:
+            cursor.execute("SHOW BINARY LOG STATUS")  # MySQL 8.2+
+        except mysql.connector.Error:
+            cursor.execute("SHOW MASTER STATUS")
+        rows = cursor.fetchall()
+        if not rows:
+            raise ValueError('Binary logging is disabled on this server')
+        return BinlogPosition(rows[0][0], int(rows[0][1]))
+    finally:
+        cursor.close()
+        connection.close()
+
+def resolve_binlog_dir(requested):
+    """
+    The binlog directory a capture request may read: UDBM_BINLOG_DIR, or a
+    directory under it. Clients never pick arbitrary server paths.
+    """
+    if not requested:
+        return BINLOG_DIR
+    if not BINLOG_DIR:
+        raise ValueError('binlog_dir is only accepted below UDBM_BINLOG_DIR, which is not set')
+    root = os.path.realpath(BINLOG_DIR)
+    path = os.path.realpath(os.path.join(root, str(requested)))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError('binlog_dir must be UDBM_BINLOG_DIR or a directory under it')
+    return path
+
+def start_binlog_capture(context, data):
+    """Start a binlog feed from a POST /api/change-capture body"""
+    binlog_dir = resolve_binlog_dir(data.get('binlog_dir'))
+    source = data.get('source') or ('files' if binlog_dir else 'live')
+    follow = bool(data.get('follow', True))
+    if source not in ('files', 'live'):
+        raise ValueError(f'Unknown binlog source {source}')
+    if source == 'files' and not os.path.isdir(binlog_dir or ''):
+        raise ValueError('source "files" needs an existing binlog_dir (or UDBM_BINLOG_DIR)')
+
+    # Resume from an explicit position, else where this database's feed stopped, else from now
+    position = data.get('position')
+    if position:
+        position = BinlogPosition(str(position['file']), int(position['pos']))
+    else:
+        position = binlog_positions.get(context.fingerprint)
+    if position is None and (source == 'live' or follow):
+        position = current_binlog_position(context)
+
+    only_schemas = [context.config['database']]
+    only_tables = data.get('tables') or [table['name'] for table in get_table_names()]
+
+    def open_source(position):
+        if source == 'live':
+            return BinlogStreamSource(context.config, BINLOG_SERVER_ID, position, only_schemas, only_tables)
+        return BinlogFileReader(binlog_dir, position, only_schemas, only_tables, follow=follow)
+
+    return start_change_capture(context, lambda on_change, on_status: BinlogChangeFeed(
+        open_source, on_change, on_status,
+        position=position,
+        position_store=binlog_positions,
+        store_key=context.fingerprint,
+        name=f'udbm-binlog-{context.fingerprint[:8]}'
+    ))
+
+# GET: status; DELETE: disable (PostgreSQL: ?drop_triggers=1, MySQL: ?forget_position=1)
+# POST (PostgreSQL) {"tables": [...], "install_triggers": true}
+# POST (MySQL) {"tables": [...], "source": "files" | "live", "binlog_dir": "...", "follow": true,
+#               "position": {"file": "binlog.000042", "pos": 4}}
+@app.route('/api/change-capture', methods=['GET', 'POST', 'DELETE'])
+def handle_change_capture():
+    context = current_db_context()
+    if context is None:
+        return jsonify({'error': 'No database configured'}), 400
+    if context.db_type != 'postgresql':
+        return handle_binlog_capture(context)
+
+    connection = None
+    try:
+        connection = get_db_connection(context)
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            triggers = None
+            if data.get('install_triggers', True):
+                tables = data.get('tables') or [table['name'] for table in get_table_names()]
+                triggers = install_triggers(connection, tables, CHANGE_CAPTURE_CHANNEL)
+            listener = start_change_capture(context, lambda on_change, on_status: PgChangeListener(
+                connect=lambda: open_raw_connection(context.config),
+                on_change=on_change,
+                on_status=on_status,
+                channel=CHANGE_CAPTURE_CHANNEL,
+                name=f'udbm-pg-listener-{context.fingerprint[:8]}'
+            ))
+            return jsonify({'status': 'success', 'triggers': triggers, 'listener': listener.stats()})
+
+        if request.method == 'DELETE':
+            stopped = stop_change_capture(context)
+            dropped = uninstall_triggers(connection) if request.args.get('drop_triggers') in ('1', 'true') else []
+            return jsonify({'status': 'success', 'stopped': stopped, 'dropped_triggers': dropped})
+
+        listener = change_listeners.get(context.fingerprint)
+        return jsonify({
+            'enabled': listener is not None,
+            'channel': CHANGE_CAPTURE_CHANNEL,
+            'tables': sorted(triggered_tables(connection)),
+            'refresh': CHANGE_CAPTURE_REFRESH,
+            'listener': listener.stats() if listener else None
+        })
+    except psycopg2.Error as e:
+        logger.error(f"Error handling change capture: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if connection:
+            connection.close()
+
+def handle_binlog_capture(context):
+    try:
+        if request.method == 'POST':
+            feed = start_binlog_capture(context, request.get_json(silent=True) or {})
+            return jsonify({'status': 'success', 'listener': feed.stats()})
+
+        if request.method == 'DELETE':
+            stopped = stop_change_capture(context)
+            if request.args.get('forget_position') in ('1', 'true'):
+                binlog_positions.forget(context.fingerprint)
+            return jsonify({'status': 'success', 'stopped': stopped})
+
+        listener = change_listeners.get(context.fingerprint)
+        saved = binlog_positions.get(context.fingerprint)
+        return jsonify({
+            'enabled': listener is not None,
+            'binlog_dir': BINLOG_DIR or None,
+            'saved_position': saved._asdict() if saved else None,
+            'refresh': CHANGE_CAPTURE_REFRESH,
+            'listener': listener.stats() if listener else None
+        })
+    except (ValueError, TypeError, KeyError, RuntimeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except mysql.connector.Error as e:
+        logger.error(f"Error handling binlog capture: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/add/<table_name>', methods=['POST'])
 def add_row(table_name):
     try:
         data = request.json
@@ -835,41 +2086,18 @@ def add_row(table_name):
                 cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
                 # Get column information including primary key info
-                cursor.execute("""
-                    SELECT DISTINCT ON (c.column_name)
-                        c.column_name,
-                        c.data_type,
-                        c.is_nullable,
-                        c.column_default,
-                        CASE
-                            WHEN pk.contype = 'p' THEN true
-                            ELSE false
-                        END as is_primary
-                    FROM information_schema.columns c
-                    LEFT JOIN pg_attribute a ON
-                        a.attname = c.column_name AND
-                        a.attrelid = %s::regclass
-                    LEFT JOIN (
-                        SELECT contype, conkey, conrelid
-                        FROM pg_constraint
-                        WHERE contype = 'p'
-                    ) pk ON
-                        pk.conrelid = a.attrelid AND
-                        a.attnum = ANY(pk.conkey)
-                    WHERE c.table_name = %s
-                    AND c.table_schema = 'public'
-                    ORDER BY c.column_name, c.ordinal_position
-                """, (table_name, table_name))
-                columns_info = cursor.fetchall()
+                metadata = get_table_metadata(connection, table_name)
+                if metadata is None:
+                    return jsonify({'error': f'Table {table_name} does not exist'}), 404
 
                 # Prepare columns and values with appropriate defaults
                 columns = []
                 values = []
-                for col in columns_info:
-                    col_name = col['column_name']
+                for col in metadata.columns:
+                    col_name = col['name']
 
                     # Skip auto-incrementing columns
-                    if col['data_type'] == 'integer' and col['column_default'] and 'nextval' in str(col['column_default']):
+                    if col['data_type'] == 'integer' and col['default'] and 'nextval' in str(col['default']):
                         continue
 
                     columns.append(col_name)
@@ -898,6 +2126,7 @@ def add_row(table_name):
                 cursor.execute(query, values)
                 new_row = cursor.fetchone()
                 connection.commit()
+                invalidate_table_pages(table_name)
 
                 # Process the new row for JSON serialization
                 processed_row = make_json_serializable(dict(new_row))
@@ -911,18 +2140,20 @@ def add_row(table_name):
             cursor.execute("SET FOREIGN_KEY_CHECKS=0")
 
             # Get column info and exclude auto-increment columns
-            cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-            columns_info = cursor.fetchall()
+            metadata = get_table_metadata(connection, table_name)
+            if metadata is None:
+                cursor.execute("SET FOREIGN_KEY_CHECKS=1")
+                return jsonify({'error': f'Table {table_name} does not exist'}), 404
 
             # Identify columns that need default values
             insert_columns = []
-            for col in columns_info:
+            for col in metadata.columns:
                 # Skip auto-increment columns
-                if 'auto_increment' in col['Extra'].lower():
+                if 'auto_increment' in col['extra'].lower():
                     continue
 
                 # Include other columns
-                insert_columns.append(col['Field'])
+                insert_columns.append(col['name'])
 
             # Create minimal INSERT statement
             if insert_columns:
@@ -939,12 +2170,18 @@ def add_row(table_name):
             new_row = cursor.fetchone()
 
             connection.commit()
+            invalidate_table_pages(table_name)
+            # Re-enable foreign key checks before the connection goes back to the pool
+            cursor.execute("SET FOREIGN_KEY_CHECKS=1")
             # Process the new row for JSON serialization
             processed_row = make_json_serializable(new_row)
             return jsonify(processed_row)
 
     except Exception as e:
         logger.error(f"Error adding empty row to {table_name}: {e}")
+        if 'connection' in locals():
+            # Session state (e.g. FOREIGN_KEY_CHECKS) may be left modified; don't reuse it
+            connection.discard()
         return jsonify({'error': str(e)}), 500
     finally:
         if 'connection' in locals():
@@ -972,9 +2209,12 @@ def delete_row(table_name, row_id):
                 # Re-enable foreign key checks
                 cursor.execute("SET FOREIGN_KEY_CHECKS=1")
             except mysql.connector.Error as e:
+                # FOREIGN_KEY_CHECKS may still be disabled; don't return this session to the pool
+                connection.discard()
                 return jsonify({'error': str(e)}), 500
 
         connection.commit()
+        invalidate_table_pages(table_name)
         return jsonify({'success': True})
 
     except Exception as e:
@@ -995,48 +2235,12 @@ def delete_rows_by_column_value(table, column, value):
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        # Validate table exists
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT 1 FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                    AND table_name = %s
-                )
-            """, (table,))
-            table_exists = cursor.fetchone()[0]
-        else:
-            cursor.execute("""
-                SELECT COUNT(*) FROM information_schema.tables
-                WHERE table_schema = DATABASE()
-                AND table_name = %s
-            """, (table,))
-            table_exists = cursor.fetchone()[0] > 0
-
-        if not table_exists:
+        # Validate table and column exist (from the metadata cache)
+        metadata = get_table_metadata(connection, table)
+        if metadata is None:
             return jsonify({'error': 'Table not found'}), 404
 
-        # Validate column exists
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT 1 FROM information_schema.columns
-                    WHERE table_schema = 'public'
-                    AND table_name = %s
-                    AND column_name = %s
-                )
-            """, (table, column))
-            column_exists = cursor.fetchone()[0]
-        else:
-            cursor.execute("""
-                SELECT COUNT(*) FROM information_schema.columns
-                WHERE table_schema = DATABASE()
-                AND table_name = %s
-                AND column_name = %s
-            """, (table, column))
-            column_exists = cursor.fetchone()[0] > 0
-
-        if not column_exists:
+        if not metadata.has_column(column):
             return jsonify({'error': 'Column not found in table'}), 404
 
         # Build safe query using properly quoted identifiers
@@ -1049,6 +2253,7 @@ def delete_rows_by_column_value(table, column, value):
         cursor.execute(query, (value,))
         affected_rows = cursor.rowcount
         connection.commit()
+        invalidate_table_pages(table)
 
         return jsonify({
             'success': True,
@@ -1098,9 +2303,12 @@ def update_cell(table_name, row_id, column):
                 # Re-enable foreign key checks
                 cursor.execute("SET FOREIGN_KEY_CHECKS=1")
             except mysql.connector.Error as e:
+                # FOREIGN_KEY_CHECKS may still be disabled; don't return this session to the pool
+                connection.discard()
                 return jsonify({'error': str(e)}), 500
 
         connection.commit()
+        invalidate_table_pages(table_name)
         return jsonify({'success': True})
 
     except Exception as e:
@@ -1163,163 +2371,38 @@ def calculate_d3_metadata(tables, relationships):
 def get_schema():
     try:
         schema_type = request.args.get('type', 'mermaid')
-        global current_db_config
 
         if not current_db_config:
             logger.error("No database configured for schema request")
             return jsonify({'error': 'No database configured'}), 400
 
-        tables = {}
-        relationships = []
-
-        # Get schema information based on database type
-        if current_db_config.get('db_type') == 'postgresql':
-            connection = get_db_connection()
-            cursor = connection.cursor()
-
-            # Get all tables
-            cursor.execute("""
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                AND table_type = 'BASE TABLE'
-            """)
-            table_names = [row[0] for row in cursor.fetchall()]
-
-            # Get columns for each table
-            for table_name in table_names:
-                if table_name not in IGNORED_TABLES:
-                    try:
-                        # Get columns
-                        cursor.execute("""
-                            SELECT
-                                column_name,
-                                data_type,
-                                is_nullable,
-                                column_default,
-                                (SELECT true
-                                 FROM pg_index i
-                                 JOIN pg_attribute a ON a.attrelid = i.indrelid
-                                 AND a.attnum = ANY(i.indkey)
-                                 WHERE i.indrelid = pc.table_name::regclass
-                                 AND i.indisprimary
-                                 AND a.attname = pc.column_name)
-                                as is_primary
-                            FROM information_schema.columns pc
-                            WHERE table_schema = 'public'
-                            AND table_name = %s
-                            ORDER BY ordinal_position
-                        """, (table_name,))
-                    except psycopg2.Error as e:
-                        logger.warning(f"Skipping table {table_name}: {str(e)}")
-                        continue
-
-                    columns = []
-                    for col in cursor.fetchall():
-                        columns.append({
-                            'name': col[0],
-                            'type': col[1],
-                            'is_nullable': col[2] == 'YES',
-                            'default': col[3],
-                            'is_primary': col[4] or False
-                        })
-
-                    tables[table_name] = columns
-
-                    try:
-                        # Create a new cursor with RealDictCursor for foreign keys
-                        dict_cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                        dict_cursor.execute("""
-                            SELECT
-                                con.conname as constraint_name,
-                                src.relname as table_name,
-                                att.attname as column_name,
-                                dst.relname as foreign_table_name,
-                                att2.attname as foreign_column_name
-                            FROM pg_constraint con
-                            JOIN pg_class src ON src.oid = con.conrelid
-                            JOIN pg_class dst ON dst.oid = con.confrelid
-                            JOIN pg_namespace nsp ON nsp.oid = con.connamespace
-                            JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = ANY(con.conkey)
-                            JOIN pg_attribute att2 ON att2.attrelid = con.confrelid AND att2.attnum = ANY(con.confkey)
-                            WHERE con.contype = 'f'
-                            AND nsp.nspname = 'public'
-                            AND src.relname = %s;
-                        """, (table_name,))
-
-                        fk_results = dict_cursor.fetchall()
-
-                        for row in fk_results:
-
-                            if row['foreign_table_name'] not in IGNORED_TABLES:
-                                rel = {
-                                    'from': {
-                                        'table': row['table_name'],
-                                        'column': row['column_name']
-                                    },
-                                    'to': {
-                                        'table': row['foreign_table_name'],
-                                        'column': row['foreign_column_name']
-                                    }
-                                }
-                                relationships.append(rel)
-                        dict_cursor.close()
-                    except psycopg2.Error as e:
-                        logger.warning(f"Error getting foreign keys for table {table_name}: {str(e)}")
-                        continue
-
-            cursor.close()
+        # All tables, columns and foreign keys come from one set-based catalog load
+        connection = get_db_connection()
+        try:
+            catalog = get_schema_catalog(connection)
+        finally:
             connection.close()
-        else:
-            # MySQL connection with manual schema extraction
-            connection = get_db_connection()
-            cursor = connection.cursor(dictionary=True)
 
-            # Get all tables
-            cursor.execute("SHOW TABLES")
-            table_names = [table['Tables_in_' + current_db_config['database']] for table in cursor.fetchall()]
+        # The catalog version changes with any DDL, so it validates the whole response
+        etag = make_etag(current_db_context().fingerprint, catalog.version, schema_type)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
 
-            # Get columns and relationships for each table
-            for table_name in table_names:
-                if table_name not in IGNORED_TABLES:
-                    try:
-                        # Get columns with types and primary key info
-                        cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-                        columns = []
-                        for col in cursor.fetchall():
-                            columns.append({
-                                'name': col['Field'],
-                                'type': col['Type'],
-                                'is_nullable': col['Null'] == 'YES',
-                                'default': col['Default'],
-                                'is_primary': col['Key'] == 'PRI'
-                            })
-                        tables[table_name] = columns
-
-                        # Get foreign key relationships
-                        cursor.execute("""
-                            SELECT
-                                COLUMN_NAME,
-                                REFERENCED_TABLE_NAME,
-                                REFERENCED_COLUMN_NAME
-                            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-                            WHERE TABLE_SCHEMA = DATABASE()
-                            AND TABLE_NAME = %s
-                            AND REFERENCED_TABLE_NAME IS NOT NULL
-                        """, (table_name,))
-                    except mysql.connector.Error as e:
-                        logger.warning(f"Error processing table {table_name}: {str(e)}")
-                        continue
-
-                    for fk in cursor.fetchall():
-                        if fk['REFERENCED_TABLE_NAME'] not in IGNORED_TABLES:
-                            relationships.append({
-                                'from': {'table': table_name, 'column': fk['COLUMN_NAME']},
-                                'to': {'table': fk['REFERENCED_TABLE_NAME'], 'column': fk['REFERENCED_COLUMN_NAME']}
-                            })
-
-            cursor.close()
-            connection.close()
+        tables = {}
+        for table_name, metadata in catalog.tables.items():
+            if table_name not in IGNORED_TABLES:
+                tables[table_name] = [{
+                    'name': col['name'],
+                    'type': col['type'],
+                    'is_nullable': col['is_nullable'],
+                    'default': col['default'],
+                    'is_primary': col['is_primary']
+                } for col in metadata.columns]
+
+        relationships = [rel for rel in catalog.relationships
+                         if rel['from']['table'] not in IGNORED_TABLES
+                         and rel['to']['table'] not in IGNORED_TABLES]
 
         # Define colors for tables
         theme_colors = [
@@ -1340,31 +2423,51 @@ def get_schema():
             # Calculate metadata for D3 force-directed layout
             d3_metadata = calculate_d3_metadata(tables, relationships)
 
-            return jsonify({
+            return with_etag(jsonify({
                 'tables': tables,
                 'relationships': relationships,
                 'theme_colors': theme_colors,
                 'd3_metadata': d3_metadata
-            })
+            }), etag)
 
         # Default: Return mermaid.js format
-        return jsonify({
+        return with_etag(jsonify({
             'tables': tables,
             'relationships': relationships,
             'theme_colors': theme_colors
-        })
+        }), etag)
 
     except Exception as e:
         logger.error(f"Error generating schema: {e}")
         return jsonify({'error': str(e)}), 500
 
 # Update CORS headers to be more permissive
+# Response compression negotiated through Accept-Encoding (see compression.py)
+COMPRESSION = os.environ.get('UDBM_COMPRESSION', '1') != '0'
+COMPRESSION_MIN_BYTES = int(os.environ.get('UDBM_COMPRESSION_MIN_BYTES', 1024))  # smaller bodies go out as is
+COMPRESSION_LEVEL = int(os.environ.get('UDBM_COMPRESSION_LEVEL', 4))  # for endpoints not listed below
+# Polled and streamed responses favour speed; large one-off responses favour size
+COMPRESSION_LEVELS = {
+    'data_table': 1,
+    'batch_table_counts': 1,
+    'download_table_csv': 1,
+    'get_column_values': 6,
+    'get_schema': 6,
+    'execute_query': 4,
+}
+
 @app.after_request
 def after_request(response):
     response.headers['Access-Control-Allow-Origin'] = request.headers.get('Origin', '*')
     response.headers['Access-Control-Allow-Credentials'] = 'true'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Cookie'
-    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, DELETE, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Cookie, If-None-Match'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag, X-Row-Count'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    # Hand newly created sessions their token
+    keep_session(response)
+    if COMPRESSION and request.method != 'HEAD':
+        compress_response(response, request.accept_encodings,
+                          COMPRESSION_LEVELS.get(request.endpoint, COMPRESSION_LEVEL), COMPRESSION_MIN_BYTES)
     return response
 
 # Add custom query endpoint
@@ -1400,210 +2503,467 @@ def download_xlsx():
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+# Table exports read the whole (filtered, sorted) table in one pass through a server-side
+# cursor inside a consistent snapshot; see export_engine.py
+EXPORT_FETCH_SIZE = int(os.environ.get('UDBM_EXPORT_FETCH_SIZE', DEFAULT_FETCH_SIZE))  # rows per cursor fetch
+EXPORT_COPY = os.environ.get('UDBM_EXPORT_COPY', '1') != '0'  # let PostgreSQL format CSV exports with COPY
+
+def build_export_query(metadata, db_type, args, select_list='*'):
+    """SELECT and parameters exporting a table with the filter_* / sort_* query parameters in args"""
+    columns = metadata.column_names
+    filters = parse_filter_args(args)
+    sort_column, sort_direction = parse_sort_args(args)
+    effective_sort_column = sort_column if sort_column in columns else columns[0]
+    if not sort_column:
+        sort_direction = 'desc'
+    where_clause, filter_params = build_where_clause(filters, db_type)
+    table = quote_identifier(metadata.name, db_type)
+    if select_list == '*':
+        order_clause = build_order_clause(effective_sort_column, sort_direction, db_type)
+    else:
+        # The select list recasts columns under their own names; sort by the column, not its text
+        order_clause = build_order_clause(effective_sort_column, sort_direction, db_type) \
+            .replace(' ORDER BY ', f' ORDER BY {table}.', 1)
+    return f"SELECT {select_list} FROM {table}{where_clause}{order_clause}", filter_params
+
+CSV_NATIVE_TYPES = ('smallint', 'integer', 'bigint')  # PostgreSQL types whose Python str() is their text
+
+def csv_select_list(metadata):
+    """
+    Select list of PostgreSQL CSV exports, used by COPY and the row-by-row
+    fallback alike so both write the same bytes. Columns go out as the
+    server's own text (timestamps, json, arrays, bytea, numerics), booleans
+    as True/False, and NULL and empty strings both as an empty field.
+    """
+    items = []
+    for column in metadata.columns:
+        quoted = quote_identifier(column['name'], 'postgresql')
+        if column['data_type'] == 'boolean':
+            items.append(f"CASE WHEN {quoted} THEN 'True' WHEN NOT {quoted} THEN 'False' END AS {quoted}")
+        elif column['data_type'] in CSV_NATIVE_TYPES:
+            items.append(quoted)
+        else:
+            items.append(f"NULLIF({quoted}::text, '') AS {quoted}")
+    return ', '.join(items)
+
+def export_text(value):
+    """Text of one exported cell: JSON for objects and arrays, empty for NULL"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value) if value is not None else ''
+
+def wants_gzip(args):
+    return str(args.get('gzip', '')).lower() in ('1', 'true', 'yes')
+
+def open_csv_export(connection, metadata, db_type, args, snapshot=None):
+    """
+    Start a CSV export of a table with the filter/sort/gzip parameters in args.
+    Returns (reader, chunks); the query has already run, so errors surface here.
+    """
+    chunks = None
+    select_list = csv_select_list(metadata) if db_type == 'postgresql' else '*'
+    if db_type == 'postgresql' and EXPORT_COPY:
+        # Fast path: the server formats the CSV and the bytes pass straight through
+        try:
+            query, params = build_export_query(metadata, db_type, args, select_list)
+            reader = CopyReader(connection, query, params, snapshot=snapshot).open()
+            chunks = reader.chunks()
+        except psycopg2.Error as e:
+            if is_stale_metadata_error(e):
+                raise
+            # Servers speaking the protocol without COPY (query) support (some proxies and forks)
+            logger.warning(f"COPY export of {metadata.name} failed ({e}); exporting row by row")
+    if chunks is None:
+        query, params = build_export_query(metadata, db_type, args, select_list)
+        reader = ExportReader(connection, db_type, query, params, EXPORT_FETCH_SIZE, snapshot).open()
+        # COPY ends its lines with a bare newline
+        chunks = iter_csv(reader, metadata.column_names, lambda row: [export_text(value) for value in row],
+                          lineterminator='\n' if db_type == 'postgresql' else '\r\n')
+    if wants_gzip(args):
+        chunks = iter_gzip(chunks)
+    return reader, chunks
+
+def write_csv_export(connection, metadata, db_type, args, output, job=None, snapshot=None):
+    """Write a CSV export of a table to the binary file output; returns the number of rows"""
+    reader, chunks = open_csv_export(connection, metadata, db_type, args, snapshot)
+    try:
+        if job is not None:
+            job.track(reader)
+        for chunk in chunks:
+            output.write(chunk)
+    finally:
+        chunks.close()
+        reader.close()
+    return reader.rows_read
+
 @app.route('/download/<table_name>/csv')
 def download_table_csv(table_name):
+    connection = None
     try:
         connection = get_db_connection()
-        cursor = None
 
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor = connection.cursor()
-        else:
-            cursor = connection.cursor(dictionary=True)
+        # Get column names (from the metadata cache)
+        metadata = get_table_metadata(connection, table_name)
+        if metadata is None:
+            return jsonify({'error': f'Table {table_name} does not exist'}), 404
 
-        # Get column names
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor.execute(f'SELECT * FROM "{table_name}" LIMIT 0')
-            columns = [desc[0] for desc in cursor.description]
-            cursor.fetchall()  # Fetch (and discard) results before closing
-        else:
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
-            columns = [desc[0] for desc in cursor.description]
-            cursor.fetchall()  # Fetch (and discard) results before closing
+        db_type = 'postgresql' if current_db_config.get('db_type') == 'postgresql' else 'mysql'
+        # Run the query before answering so errors still get a proper status code
+        reader, chunks = open_csv_export(connection, metadata, db_type, request.args)
+        streaming = connection
 
-        # Close and create new cursor to avoid unread results
-        cursor.close()
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor = connection.cursor()
-        else:
-            cursor = connection.cursor(dictionary=True)
+        def generate():
+            try:
+                yield from chunks
+            except Exception as e:
+                # Headers are already sent; the client sees a truncated download
+                logger.error(f"Error streaming CSV for table {table_name}: {e}")
+
+        def release():
+            # Also runs when the client disconnects before the body was started
+            chunks.close()
+            reader.close()
+            streaming.close()
+
+        compress = wants_gzip(request.args)
+        filename = f'{table_name}_{time.strftime("%Y%m%d_%H%M%S")}.csv' + ('.gz' if compress else '')
+        response = Response(generate(), mimetype='application/gzip' if compress else 'text/csv')
+        response.call_on_close(release)
+        # The response owns the connection from here on
+        connection = None
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    except Exception as e:
+        logger.error(f"Error downloading CSV for table {table_name}: {e}")
+        if is_stale_metadata_error(e):
+            invalidate_table_metadata(table_name)
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if connection is not None:
+            connection.close()
 
-        # Build filters and sort from query params
-        db_type = 'postgresql' if current_db_config.get('db_type') == 'postgresql' else 'mysql'
-        filters = {}
-        for key, value in request.args.items():
-            if key.startswith('filter_'):
-                column_name = key[7:]
-                if value:
-                    vals = [v.strip() for v in value.split(',') if v.strip()]
-                    if vals:
-                        filters[column_name] = vals
-        sort_column = request.args.get('sort_column')
-        sort_direction = request.args.get('sort_direction', 'desc').lower()
-        if sort_direction not in ['asc', 'desc']:
-            sort_direction = 'desc'
-        effective_sort_column = sort_column if sort_column in columns else columns[0]
-        if not sort_column:
-            sort_direction = 'desc'
-        where_clause, filter_params = build_where_clause(filters, db_type)
-        order_clause = build_order_clause(effective_sort_column, sort_direction, db_type)
+# Exports written to a file before they are sent: format -> (extension, mimetype)
+EXPORT_FILE_TYPES = {
+    'csv': ('csv', 'text/csv'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrows', ARROW_STREAM_MIMETYPE),
+}
+
+def write_file_export(connection, metadata, db_type, export_format, args, target, job=None, snapshot=None):
+    """Write an XLSX, Parquet or Arrow export of a table to target; returns the number of rows"""
+    query, params = build_export_query(metadata, db_type, args)
+    reader = ExportReader(connection, db_type, query, params, EXPORT_FETCH_SIZE, snapshot)
+    if job is not None:
+        job.track(reader)
+    if export_format == 'xlsx':
+        # constant_memory keeps only the current row in RAM
+        return write_xlsx(reader, target, metadata.name, export_text, db_type)
+    return write_arrow(reader, target, export_format, db_type, export_text)
+
+def send_spooled_export(table_name, export_format):
+    if export_format in ARROW_FORMATS:
+        try:
+            require_pyarrow()
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 501
 
-        # Create in-memory file
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(columns)
+    spool = None
+    try:
+        connection = get_db_connection()
 
-        # Fetch and write data in chunks with proper cursor handling
-        chunk_size = 5000
-        offset = 0
+        # First get column names (from the metadata cache)
+        metadata = get_table_metadata(connection, table_name)
+        if metadata is None:
+            return jsonify({'error': f'Table {table_name} does not exist'}), 404
 
-        while True:
-            if db_type == 'postgresql':
-                query = f'SELECT * FROM "{table_name}"{where_clause}{order_clause} LIMIT %s OFFSET %s'
-            else:
-                query = f"SELECT * FROM {table_name}{where_clause}{order_clause} LIMIT %s OFFSET %s"
-
-            params = filter_params + [chunk_size, offset]
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            if not rows:
-                break
-
-            for row in rows:
-                if db_type == 'postgresql':
-                    processed_row = []
-                    for value in row:
-                        processed_row.append(json.dumps(value) if isinstance(value, (dict, list))
-                                          else (str(value) if value is not None else ''))
-                else:
-                    processed_row = []
-                    for col in columns:
-                        value = row[col] if isinstance(row, dict) else row[columns.index(col)]
-                        processed_row.append(json.dumps(value) if isinstance(value, (dict, list))
-                                          else (str(value) if value is not None else ''))
-                writer.writerow(processed_row)
-
-            offset += chunk_size
-            connection.commit()  # Clear any pending results
-
-        # Prepare response
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
+        db_type = 'postgresql' if current_db_config.get('db_type') == 'postgresql' else 'mysql'
+        extension, mimetype = EXPORT_FILE_TYPES[export_format]
+
+        # The file is spooled to an anonymous temporary file, removed once the response closes it
+        spool = tempfile.TemporaryFile(prefix='udbm_export_', suffix=f'.{extension}')
+        write_file_export(connection, metadata, db_type, export_format, request.args, spool)
+        spool.seek(0)
+
+        response = send_file(
+            spool,
+            mimetype=mimetype,
             as_attachment=True,
-            download_name=f'{table_name}_{time.strftime("%Y%m%d_%H%M%S")}.csv'
+            download_name=f'{table_name}_{time.strftime("%Y%m%d_%H%M%S")}.{extension}'
         )
+        spool = None
+        return response
 
     except Exception as e:
-        logger.error(f"Error downloading CSV for table {table_name}: {e}")
+        logger.error(f"Error downloading {export_format.upper()} for table {table_name}: {e}")
         return jsonify({'error': str(e)}), 500
     finally:
-        if cursor:
-            cursor.close()
         if 'connection' in locals():
             connection.close()
+        if spool is not None:
+            spool.close()
 
 @app.route('/download/<table_name>/xlsx')
 def download_table_xlsx(table_name):
+    return send_spooled_export(table_name, 'xlsx')
+
+@app.route('/download/<table_name>/parquet')
+def download_table_parquet(table_name):
+    return send_spooled_export(table_name, 'parquet')
+
+@app.route('/download/<table_name>/arrow')
+def download_table_arrow(table_name):
+    return send_spooled_export(table_name, 'arrow')
+
+# Whole-database exports: every table in one streamed ZIP or tar archive. Tables are read in
+# parallel on pooled connections (one per table) and added to the archive as they finish
+SNAPSHOT_WORKERS = int(os.environ.get('UDBM_SNAPSHOT_WORKERS', 4))  # tables read at once per archive
+ARCHIVE_TYPES = {
+    'zip': ('zip', 'application/zip'),
+    'tar': ('tar', 'application/x-tar'),
+}
+_ARCHIVE_NAME_UNSAFE = str.maketrans({c: '_' for c in '\\/:*?"<>|'})
+
+def export_archive_member(context, db_type, export_format, snapshot, member, spool):
+    """Export one table of a database archive on its own pooled connection; returns the number of rows"""
+    connection = get_db_connection(context)
     try:
-        connection = get_db_connection()
-        cursor = None
-
-        # First get column names
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor = connection.cursor()
-            cursor.execute(f'SELECT * FROM "{table_name}" LIMIT 0')
-        else:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
-        cursor.fetchall()  # Fetch (and discard) results before closing
-
-        columns = [desc[0] for desc in cursor.description]
-        cursor.close()
+        metadata = get_table_metadata(connection, member.table, context)
+        if metadata is None:
+            raise Exception(f'Table {member.table} does not exist')
+        # Primary key order reads along the index instead of sorting the table
+        args = {'sort_column': metadata.pk, 'sort_direction': 'asc'} if metadata.pk else {}
+        if export_format == 'csv':
+            return write_csv_export(connection, metadata, db_type, args, spool, member, snapshot)
+        return write_file_export(connection, metadata, db_type, export_format, args, spool, member, snapshot)
+    finally:
+        connection.close()
 
-        # Create a new cursor for data fetching
-        if current_db_config.get('db_type') == 'postgresql':
-            cursor = connection.cursor()
-        else:
-            cursor = connection.cursor(dictionary=True)
+@app.route('/download/database')
+def download_database():
+    """
+    Stream every table (or the comma-separated ?tables=) as CSV or Parquet
+    (?format=) in a ZIP or tar archive (?archive=; ?gzip=1 compresses a tar).
+    """
+    context = current_db_context()
+    if context is None:
+        return jsonify({'error': 'No database configured'}), 400
+    export_format = request.args.get('format', 'csv').lower()
+    archive_format = request.args.get('archive', 'zip').lower()
+    if export_format not in ('csv', 'parquet') or archive_format not in ARCHIVE_TYPES:
+        return jsonify({'error': 'Expected format=csv|parquet and archive=zip|tar'}), 400
+    if export_format == 'parquet':
+        try:
+            require_pyarrow()
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 501
 
-        # Create Excel file in memory
-        output = io.BytesIO()
-        writer = pd.ExcelWriter(output, engine='xlsxwriter')
-        workbook = writer.book
-        worksheet = workbook.add_worksheet(table_name)
+    try:
+        tables = [table['name'] for table in get_table_names()]
+    except Exception as e:
+        logger.error(f"Error listing tables for a database export: {e}")
+        return jsonify({'error': str(e)}), 500
+    requested = [name.strip() for name in request.args.get('tables', '').split(',') if name.strip()]
+    if requested:
+        unknown = [name for name in requested if name not in tables]
+        if unknown:
+            return jsonify({'error': f'Unknown tables: {", ".join(unknown)}'}), 404
+        tables = list(dict.fromkeys(requested))
+
+    db_type = 'postgresql' if context.config.get('db_type') == 'postgresql' else 'mysql'
+    coordinator, snapshot = None, None
+    if db_type == 'postgresql':
+        # All workers read one exported snapshot, so the archive is consistent across tables
+        # (as pg_dump --jobs does). The exporting transaction stays open until the archive ends.
+        try:
+            coordinator = open_raw_connection(context.config)
+            snapshot = export_snapshot(coordinator)
+        except Exception as e:
+            logger.warning(f"Could not export a snapshot ({e}); each table is read in its own snapshot")
+            if coordinator is not None:
+                coordinator.close()
+                coordinator = None
+
+    extension = EXPORT_FILE_TYPES[export_format][0]
+    members = [(table, f'{table.translate(_ARCHIVE_NAME_UNSAFE)}.{extension}') for table in tables]
+    # Leave part of the pool to other requests
+    workers = max(1, min(SNAPSHOT_WORKERS, POOL_MAX_SIZE - 1))
+    export = ParallelExport(members, lambda member, spool: export_archive_member(
+        context, db_type, export_format, snapshot, member, spool), workers)
+    manifest = {
+        'database': context.config.get('database'),
+        'db_type': db_type,
+        'format': export_format,
+        'exported_at': datetime.now().isoformat(timespec='seconds'),
+        # Without a shared snapshot (MySQL) each table is consistent on its own
+        'snapshot': snapshot,
+    }
+    # Parquet is compressed already; storing it again in a ZIP only costs CPU
+    chunks = iter_archive(export, archive_format, compress_members=export_format == 'csv', manifest=manifest)
+    extension, mimetype = ARCHIVE_TYPES[archive_format]
+    compress = archive_format == 'tar' and wants_gzip(request.args)
+    if compress:
+        chunks = iter_gzip(chunks)
+        extension, mimetype = 'tar.gz', 'application/gzip'
+
+    def generate():
+        try:
+            yield from chunks
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated archive
+            logger.error(f"Error streaming the database archive: {e}")
+
+    def release():
+        chunks.close()
+        export.cancel()
+        if coordinator is not None:
+            coordinator.close()
+
+    database = str(context.config.get('database') or 'database').translate(_ARCHIVE_NAME_UNSAFE)
+    filename = f'{database}_{time.strftime("%Y%m%d_%H%M%S")}.{extension}'
+    response = Response(generate(), mimetype=mimetype)
+    response.call_on_close(release)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
-        # Write headers
-        for col_num, column in enumerate(columns):
-            worksheet.write(0, col_num, column)
+# Background export jobs: the same exports on a bounded worker pool, spooled to disk and
+# downloaded separately, so long exports never hold a request thread or a pooled connection
+EXPORT_WORKERS = int(os.environ.get('UDBM_EXPORT_WORKERS', 2))  # concurrent export jobs
+EXPORT_SPOOL_DIR = os.environ.get('UDBM_EXPORT_SPOOL_DIR') or os.path.join(tempfile.gettempdir(), 'udbm_exports')
+EXPORT_RETENTION = float(os.environ.get('UDBM_EXPORT_RETENTION', 3600))  # seconds finished files are kept
+EXPORT_SPOOL_MAX_MB = float(os.environ.get('UDBM_EXPORT_SPOOL_MAX_MB', 2048))  # spool size before evicting
+
+def run_export_job(job, path):
+    """Write one export job to path on its own connection; returns the number of rows"""
+    context = job.context
+    db_type = 'postgresql' if context.config.get('db_type') == 'postgresql' else 'mysql'
+    connection = open_raw_connection(context.config)
+    try:
+        metadata = get_table_metadata(connection, job.table, context)
+        if metadata is None:
+            raise Exception(f'Table {job.table} does not exist')
+        try:
+            job.estimated_rows = estimate_row_count(connection, db_type, job.table, parse_filter_args(job.params))
+        except Exception:
+            connection.rollback()
+        if job.format != 'csv':
+            return write_file_export(connection, metadata, db_type, job.format, job.params, path, job)
+        with open(path, 'wb') as output:
+            return write_csv_export(connection, metadata, db_type, job.params, output, job)
+    finally:
+        connection.close()
 
-        # Build filters and sort from query params
-        db_type = 'postgresql' if current_db_config.get('db_type') == 'postgresql' else 'mysql'
-        filters = {}
-        for key, value in request.args.items():
-            if key.startswith('filter_'):
-                column_name = key[7:]
-                if value:
-                    vals = [v.strip() for v in value.split(',') if v.strip()]
-                    if vals:
-                        filters[column_name] = vals
-        sort_column = request.args.get('sort_column')
-        sort_direction = request.args.get('sort_direction', 'desc').lower()
-        if sort_direction not in ['asc', 'desc']:
-            sort_direction = 'desc'
-        effective_sort_column = sort_column if sort_column in columns else columns[0]
-        if not sort_column:
-            sort_direction = 'desc'
-        where_clause, filter_params = build_where_clause(filters, db_type)
-        order_clause = build_order_clause(effective_sort_column, sort_direction, db_type)
+export_jobs = ExportJobManager(run_export_job, EXPORT_SPOOL_DIR, max_workers=EXPORT_WORKERS,
+                               retention=EXPORT_RETENTION, max_spool_bytes=int(EXPORT_SPOOL_MAX_MB * 1024 * 1024))
 
-        # Fetch and write data in chunks
-        chunk_size = 5000
-        offset = 0
-        row_num = 1
+@app.route('/api/exports', methods=['GET', 'POST'])
+def handle_exports():
+    owner = current_session().token
+    if request.method == 'GET':
+        return jsonify({'jobs': [job.to_dict() for job in export_jobs.list(owner)]})
 
-        while True:
-            if db_type == 'postgresql':
-                query = f'SELECT * FROM "{table_name}"{where_clause}{order_clause} LIMIT %s OFFSET %s'
-            else:
-                query = f"SELECT * FROM {table_name}{where_clause}{order_clause} LIMIT %s OFFSET %s"
-
-            params = filter_params + [chunk_size, offset]
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            if not rows:
-                break
-
-            for row in rows:
-                for col_num, value in enumerate(row if isinstance(row, (list, tuple)) else [row[col] for col in columns]):
-                    if isinstance(value, (dict, list)):
-                        worksheet.write(row_num, col_num, json.dumps(value, ensure_ascii=False))
-                    else:
-                        worksheet.write(row_num, col_num, str(value) if value is not None else '')
-                row_num += 1
+    context = current_db_context()
+    if context is None:
+        return jsonify({'error': 'No database configured'}), 400
+    data = request.get_json(silent=True) or {}
+    table_name = data.get('table')
+    export_format = data.get('format', 'csv')
+    if not table_name or export_format not in EXPORT_FILE_TYPES:
+        return jsonify({'error': f'Expected {{"table": ..., "format": one of {", ".join(EXPORT_FILE_TYPES)}}}'}), 400
+    if export_format in ARROW_FORMATS:
+        try:
+            require_pyarrow()
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 501
+    # The query parameters /download/<table>/<format> accepts: filter_*, sort_column, sort_direction, gzip
+    params = {key: str(value) for key, value in (data.get('params') or {}).items()}
 
-            offset += chunk_size
-            connection.commit()  # Clear any pending results
+    connection = get_db_connection(context)
+    try:
+        if get_table_metadata(connection, table_name, context) is None:
+            return jsonify({'error': f'Table {table_name} does not exist'}), 404
+    finally:
+        connection.close()
 
-        writer.close()
-        output.seek(0)
+    filename = f'{table_name}_{time.strftime("%Y%m%d_%H%M%S")}.{EXPORT_FILE_TYPES[export_format][0]}'
+    if export_format == 'csv' and wants_gzip(params):
+        filename += '.gz'
+    job = export_jobs.submit(owner, table_name, export_format, params, filename, context)
+    return jsonify(job.to_dict()), 202
 
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'{table_name}_{time.strftime("%Y%m%d_%H%M%S")}.xlsx'
-        )
+@app.route('/api/exports/stats')
+def get_export_stats():
+    return jsonify(export_jobs.stats())
 
-    except Exception as e:
-        logger.error(f"Error downloading XLSX for table {table_name}: {e}")
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if cursor:
+@app.route('/api/exports/<job_id>', methods=['GET', 'DELETE'])
+def handle_export_job(job_id):
+    owner = current_session().token
+    if request.method == 'DELETE':
+        job = export_jobs.cancel(job_id, owner)
+    else:
+        job = export_jobs.get(job_id, owner)
+    if job is None:
+        return jsonify({'error': 'Unknown export job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/exports/<job_id>/download')
+def download_export_job(job_id):
+    job = export_jobs.get(job_id, current_session().token)
+    if job is None:
+        return jsonify({'error': 'Unknown export job'}), 404
+    path = job.path
+    if job.state != 'done' or path is None or not os.path.exists(path):
+        return jsonify({'error': f'Export is {job.state}', 'job': job.to_dict()}), 409
+    # conditional=True answers Range requests with 206, so interrupted downloads resume
+    mimetype = 'application/gzip' if job.filename.endswith('.gz') else EXPORT_FILE_TYPES[job.format][1]
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=job.filename,
+                     conditional=True, max_age=0)
+
+def export_query_result(query, export_format, as_attachment=True):
+    """Run custom SQL and send its (first) result set as a Parquet file or Arrow stream"""
+    try:
+        require_pyarrow()
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+
+    db_type = 'postgresql' if current_db_config.get('db_type') == 'postgresql' else 'mysql'
+    connection = get_db_connection()
+    # Custom SQL can change session state (USE, SET, temp tables), so never reuse this connection
+    connection.discard()
+    spool = None
+    try:
+        cursor = connection.cursor() if db_type == 'postgresql' else connection.cursor(buffered=False)
+        cursor.execute(query)
+        if cursor.description is None:
+            rowcount = cursor.rowcount if cursor.rowcount >= 0 else 0
             cursor.close()
-        if 'connection' in locals():
-            connection.close()
+            connection.commit()
+            invalidate_table_metadata()
+            invalidate_table_pages()
+            if not as_attachment:
+                # Negotiated Arrow: statements without a result answer as usual
+                return jsonify({
+                    'success': True,
+                    'message': f'Query executed successfully. Rows affected: {rowcount}',
+                    'rowCount': rowcount
+                })
+            return jsonify({'error': 'The query returned no result set to export'}), 400
+
+        extension, mimetype = EXPORT_FILE_TYPES[export_format]
+        spool = tempfile.TemporaryFile(prefix='udbm_export_', suffix=f'.{extension}')
+        rows = write_arrow(CursorReader(cursor, EXPORT_FETCH_SIZE), spool, export_format, db_type, export_text)
+        spool.seek(0)
+        response = send_file(spool, mimetype=mimetype, as_attachment=as_attachment,
+                             download_name=f'query_result_{time.strftime("%Y%m%d_%H%M%S")}.{extension}')
+        response.headers['X-Row-Count'] = str(rows)
+        spool = None
+        return response
+    finally:
+        connection.close()
+        if spool is not None:
+            spool.close()
 
 @app.route('/execute_query', methods=['POST'])
 def execute_query():
@@ -1619,7 +2979,15 @@ def execute_query():
         if not query:
             return jsonify({'error': 'Empty query'}), 400
 
+        if data.get('format') in ARROW_FORMATS:
+            return export_query_result(query, data['format'])
+        if negotiate_mimetype([ARROW_STREAM_MIMETYPE]) == ARROW_STREAM_MIMETYPE:
+            # Large results as an (uncompressed, which Arrow JS can read) Arrow IPC stream
+            return export_query_result(query, 'arrow', as_attachment=False)
+
         connection = get_db_connection()
+        # Custom SQL can change session state (USE, SET, temp tables), so never reuse this connection
+        connection.discard()
         cursor = None
 
         try:
@@ -1665,6 +3033,9 @@ def execute_query():
             else:
                 # Query doesn't return results (INSERT, UPDATE, DELETE, etc.)
                 connection.commit()
+                # It may have been DDL; drop cached table metadata
+                invalidate_table_metadata()
+                invalidate_table_pages()
                 rowcount = cursor.rowcount if cursor.rowcount >= 0 else 0
                 return jsonify({
                     'success': True,
@@ -0,0 +1,132 @@
+"""
+Single-flight coalescing and a short-lived cache for identical page loads.
+
+A dashboard open in several tabs (or by several users of the same
+database) asks for the same table page at the same moment on every
+polling tick. PageCache.get(key, load) runs load() once per key at a time:
+requests arriving while a load is in flight wait for it and share its
+result (or its exception), and a successful result is then served from a
+size-bounded LRU for `ttl` seconds.
+
+Keys start with (database fingerprint, table). invalidate() drops the
+cached entries of a table (or of a whole database) and detaches loads
+already in flight, so nothing read before a write is served or cached
+after it; later requests start a fresh load.
+
+A CachedPage holds the ETag and renders its body on first use, so that
+requests answered with 304 never pay for serialization.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedPage:
+    """An ETag and a body rendered once, on first use, by whichever request needs it"""
+
+    __slots__ = ('etag', '_render', '_body', '_lock')
+
+    def __init__(self, etag, render):
+        self.etag = etag
+        self._render = render
+        self._body = None
+        self._lock = threading.Lock()
+
+    def body(self):
+        if self._render is not None:
+            with self._lock:
+                if self._render is not None:
+                    self._body = self._render()
+                    # Drop the rows the renderer holds on to
+                    self._render = None
+        return self._body
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error', 'detached')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        # Set by invalidate(): the load may have read rows from before a write
+        self.detached = False
+
+
+class PageCache:
+    """
+    Coalesces concurrent loads of one key and caches results for `ttl`
+    seconds (0 only coalesces), keeping at most `max_entries` of them.
+    """
+
+    def __init__(self, ttl=1.0, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._flights = {}              # key -> _Flight
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key, load):
+        """The cached value of key, or the result of load() shared with concurrent callers"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                # A load that overlapped an invalidation may have read the old rows
+                if flight.error is None and self.ttl > 0 and not flight.detached:
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self._stats['evictions'] += 1
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, fingerprint, table_name=None):
+        """Forget the pages of one table, or of every table of the database"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == fingerprint
+                        and (table_name is None or key[1] == table_name)]:
+                del self._entries[key]
+            for key in [key for key in self._flights if key[0] == fingerprint
+                        and (table_name is None or key[1] == table_name)]:
+                self._flights.pop(key).detached = True
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ttl': self.ttl,
+                'max_entries': self.max_entries,
+                'entries': len(self._entries),
+                'in_flight': len(self._flights),
+                **self._stats,
+            }
@@ -0,0 +1,220 @@
+"""
+PostgreSQL change capture through LISTEN/NOTIFY.
+
+install_triggers() adds a statement-level trigger to each monitored table
+that calls pg_notify() with the table name and operation. Tables that
+already carry the trigger are left alone, and triggers installed by other
+tools can be reused as long as they notify the same channel with either a
+JSON payload containing "table" or the bare table name.
+
+A PgChangeListener keeps one dedicated (unpooled) connection that LISTENs on
+the channel and turns notifications into on_change(table, operation)
+callbacks. on_status(connected) reports when the feed can be trusted:
+notifications sent while the listener is disconnected are lost, so callers
+should fall back to polling until it reports connected again.
+"""
+import json
+import logging
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'udbm_changes'
+TRIGGER_NAME = 'udbm_notify_change'
+FUNCTION_NAME = 'udbm_notify_change'
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def install_triggers(connection, tables, channel=DEFAULT_CHANNEL):
+    """
+    Install the notify trigger on each table (public schema).
+    Returns {'installed': [...], 'existing': [...], 'failed': {table: error}}.
+    """
+    result = {'installed': [], 'existing': [], 'failed': {}}
+    cursor = connection.cursor()
+    try:
+        # Statement-level: one notification per statement however many rows it touches,
+        # and NOTIFY folds identical payloads within a transaction
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION public.{FUNCTION_NAME}() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify(TG_ARGV[0], json_build_object('table', TG_TABLE_NAME, 'op', TG_OP)::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        connection.commit()
+
+        existing = triggered_tables(connection)
+        for table_name in tables:
+            if table_name in existing:
+                result['existing'].append(table_name)
+                continue
+            try:
+                cursor.execute(f"""
+                    CREATE TRIGGER {TRIGGER_NAME}
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.{_quote(table_name)}
+                    FOR EACH STATEMENT EXECUTE PROCEDURE public.{FUNCTION_NAME}(%s)
+                """, (channel,))
+                connection.commit()
+                result['installed'].append(table_name)
+            except psycopg2.Error as e:
+                connection.rollback()
+                result['failed'][table_name] = str(e).strip()
+        return result
+    finally:
+        cursor.close()
+
+
+def uninstall_triggers(connection, tables=None):
+    """Drop the notify triggers (from the given tables, or from every table that has one)"""
+    cursor = connection.cursor()
+    try:
+        dropped = []
+        targets = triggered_tables(connection)
+        if tables is not None:
+            targets &= set(tables)
+        for table_name in sorted(targets):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {TRIGGER_NAME} ON public.{_quote(table_name)}")
+            dropped.append(table_name)
+        connection.commit()
+        return dropped
+    finally:
+        cursor.close()
+
+
+def triggered_tables(connection):
+    """Names of the public tables that carry the notify trigger"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT c.relname
+            FROM pg_trigger t
+            JOIN pg_class c ON c.oid = t.tgrelid
+            WHERE t.tgname = %s AND c.relnamespace = 'public'::regnamespace
+        """, (TRIGGER_NAME,))
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        connection.rollback()
+
+
+def parse_payload(payload):
+    """Return (table, operation) from a notification payload"""
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return payload or None, None
+    if isinstance(data, dict):
+        return data.get('table'), data.get('op')
+    return str(data), None
+
+
+class PgChangeListener:
+    """
+    Background LISTEN loop on a dedicated connection.
+
+    - connect():                   opens a new raw psycopg2 connection
+    - on_change(table, operation): called from the listener thread for each notification
+    - on_status(connected):        called once LISTEN is active and again when the connection is lost
+    """
+
+    def __init__(self, connect, on_change, on_status=None, channel=DEFAULT_CHANNEL, name='pg-listener',
+                 reconnect_delay=1.0, max_reconnect_delay=30.0):
+        self.channel = channel
+        self.name = name
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._connect = connect
+        self._on_change = on_change
+        self._on_status = on_status or (lambda connected: None)
+        self._stop = threading.Event()
+        self._thread = None
+        self._connection = None
+        self.connected = False
+        self.notifications = 0
+        self.reconnects = 0
+        self.last_event_at = None
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _open(self):
+        connection = self._connect()
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        cursor = connection.cursor()
+        cursor.execute(f"LISTEN {_quote(self.channel)}")
+        cursor.close()
+        return connection
+
+    def _run(self):
+        delay = self.reconnect_delay
+        first = True
+        while not self._stop.is_set():
+            try:
+                self._connection = self._open()
+                self.connected = True
+                self.last_error = None
+                delay = self.reconnect_delay
+                if not first:
+                    self.reconnects += 1
+                first = False
+                self._on_status(True)
+                self._listen()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"{self.name}: {e}; reconnecting in {delay:g}s")
+            finally:
+                if self.connected:
+                    self.connected = False
+                    self._on_status(False)
+                if self._connection is not None:
+                    try:
+                        self._connection.close()
+                    except Exception:
+                        pass
+                    self._connection = None
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _listen(self):
+        connection = self._connection
+        while not self._stop.is_set():
+            # Wake up at least once a second to notice stop()
+            if select.select([connection], [], [], 1.0) == ([], [], []):
+                continue
+            connection.poll()
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                self.notifications += 1
+                self.last_event_at = time.time()
+                table_name, operation = parse_payload(notify.payload)
+                try:
+                    self._on_change(table_name, operation)
+                except Exception as e:
+                    logger.error(f"{self.name}: change handler failed: {e}")
+
+    def stats(self):
+        return {
+            'channel': self.channel,
+            'connected': self.connected,
+            'notifications': self.notifications,
+            'reconnects': self.reconnects,
+            'last_event_at': self.last_event_at,
+            'last_error': self.last_error,
+        }
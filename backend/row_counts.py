@@ -0,0 +1,113 @@
+"""
+Row count strategies for large tables.
+
+- exact:    SELECT COUNT(*) with the active filters (a full scan on big tables)
+- estimate: the planner's statistics (pg_class.reltuples, TABLE_ROWS or an
+            EXPLAIN row estimate when filters are active)
+- hybrid:   exact below a size threshold; above it, the estimate plus an exact
+            count of the rows inserted since, tracked through a primary key
+            watermark so each poll only reads the newest rows from the index
+
+Hybrid counts follow inserts live and are re-based whenever the statistics
+estimate moves (after ANALYZE / autovacuum), which also folds in deletes.
+When a change feed reports a table's inserted-minus-deleted balance (MySQL
+binlog capture), hybrid counts of the unfiltered table follow that balance
+instead and need no query beyond the estimate.
+"""
+import threading
+from collections import OrderedDict
+
+COUNT_STRATEGIES = ('exact', 'estimate', 'hybrid')
+
+
+class _Watermark:
+    __slots__ = ('estimate', 'watermark', 'inserted', 'delta')
+
+    def __init__(self, estimate, watermark, delta=None):
+        self.estimate = estimate
+        self.watermark = watermark
+        self.inserted = 0
+        self.delta = delta
+
+
+class RowCounter:
+    """
+    Applies a count strategy and keeps the hybrid watermarks per view.
+
+    - exact(connection, db_type, table_name, filters): exact row count
+    - estimate(connection, db_type, table_name, filters): estimated row count, or None
+    - max_key(connection, db_type, table_name, pk): current maximum of the primary key
+    - count_since(connection, db_type, table_name, filters, pk, watermark):
+      (rows with pk > watermark, new maximum of pk among them)
+    - row_delta(fingerprint, table_name): optional; (epoch, net rows inserted)
+      from a change feed, or None when no feed covers the table
+    """
+
+    def __init__(self, exact, estimate, max_key, count_since, threshold=1000000, max_views=1024, row_delta=None):
+        self.threshold = threshold
+        self.max_views = max_views
+        self._exact = exact
+        self._estimate = estimate
+        self._max_key = max_key
+        self._count_since = count_since
+        self._row_delta = row_delta or (lambda fingerprint, table_name: None)
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, connection, context, table_name, filters, strategy, pk=None):
+        """Return (count, strategy used, whether the count is estimated)"""
+        db_type = context.db_type
+        if strategy not in ('estimate', 'hybrid'):
+            return self._exact(connection, db_type, table_name, filters), 'exact', False
+
+        estimate = self._estimate(connection, db_type, table_name, filters)
+        if estimate is None:
+            return self._exact(connection, db_type, table_name, filters), 'exact', False
+        if strategy == 'estimate':
+            return estimate, 'estimate', True
+        if estimate < self.threshold:
+            return self._exact(connection, db_type, table_name, filters), 'exact', False
+        delta = None if filters else self._row_delta(context.fingerprint, table_name)
+        if pk is None and delta is None:
+            return estimate, 'estimate', True
+
+        key = (context.fingerprint, table_name, pk, tuple(sorted((c, tuple(v)) for c, v in filters.items())))
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+
+        if view is None or view.estimate != estimate or not self._same_feed(view.delta, delta):
+            # New view, fresh statistics or a reset feed balance: re-base on the estimate
+            # and the current newest key (or the current balance)
+            watermark = self._max_key(connection, db_type, table_name, pk) if delta is None else None
+            view = _Watermark(estimate, watermark, delta)
+            with self._lock:
+                self._views[key] = view
+                while len(self._views) > self.max_views:
+                    self._views.popitem(last=False)
+            return estimate, 'hybrid', True
+
+        if delta is not None:
+            return view.estimate + delta[1] - view.delta[1], 'hybrid', True
+
+        since = view.watermark
+        inserted, newest = self._count_since(connection, db_type, table_name, filters, pk, since)
+        with self._lock:
+            # A concurrent poll of the same view may already have advanced the watermark
+            if newest is not None and view.watermark == since:
+                view.inserted += inserted
+                view.watermark = newest
+            return view.estimate + view.inserted, 'hybrid', True
+
+    @staticmethod
+    def _same_feed(previous, current):
+        if previous is None or current is None:
+            return previous is current
+        return previous[0] == current[0]
+
+    def forget(self, fingerprint, table_name=None):
+        """Drop the watermarks of one table (or a whole database)"""
+        with self._lock:
+            for key in [k for k in self._views if k[0] == fingerprint and table_name in (None, k[1])]:
+                del self._views[key]
@@ -0,0 +1,190 @@
+"""
+JSON serialization of result rows.
+
+make_json_serializable() inspects every value with a chain of isinstance
+checks and recurses into dicts and lists, which makes it the hottest code
+in a server that polls pages of many tables. A RowSerializer looks at the
+cursor description once instead and picks one converter per column from
+the type code (PostgreSQL type OID or MySQL field type):
+
+- integers, floats, booleans, text and JSON/JSONB need no conversion (JSON
+  values arrive already decoded into dicts and lists) and are left alone
+- numeric/decimal become floats, dates, times and timestamps ISO strings,
+  intervals (and MySQL TIME, which arrives as a timedelta) their str(), and
+  bytea its hex text form
+- any other type falls back to make_json_serializable()
+
+dumps() encodes with orjson when it is installed and with the standard
+json module otherwise. packb() encodes MessagePack (optional msgpack
+package) straight from cursor tuples: native values are packed as they
+are and only the few others go through a default hook.
+"""
+import datetime
+import decimal
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_json_serializable(obj):
+    """
+    Convert non-JSON-serializable objects to JSON-serializable formats.
+    Handles timedelta, datetime, date, Decimal, and other common PostgreSQL types.
+    """
+    if isinstance(obj, datetime.timedelta):
+        # Convert timedelta to string representation (e.g., "0:01:23.456789")
+        return str(obj)
+    elif isinstance(obj, (datetime.datetime, datetime.date)):
+        # Convert datetime/date to ISO format string
+        return obj.isoformat()
+    elif isinstance(obj, decimal.Decimal):
+        # Convert Decimal to float
+        return float(obj)
+    elif isinstance(obj, (dict, list)):
+        # Recursively process dictionaries and lists
+        if isinstance(obj, dict):
+            return {key: make_json_serializable(value) for key, value in obj.items()}
+        else:
+            return [make_json_serializable(item) for item in obj]
+    else:
+        # Return as-is for JSON-serializable types
+        return obj
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _bytea(value):
+    # PostgreSQL's own text form of bytea
+    return '\\x' + bytes(value).hex()
+
+
+# Type code -> converter; None means the driver already returns a JSON-native value
+_PG_CONVERTERS = {
+    16: None,                                   # boolean
+    20: None, 21: None, 23: None, 26: None,     # bigint, smallint, integer, oid
+    700: None, 701: None,                       # real, double precision
+    18: None, 19: None, 25: None,               # "char", name, text
+    1042: None, 1043: None,                     # char(n), varchar
+    114: None, 3802: None,                      # json, jsonb
+    1700: float,                                # numeric
+    1082: _isoformat, 1083: _isoformat,         # date, time
+    1114: _isoformat, 1184: _isoformat,         # timestamp, timestamptz
+    1266: _isoformat,                           # timetz
+    1186: str,                                  # interval
+    17: _bytea,                                 # bytea
+}
+
+# mysql.connector FieldType codes
+_MYSQL_CONVERTERS = {
+    1: None, 2: None, 3: None, 8: None, 9: None, 13: None,  # TINY, SHORT, LONG, LONGLONG, INT24, YEAR
+    4: None, 5: None,                                       # FLOAT, DOUBLE
+    0: float, 246: float,                                   # DECIMAL, NEWDECIMAL
+    10: _isoformat, 14: _isoformat,                         # DATE, NEWDATE
+    7: _isoformat, 12: _isoformat,                          # TIMESTAMP, DATETIME
+    11: str,                                                # TIME (a timedelta)
+    15: None, 252: None, 253: None, 254: None,              # VARCHAR, BLOB/TEXT, VAR_STRING, STRING
+}
+
+
+class RowSerializer:
+    """
+    Makes rows of one result JSON serializable, given the cursor description
+    they came from. Dict rows (RealDictCursor, dictionary=True) are converted
+    in place; tuple rows become lists, or per-column lists with
+    serialize_columns().
+    """
+
+    def __init__(self, description, db_type):
+        table = _PG_CONVERTERS if db_type == 'postgresql' else _MYSQL_CONVERTERS
+        self.columns = [column[0] for column in description or ()]
+        converters = [table.get(column[1], make_json_serializable) for column in description or ()]
+        self.converters = converters
+        # Only the columns that need work are visited per row; a repeated name keeps the
+        # converter of its last column, as the dict row keeps its last value
+        self._by_index = [(i, convert) for i, convert in enumerate(converters) if convert is not None]
+        by_name = dict(zip(self.columns, converters))
+        self._by_name = [(name, convert) for name, convert in by_name.items() if convert is not None]
+
+    def serialize_rows(self, rows):
+        if not rows:
+            return []
+        if isinstance(rows[0], dict):
+            by_name = self._by_name
+            for row in rows:
+                for name, convert in by_name:
+                    value = row[name]
+                    if value is not None:
+                        row[name] = convert(value)
+            return rows
+        by_index = self._by_index
+        result = []
+        for row in rows:
+            row = list(row)
+            for i, convert in by_index:
+                value = row[i]
+                if value is not None:
+                    row[i] = convert(value)
+            result.append(row)
+        return result
+
+    def serialize_columns(self, rows):
+        """Tuple rows as one list of values per column"""
+        columns = [list(values) for values in zip(*rows)] if rows else [[] for _ in self.converters]
+        for i, convert in self._by_index:
+            columns[i] = [value if value is None else convert(value) for value in columns[i]]
+        return columns
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        """Encode obj as JSON bytes; values JSON cannot represent are encoded with str()"""
+        return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS)
+else:
+    def dumps(obj):
+        """Encode obj as JSON bytes; values JSON cannot represent are encoded with str()"""
+        return json.dumps(obj, default=str, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def require_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise RuntimeError('MessagePack responses need the msgpack package (pip install msgpack)')
+    return msgpack
+
+
+# Exact type -> conversion, tried before the isinstance checks below
+_MSGPACK_CONVERSIONS = {
+    decimal.Decimal: float,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    datetime.timedelta: str,
+    memoryview: bytes,
+}
+
+
+def _msgpack_default(value):
+    # Same text forms as the JSON responses; binary values stay binary
+    convert = _MSGPACK_CONVERSIONS.get(type(value))
+    if convert is not None:
+        return convert(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, memoryview):
+        return bytes(value)
+    return str(value)
+
+
+def packb(obj):
+    """Encode obj (tuples become arrays) as MessagePack bytes"""
+    return require_msgpack().packb(obj, default=_msgpack_default, datetime=False)
@@ -0,0 +1,229 @@
+"""
+Per-connection prepared statements for the polling queries.
+
+The /data count and page queries are rebuilt from the same few shapes on
+every polling tick: the SQL text only changes with the table, the filtered
+columns, the number of filter values and the sort, while the values travel
+as parameters. The SQL text therefore is the query shape, and
+PreparedStatements keys each pooled connection's statements by it, so a
+repeated poll skips parsing and planning on the server:
+
+- PostgreSQL: PREPARE udbm_<n> AS ... once per connection and shape, then
+  EXECUTE udbm_<n> (...). The PREPARE runs inside a savepoint, so a shape
+  the server cannot prepare (e.g. an untyped parameter) is remembered and
+  executed unprepared instead of aborting the transaction. Statements
+  evicted by the LRU are deallocated in the same round trip as the next
+  PREPARE.
+- MySQL: one prepared cursor (cursor(prepared=True)) per shape; executing
+  the same operation again reuses the server-side statement.
+
+invalidate() marks every connection stale after DDL; each one drops its
+statements (DEALLOCATE ALL, or closes its cursors) the next time it is
+used; the metadata cache also calls it when its schema version probe sees
+DDL made elsewhere. A PostgreSQL statement whose result columns changed
+before that fails with "cached plan must not change result type" and is
+prepared again. An EXECUTE inside a transaction that already holds state
+(the caller's SET LOCAL settings) is preceded by a savepoint in the same
+round trip and released after it, so that failure rolls back only the
+EXECUTE.
+"""
+import itertools
+import logging
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+from psycopg2.extensions import TRANSACTION_STATUS_INTRANS
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDERS = re.compile(r'%[s%]')
+
+# SQLSTATE of "cached plan must not change result type"
+_PLAN_CHANGED = '0A000'
+
+
+def numbered_placeholders(sql):
+    """Turn DB-API %s placeholders into PostgreSQL's $1, $2, ... (and %% into %)"""
+    counter = itertools.count(1)
+    return _PLACEHOLDERS.sub(lambda match: '%' if match.group() == '%%' else f'${next(counter)}', sql)
+
+
+class _ConnectionStatements:
+    """Prepared statements of one connection, least recently used first"""
+
+    __slots__ = ('statements', 'generation', 'next_id', 'deallocate', '__weakref__')
+
+    def __init__(self, generation):
+        # sql -> statement name (PostgreSQL) or (sql, prepared cursor) (MySQL); None: cannot be prepared
+        self.statements = OrderedDict()
+        self.generation = generation
+        self.next_id = 0
+        # PostgreSQL statements to deallocate with the next PREPARE
+        self.deallocate = []
+
+
+class PreparedStatements:
+    """
+    Executes read-only queries as prepared statements of the connection they
+    run on, keeping at most `max_statements` per connection. Connections are
+    tracked weakly and forgotten once closed and collected.
+    """
+
+    def __init__(self, max_statements=64):
+        self.max_statements = max_statements
+        self._connections = weakref.WeakKeyDictionary()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {'prepared': 0, 'executed': 0, 'unpreparable': 0, 'evicted': 0, 'invalidations': 0,
+                       'replans': 0}
+
+    def _statements(self, raw):
+        generation = self._generation
+        with self._lock:
+            statements = self._connections.get(raw)
+            if statements is None:
+                statements = self._connections[raw] = _ConnectionStatements(generation)
+        return statements, generation
+
+    def query(self, connection, db_type, sql, params, cursor, dictionary=False):
+        """
+        Run sql with params and return (rows, description).
+
+        On PostgreSQL the statement runs on cursor, whose row type is kept.
+        On MySQL it runs on a prepared cursor of the connection instead, and
+        rows are tuples, or dicts with dictionary=True.
+        """
+        raw = getattr(connection, 'raw', connection)
+        statements, generation = self._statements(raw)
+        if db_type == 'postgresql':
+            return self._query_postgresql(raw, statements, generation, sql, params, cursor)
+        return self._query_mysql(raw, statements, generation, sql, params, dictionary)
+
+    def _query_postgresql(self, raw, statements, generation, sql, params, cursor, retry=True):
+        setup = list(statements.deallocate)
+        if statements.generation != generation:
+            # DDL since these were prepared: start over
+            setup = ['DEALLOCATE ALL']
+            statements.statements.clear()
+            statements.generation = generation
+        statements.deallocate = []
+
+        if sql in statements.statements:
+            name = statements.statements[sql]
+            statements.statements.move_to_end(sql)
+            if setup:
+                cursor.execute('; '.join(setup))
+        else:
+            name = self._prepare_postgresql(raw, statements, sql, cursor, setup)
+
+        guarded = False
+        if name is None:
+            cursor.execute(sql, params)
+        else:
+            execute = f"EXECUTE {name} ({', '.join(['%s'] * len(params))})" if params else f"EXECUTE {name}"
+            # An EXECUTE that starts the transaction (or runs in autocommit) has nothing to keep
+            guarded = retry and raw.get_transaction_status() == TRANSACTION_STATUS_INTRANS
+            if guarded:
+                execute = f'SAVEPOINT udbm_execute; {execute}'
+            try:
+                cursor.execute(execute, params or None)
+            except Exception as e:
+                if not retry or getattr(e, 'pgcode', None) != _PLAN_CHANGED:
+                    raise
+                # The table changed shape since the statement was prepared
+                if guarded:
+                    cursor.execute('ROLLBACK TO SAVEPOINT udbm_execute; RELEASE SAVEPOINT udbm_execute')
+                else:
+                    raw.rollback()
+                with self._lock:
+                    self._stats['replans'] += 1
+                statements.generation = None
+                return self._query_postgresql(raw, statements, generation, sql, params, cursor, retry=False)
+        rows, description = cursor.fetchall(), cursor.description
+        if guarded:
+            # Savepoints nest until released; a long transaction would pile them up
+            cursor.execute('RELEASE SAVEPOINT udbm_execute')
+        with self._lock:
+            self._stats['executed'] += 1
+        return rows, description
+
+    def _prepare_postgresql(self, raw, statements, sql, cursor, setup):
+        name = f'udbm_{statements.next_id}'
+        statements.next_id += 1
+        prepare = f'PREPARE {name} AS {numbered_placeholders(sql)}'
+        # Outside a transaction a failed PREPARE has nothing to abort
+        guarded = not raw.autocommit
+        try:
+            if guarded:
+                cursor.execute('; '.join(['SAVEPOINT udbm_prepare'] + setup + [prepare, 'RELEASE SAVEPOINT udbm_prepare']))
+            else:
+                cursor.execute('; '.join(setup + [prepare]))
+        except Exception as e:
+            if guarded:
+                cursor.execute('ROLLBACK TO SAVEPOINT udbm_prepare')
+            logger.debug(f"Not preparing {sql!r}: {e}")
+            name = None
+        self._remember(statements, sql, name)
+        return name
+
+    def _query_mysql(self, raw, statements, generation, sql, params, dictionary):
+        if statements.generation != generation:
+            for _, prepared in statements.statements.values():
+                _close_cursor(prepared)
+            statements.statements.clear()
+            statements.generation = generation
+
+        entry = statements.statements.get(sql)
+        if entry is None:
+            # The cursor recognizes a repeated operation by identity, so the first string is kept with it
+            entry = (sql, raw.cursor(prepared=True))
+            self._remember(statements, sql, entry)
+        else:
+            statements.statements.move_to_end(sql)
+        sql, prepared = entry
+        prepared.execute(sql, params)
+        rows = prepared.fetchall()
+        description = prepared.description
+        with self._lock:
+            self._stats['executed'] += 1
+        if dictionary:
+            names = [column[0] for column in description]
+            rows = [dict(zip(names, row)) for row in rows]
+        return rows, description
+
+    def _remember(self, statements, sql, statement):
+        statements.statements[sql] = statement
+        with self._lock:
+            self._stats['prepared' if statement is not None else 'unpreparable'] += 1
+        while len(statements.statements) > self.max_statements:
+            _, evicted = statements.statements.popitem(last=False)
+            with self._lock:
+                self._stats['evicted'] += 1
+            if isinstance(evicted, str):
+                statements.deallocate.append(f'DEALLOCATE {evicted}')
+            elif evicted is not None:
+                _close_cursor(evicted[1])
+
+    def invalidate(self):
+        """Drop the prepared statements of every connection (after DDL)"""
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_statements': self.max_statements,
+                'connections': len(self._connections),
+                'statements': sum(len(s.statements) for s in list(self._connections.values())),
+                **self._stats,
+            }
+
+
+def _close_cursor(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
@@ -16,9 +16,15 @@ import {
     updateSingleTable,
     fetchTableData,
     fetchTableCount,
+    fetchTableCounts,
+    renderTableCounts,
+    applyStreamedTableData,
+    buildTableDataParams,
+    getCountStrategy,
     adjustColumnWidths,
     addDownloadButtons
 } from './table.js';
+import { MonitorStream } from './stream.js';
 
 // Constants
 const baseUrl = window.location.origin;
@@ -650,7 +656,7 @@ function updateDynamicElements() {
 
     // Update row counts
     document.querySelectorAll('[id$="_count"]').forEach(countSpan => {
-        const count = countSpan.textContent.match(/\d+/);
+        const count = countSpan.textContent.match(/~?\d+/);
         if (count) {
             countSpan.textContent = `(${count[0]} ${t('ui.rows')})`;
         }
@@ -683,6 +689,110 @@ function updateToggleButtonText(button, isHidden) {
     `;
 }
 
+// Row counts seen on the previous tick, to animate the deltas
+const previousCounts = {};
+
+function applyCountChanges(newCounts) {
+    Object.entries(newCounts).forEach(([tableName, newCount]) => {
+        const oldCount = previousCounts[tableName];
+
+        if (oldCount !== undefined && newCount !== oldCount) {
+            const delta = newCount - oldCount;
+
+            // Update table row count
+            const countSpan = document.getElementById(`${tableName}_count`);
+            if (!countSpan.classList.contains('table-row-count')) {
+                countSpan.className = 'table-row-count';
+            }
+
+            // Update pill count
+            const buttonCount = document.getElementById(`${tableName}_button_count`);
+            const pillWrapper = buttonCount.closest('.pill-count-wrapper') || createPillWrapper(buttonCount);
+            if (!buttonCount.classList.contains('pill-count')) {
+                buttonCount.className = 'pill-count';
+            }
+
+            // Add delta indicators
+            [countSpan, buttonCount].forEach(element => {
+                const deltaPopup = document.createElement('span');
+                deltaPopup.className = `count-delta ${delta > 0 ? 'positive' : 'negative'}`;
+                deltaPopup.textContent = `${delta > 0 ? '+' : ''}${delta}`;
+
+                const container = element.closest('.table-row-count, .pill-count-wrapper');
+                const existingDelta = container.querySelector('.count-delta');
+                if (existingDelta) {
+                    existingDelta.remove();
+                }
+
+                container.appendChild(deltaPopup);
+
+                // Trigger animation
+                element.classList.remove('count-update');
+                void element.offsetWidth;
+                element.classList.add('count-update');
+            });
+
+            // Cleanup
+            setTimeout(() => {
+                document.querySelectorAll(`#${tableName}_count, #${tableName}_button_count`)
+                    .forEach(el => el.classList.remove('count-update'));
+            }, 1500);
+        }
+
+        previousCounts[tableName] = newCount;
+    });
+}
+
+// Live updates arrive over a server-sent event stream when the browser supports it;
+// the interval then only keeps the stream's subscriptions in sync with the UI
+let monitorStream = null;
+
+function currentStreamViews() {
+    const views = {
+        counts: {
+            type: 'counts',
+            tables: tableNames,
+            count_strategies: Object.fromEntries(
+                tableNames.map(tableName => [tableName, getCountStrategy(tableName)]).filter(([, strategy]) => strategy))
+        }
+    };
+    document.querySelectorAll('.table-container:not(.hidden-table)').forEach(tableContainer => {
+        const tableName = tableContainer.id;
+        views[`data:${tableName}`] = {
+            type: 'data',
+            table: tableName,
+            params: Object.fromEntries(buildTableDataParams(tableName, 0))
+        };
+    });
+    return views;
+}
+
+function startStreaming() {
+    if (!monitorStream) {
+        monitorStream = new MonitorStream(baseUrl, {
+            onOpen: () => checkConnection(baseUrl, () => updateConnectionStatus(getCurrentLanguage())),
+            onView: (viewId, payload) => {
+                if (viewId === 'counts') {
+                    applyCountChanges(renderTableCounts(Object.keys(payload.counts).concat(Object.keys(payload.errors)), payload));
+                } else if (viewId.startsWith('data:')) {
+                    applyStreamedTableData(viewId.slice('data:'.length), payload, getCurrentLanguage(), baseUrl);
+                }
+            },
+            onViewError: (viewId, error) => console.error(`Stream view ${viewId} failed:`, error),
+            onError: () => checkConnection(baseUrl, () => updateConnectionStatus(getCurrentLanguage()))
+        });
+    }
+    monitorStream.open(monitorInterval);
+    monitorStream.setViews(currentStreamViews());
+    monitorIntervalId = setInterval(() => monitorStream.setViews(currentStreamViews()), Math.min(monitorInterval, 1000));
+}
+
+function stopStreaming() {
+    if (monitorStream) {
+        monitorStream.close();
+    }
+}
+
 // Modify the startMonitoring function
 function startMonitoring() {
     if (monitorIntervalId) {
@@ -695,8 +805,12 @@ function startMonitoring() {
     // Immediately check connection when monitoring starts/resumes
     checkConnection(baseUrl, () => updateConnectionStatus(currentLang));
 
-    // Add storage for previous counts
-    const previousCounts = {};
+    if (window.EventSource) {
+        startStreaming();
+        updateClockAnimation();
+        return;
+    }
+
 monitorIntervalId = setInterval(async () => {
     // Store the current language for consistent usage
     const currentLang = getCurrentLanguage();
@@ -706,58 +820,8 @@ monitorIntervalId = setInterval(async () => {
         return; // Skip data fetching if connection is down
     }
 
-        // Update all table counts only if connected
-        tableNames.forEach(tableName => {
-            fetchTableCount(tableName, baseUrl, null, currentLang)
-                .then(newCount => {
-                    const oldCount = previousCounts[tableName];
-
-                    if (oldCount !== undefined && newCount !== oldCount) {
-                        const delta = newCount - oldCount;
-
-                        // Update table row count
-                        const countSpan = document.getElementById(`${tableName}_count`);
-                        if (!countSpan.classList.contains('table-row-count')) {
-                            countSpan.className = 'table-row-count';
-                        }
-
-                        // Update pill count
-                        const buttonCount = document.getElementById(`${tableName}_button_count`);
-                        const pillWrapper = buttonCount.closest('.pill-count-wrapper') || createPillWrapper(buttonCount);
-                        if (!buttonCount.classList.contains('pill-count')) {
-                            buttonCount.className = 'pill-count';
-                        }
-
-                        // Add delta indicators
-                        [countSpan, buttonCount].forEach(element => {
-                            const deltaPopup = document.createElement('span');
-                            deltaPopup.className = `count-delta ${delta > 0 ? 'positive' : 'negative'}`;
-                            deltaPopup.textContent = `${delta > 0 ? '+' : ''}${delta}`;
-
-                            const container = element.closest('.table-row-count, .pill-count-wrapper');
-                            const existingDelta = container.querySelector('.count-delta');
-                            if (existingDelta) {
-                                existingDelta.remove();
-                            }
-
-                            container.appendChild(deltaPopup);
-
-                            // Trigger animation
-                            element.classList.remove('count-update');
-                            void element.offsetWidth;
-                            element.classList.add('count-update');
-                        });
-
-                        // Cleanup
-                        setTimeout(() => {
-                            document.querySelectorAll(`#${tableName}_count, #${tableName}_button_count`)
-                                .forEach(el => el.classList.remove('count-update'));
-                        }, 1500);
-                    }
-
-                    previousCounts[tableName] = newCount;
-                });
-        });
+        // Update all table counts only if connected (one batched request per tick)
+        fetchTableCounts(tableNames, baseUrl).then(applyCountChanges);
 
         // Then update content only for visible tables
         const visibleTables = document.querySelectorAll('.table-container:not(.hidden-table)');
@@ -801,6 +865,7 @@ function toggleMonitoring() {
             clearInterval(monitorIntervalId);
             monitorIntervalId = null;
         }
+        stopStreaming();
         if (clockHand) {
             clockHand.style.animationPlayState = 'paused';
         }
@@ -1,3 +1,5 @@
+import { fetchJsonRevalidated } from './utils.js';
+
 let currentData = null;
 let schemaData = null;
 let useGraphviz = true; // Keep for backward compatibility
@@ -1476,11 +1478,7 @@ export function initializeSchema(schemaButton, modal, loading, error, container)
                 console.log('Fetching schema data...');
                 const schemaUrl = `${window.location.origin}/schema`;
                 console.log('Schema URL:', schemaUrl);
-                const response = await fetch(schemaUrl);
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                const data = await response.json();
+                const { data } = await fetchJsonRevalidated(schemaUrl);
 
                 if (data.error) {
                     throw new Error(data.error);
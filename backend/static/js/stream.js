@@ -0,0 +1,87 @@
+// Server-sent event stream for live monitoring.
+// The tab tells the server which views it shows (row counts, visible table pages) and
+// receives their new contents as they change. The server runs one poller per distinct
+// view, so many tabs watching the same tables cost the database no more than one.
+
+const RETRY_DELAY = 5000;
+
+export class MonitorStream {
+    constructor(baseUrl, handlers) {
+        this.baseUrl = baseUrl;
+        this.handlers = handlers; // { onOpen, onView(viewId, payload), onViewError(viewId, error), onError }
+        this.source = null;
+        this.clientId = null;
+        this.interval = null;
+        this.views = {};
+        this.sentViews = null;
+        this.retryTimer = null;
+    }
+
+    open(interval) {
+        if (this.source && this.interval === interval) return;
+        this.close();
+        this.interval = interval;
+        this.source = new EventSource(`${this.baseUrl}/stream?interval=${interval}`, { withCredentials: true });
+
+        this.source.addEventListener('hello', event => {
+            // A new stream (also after an automatic reconnect) starts without subscriptions
+            this.clientId = JSON.parse(event.data).client_id;
+            this.sentViews = null;
+            this.pushViews();
+            if (this.handlers.onOpen) this.handlers.onOpen();
+        });
+        this.source.addEventListener('data', event => {
+            const message = JSON.parse(event.data);
+            this.handlers.onView(message.view, message.payload);
+        });
+        this.source.addEventListener('view_error', event => {
+            const message = JSON.parse(event.data);
+            if (this.handlers.onViewError) this.handlers.onViewError(message.view, message.payload.error);
+        });
+        this.source.onerror = () => {
+            this.clientId = null;
+            if (this.source && this.source.readyState === EventSource.CLOSED) {
+                // The server refused the stream (no database selected yet, for example) and
+                // EventSource does not retry that on its own
+                const retryInterval = this.interval;
+                this.close();
+                this.retryTimer = setTimeout(() => this.open(retryInterval), RETRY_DELAY);
+            }
+            if (this.handlers.onError) this.handlers.onError();
+        };
+    }
+
+    close() {
+        clearTimeout(this.retryTimer);
+        this.retryTimer = null;
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+        this.clientId = null;
+        this.interval = null;
+    }
+
+    // views: { viewId: { type: 'data', table, params } | { type: 'counts', tables, count_strategies } }
+    setViews(views) {
+        this.views = views;
+        this.pushViews();
+    }
+
+    pushViews() {
+        if (!this.clientId) return;
+        const body = JSON.stringify({ views: this.views });
+        if (body === this.sentViews) return;
+        this.sentViews = body;
+        fetch(`${this.baseUrl}/stream/${this.clientId}`, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body
+        }).then(response => {
+            if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+        }).catch(error => {
+            console.error('Error updating stream subscriptions:', error);
+            this.sentViews = null;
+        });
+    }
+}
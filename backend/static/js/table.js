@@ -1,4 +1,4 @@
-import { setCookie, getCookie, getTextWidth, getCurrentLanguage, t } from './utils.js';
+import { setCookie, getCookie, getTextWidth, getCurrentLanguage, t, fetchJsonRevalidated } from './utils.js';
 
 // Constants and state variables
 const ROWS_PER_LOAD = 50;
@@ -225,10 +225,8 @@ export function addDownloadButtons() {
                         params.append('sort_direction', sortState.direction);
                     }
                     const url = `${window.baseUrl}/download/${tableName}/csv` + (params.toString() ? `?${params.toString()}` : '');
-                    const response = await fetch(url);
-                    if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
-                    const blob = await response.blob();
-                    downloadBlob(blob, `${tableName}_${new Date().toISOString().slice(0,19).replace(/[:]/g, '-')}.csv`);
+                    // The CSV is streamed; let the browser write it to disk as it arrives
+                    downloadUrl(url);
                 } catch (error) {
                     console.error('Error downloading CSV:', error);
                 }
@@ -285,6 +283,15 @@ export function addDownloadButtons() {
 }
 
 // Helper function to handle blob downloads
+function downloadUrl(url) {
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = '';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+}
+
 function downloadBlob(blob, filename) {
     const link = document.createElement('a');
     link.href = URL.createObjectURL(blob);
@@ -1743,15 +1750,8 @@ function hasRelations(tableName) {
 // Preload schema data when page loads
 async function loadSchemaData() {
     try {
-        const response = await fetch(`${window.location.origin}/schema`);
-        if (!response.ok) {
-            // If no database is configured, that's expected
-            if (response.status === 400) {
-                return;
-            }
-            throw new Error(`Failed to fetch schema: ${response.status}`);
-        }
-        const data = await response.json();
+        // Fails with 400 when no database is configured, which is expected
+        const { data } = await fetchJsonRevalidated(`${window.location.origin}/schema`);
         if (data.error) {
             return;
         }
@@ -2603,10 +2603,8 @@ export function updateSingleTable(tableName, tableInfo, translations, currentLan
                         params.append('sort_direction', sortState.direction);
                     }
                     const url = `${(window.baseUrl || baseUrl)}/download/${tableName}/csv` + (params.toString() ? `?${params.toString()}` : '');
-                    const response = await fetch(url);
-                    if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
-                    const blob = await response.blob();
-                    downloadBlob(blob, `${tableName}_${new Date().toISOString().slice(0,19).replace(/[:]/g, '-')}.csv`);
+                    // The CSV is streamed; let the browser write it to disk as it arrives
+                    downloadUrl(url);
                 } catch (error) {
                     console.error('Error downloading CSV:', error);
                 }
@@ -2663,7 +2661,7 @@ export function updateSingleTable(tableName, tableInfo, translations, currentLan
 
     const countSpan = document.getElementById(`${tableName}_count`);
     if (countSpan) {
-        countSpan.textContent = `(${tableInfo.count} ${t('ui.rows')})`;
+        countSpan.textContent = formatRowCount(tableInfo.count, tableInfo.count_estimated);
     }
 
     const isHidden = tableDiv.classList.contains('hidden-table');
@@ -3153,28 +3151,19 @@ function applySavedColumnWidths(headerTable, bodyTable, columns) {
     });
 }
 
-export function fetchTableData(tableName, append = false, baseUrl, translations, currentLang, updateSingleTable) {
-    if (!baseUrl) {
-        console.error('baseUrl is not defined');
-        return Promise.reject(new Error('baseUrl is not defined'));
-    }
-
-    if (isLoading[tableName]) return Promise.resolve();
-    isLoading[tableName] = true;
-
-    if (!tableChunks[tableName]) {
-        tableChunks[tableName] = {
-            start: 0,
-            end: ROWS_PER_LOAD
-        };
-    }
-
-    const offset = append ? tableChunks[tableName].end : tableChunks[tableName].start;
-
-    // Build URL with filter parameters if filters are active
+// Query parameters of a table's /data request with its active filters, sort and count strategy.
+// A page cursor from the previous response continues by keyset instead of offset.
+// Polled pages use the compact format (column names once, rows as arrays); see expandTableData.
+export function buildTableDataParams(tableName, offset = 0, cursor = null) {
     const filterParams = new URLSearchParams();
+    filterParams.append('format', 'compact');
     filterParams.append('limit', ROWS_PER_LOAD.toString());
-    filterParams.append('offset', offset.toString());
+    if (cursor) {
+        filterParams.append('cursor', cursor);
+    } else {
+        filterParams.append('offset', offset.toString());
+    }
+    appendCountStrategy(filterParams, tableName);
 
     // Get active filters for this table
     const allFilters = tableFilters.get(tableName) || {};
@@ -3190,34 +3179,92 @@ export function fetchTableData(tableName, append = false, baseUrl, translations,
         filterParams.append('sort_column', sortState.column);
         filterParams.append('sort_direction', sortState.direction);
     }
+    return filterParams;
+}
+
+// Turn the rows of a compact /data response back into the row objects the table code uses.
+// Idempotent, so a response kept for 304 revalidation can be passed in again.
+function expandTableData(data) {
+    if (data && data.format === 'compact' && Array.isArray(data.data)) {
+        const columns = data.columns;
+        data.data = data.data.map(values => {
+            const row = {};
+            for (let i = 0; i < columns.length; i++) row[columns[i]] = values[i];
+            return row;
+        });
+        data.format = 'objects';
+    }
+    return data;
+}
+
+// Render a first page pushed by the event stream (same as a non-append fetchTableData)
+export function applyStreamedTableData(tableName, data, currentLang, baseUrl) {
+    if (isLoading[tableName] || !data || !data.data) return;
+    expandTableData(data);
+    updateSingleTable(tableName, data, null, currentLang, fetchTableData, baseUrl);
+    tableChunks[tableName] = chunkState(data, data.data.length);
+}
+
+// Loaded range of a table; nextCursor continues keyset pagination, done means the last page is shown
+function chunkState(data, end) {
+    return {
+        start: 0,
+        end,
+        nextCursor: data.next_cursor || null,
+        done: data.pagination === 'keyset' && !data.next_cursor
+    };
+}
+
+export function fetchTableData(tableName, append = false, baseUrl, translations, currentLang, updateSingleTable) {
+    if (!baseUrl) {
+        console.error('baseUrl is not defined');
+        return Promise.reject(new Error('baseUrl is not defined'));
+    }
 
+    if (isLoading[tableName]) return Promise.resolve();
+
+    if (!tableChunks[tableName]) {
+        tableChunks[tableName] = {
+            start: 0,
+            end: ROWS_PER_LOAD
+        };
+    }
+    // Keyset pagination already reported the last page
+    if (append && tableChunks[tableName].done) return Promise.resolve();
+    isLoading[tableName] = true;
+
+    const offset = append ? tableChunks[tableName].end : tableChunks[tableName].start;
+    const cursor = append ? tableChunks[tableName].nextCursor : null;
+    const filterParams = buildTableDataParams(tableName, offset, cursor);
     const url = `${baseUrl}/data/${tableName}?${filterParams.toString()}`;
 
-    return fetch(url)
-        .then(response => {
-            if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
-            return response.json();
-        })
-        .then(data => {
+    return fetchJsonRevalidated(url)
+        .then(({ data, notModified }) => {
             if (!data || !data.data) {
                 throw new Error('Invalid data received from server');
             }
-            
+            expandTableData(data);
+
+            // Unchanged since the last poll: keep the rendered table as it is
+            const tableDiv = document.getElementById(tableName);
+            if (notModified && !append && tableDiv && tableDiv.querySelector('.body-table')) {
+                return;
+            }
+
             if (append) {
                 if (data.data.length > 0) {
                     appendTableData(tableName, data, translations, currentLang);
-                    tableChunks[tableName].end += data.data.length;
                 }
+                tableChunks[tableName] = chunkState(data, tableChunks[tableName].end + data.data.length);
             } else {
                 updateSingleTable(tableName, data, translations, currentLang, fetchTableData, baseUrl);
-                tableChunks[tableName] = {
-                    start: 0,
-                    end: data.data.length
-                };
+                tableChunks[tableName] = chunkState(data, data.data.length);
             }
         })
         .catch(error => {
             console.error(`Error fetching data for ${tableName}:`, error);
+            // A cursor from a different sort or filter is rejected; continue by offset instead
+            if (cursor && tableChunks[tableName]) tableChunks[tableName].nextCursor = null;
         })
         .finally(() => {
             isLoading[tableName] = false;
@@ -3274,7 +3321,7 @@ function appendTableData(tableName, tableInfo, translations, currentLang) {
 
     const countSpan = document.getElementById(`${tableName}_count`);
     if (countSpan) {
-        countSpan.textContent = `(${tableInfo.count} ${t('ui.rows')})`;
+        countSpan.textContent = formatRowCount(tableInfo.count, tableInfo.count_estimated);
     }
 
     const limitedInfoSpan = document.getElementById(`${tableName}_limited_info`);
@@ -3296,15 +3343,53 @@ function appendTableData(tableName, tableInfo, translations, currentLang) {
     }
 }
 
-// Modify the fetchTableCount function to prevent interference with sort state
-export function fetchTableCount(tableName, baseUrl, translations, currentLang) {
-    const url = `${baseUrl}/data/${tableName}?limit=1&offset=0`;
-    return fetch(url, {
-        method: 'GET',
+// Per-table row count strategy ('exact', 'hybrid' or 'estimate'), stored in a cookie.
+// Clicking a table's row count cycles through them; without a cookie the server default applies.
+const COUNT_STRATEGIES = ['exact', 'hybrid', 'estimate'];
+
+export function getCountStrategy(tableName) {
+    const strategy = getCookie(`count_strategy_${tableName}`);
+    return COUNT_STRATEGIES.includes(strategy) ? strategy : null;
+}
+
+function appendCountStrategy(params, tableName) {
+    const strategy = getCountStrategy(tableName);
+    if (strategy) {
+        params.append('count_strategy', strategy);
+    }
+}
+
+// Estimated counts are shown with a leading "~"
+function formatRowCount(count, estimated) {
+    return `(${estimated ? '~' : ''}${count} ${t('ui.rows')})`;
+}
+
+document.addEventListener('click', event => {
+    const countSpan = event.target.closest('span[id$="_count"]:not([id$="_button_count"])');
+    if (!countSpan || !countSpan.closest('.table-section')) return;
+    const tableName = countSpan.id.slice(0, -'_count'.length);
+    const current = getCountStrategy(tableName) || 'exact';
+    const next = COUNT_STRATEGIES[(COUNT_STRATEGIES.indexOf(current) + 1) % COUNT_STRATEGIES.length];
+    setCookie(`count_strategy_${tableName}`, next, 365);
+    countSpan.title = `Row count: ${next}`;
+    fetchTableCounts([tableName], window.baseUrl);
+});
+
+// Fetch the row counts of many tables with a single request to /data/counts.
+// Resolves to { tableName: count } (null for tables whose count failed).
+export function fetchTableCounts(tableNames, baseUrl) {
+    if (!tableNames.length) return Promise.resolve({});
+    return fetch(`${baseUrl}/data/counts`, {
+        method: 'POST',
         headers: {
             'Accept': 'application/json',
-            'Cache-Control': 'no-cache'
+            'Content-Type': 'application/json'
         },
+        body: JSON.stringify({
+            tables: tableNames,
+            count_strategies: Object.fromEntries(
+                tableNames.map(tableName => [tableName, getCountStrategy(tableName)]).filter(([, strategy]) => strategy))
+        })
     })
     .then(response => {
         if (!response.ok) {
@@ -3312,10 +3397,47 @@ export function fetchTableCount(tableName, baseUrl, translations, currentLang) {
         }
         return response.json();
     })
-    .then(data => {
+    .then(data => renderTableCounts(tableNames, data))
+    .catch(error => {
+        console.error('Error fetching table counts:', error);
+        return Object.fromEntries(tableNames.map(tableName => [tableName, null]));
+    });
+}
+
+// Show a /data/counts result; returns { tableName: count } (null for failed tables)
+export function renderTableCounts(tableNames, data) {
+    const counts = {};
+    tableNames.forEach(tableName => {
+        const countSpan = document.getElementById(`${tableName}_count`);
+        const count = data.counts[tableName];
+        if (count !== undefined) {
+            if (countSpan) {
+                const strategy = data.strategies[tableName] || 'exact';
+                countSpan.textContent = formatRowCount(count, strategy !== 'exact');
+                countSpan.title = `Row count: ${strategy}`;
+            }
+            counts[tableName] = count;
+        } else {
+            if (data.errors[tableName]) {
+                console.error(`Error fetching count for ${tableName}:`, data.errors[tableName]);
+            }
+            if (countSpan) countSpan.textContent = `(Error)`;
+            counts[tableName] = null;
+        }
+    });
+    return counts;
+}
+
+// Modify the fetchTableCount function to prevent interference with sort state
+export function fetchTableCount(tableName, baseUrl, translations, currentLang) {
+    const params = new URLSearchParams({ limit: '1', offset: '0' });
+    appendCountStrategy(params, tableName);
+    const url = `${baseUrl}/data/${tableName}?${params.toString()}`;
+    return fetchJsonRevalidated(url)
+    .then(({ data }) => {
         const countSpan = document.getElementById(`${tableName}_count`);
         if (data.count !== undefined) {
-            countSpan.textContent = `(${data.count} ${t('ui.rows')})`;
+            countSpan.textContent = formatRowCount(data.count, data.count_estimated);
             return data.count;
         } else {
             countSpan.textContent = `(0 ${t('ui.rows')})`;
@@ -4302,6 +4424,7 @@ async function applyDatabaseSort(table) {
         const params = new URLSearchParams();
         params.append('limit', '50');
         params.append('offset', '0');
+        appendCountStrategy(params, tableId);
 
         // Add filter parameters
         Object.entries(allFilters).forEach(([columnName, selectedValues]) => {
@@ -4332,8 +4455,7 @@ async function applyDatabaseSort(table) {
             // Reset chunk tracking for sorted data
             if (typeof tableChunks !== 'undefined' && tableChunks[tableId]) {
                 tableChunks[tableId] = {
-                    start: 0,
-                    end: data.data.length,
+                    ...chunkState(data, data.data.length),
                     isFiltered: Object.keys(allFilters).length > 0,
                     isSorted: sortState.column !== null
                 };
@@ -4466,6 +4588,7 @@ async function applyDatabaseFilter(table) {
         const filterParams = new URLSearchParams();
         filterParams.append('limit', '50');
         filterParams.append('offset', '0');
+        appendCountStrategy(filterParams, tableId);
 
         // Add filter parameters
         Object.entries(allFilters).forEach(([columnName, selectedValues]) => {
@@ -4490,8 +4613,7 @@ async function applyDatabaseFilter(table) {
             // Reset chunk tracking for filtered data
             if (typeof tableChunks !== 'undefined' && tableChunks[tableId]) {
                 tableChunks[tableId] = {
-                    start: 0,
-                    end: data.data.length,
+                    ...chunkState(data, data.data.length),
                     isFiltered: Object.keys(allFilters).length > 0
                 };
             }
@@ -497,3 +497,39 @@ export async function checkConnection(baseUrl, updateConnectionStatus) {
         return false;
     }
 }
+
+// Conditional GET: remember the ETag and body of JSON responses so polls of
+// unchanged tables come back as an empty 304 instead of the full payload
+const ETAG_CACHE_LIMIT = 200;
+const etagCache = new Map(); // url -> { etag, data }
+
+export async function fetchJsonRevalidated(url, options = {}) {
+    const cached = etagCache.get(url);
+    const headers = { 'Accept': 'application/json', ...(options.headers || {}) };
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+
+    // Revalidation is handled here, so bypass the browser's HTTP cache
+    const response = await fetch(url, { ...options, headers, cache: 'no-store' });
+    if (response.status === 304 && cached) {
+        // Refresh the entry's position so frequently polled URLs stay cached
+        etagCache.delete(url);
+        etagCache.set(url, cached);
+        return { data: cached.data, notModified: true };
+    }
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    etagCache.delete(url);
+    if (etag) {
+        etagCache.set(url, { etag, data });
+        if (etagCache.size > ETAG_CACHE_LIMIT) {
+            etagCache.delete(etagCache.keys().next().value);
+        }
+    }
+    return { data, notModified: false };
+}
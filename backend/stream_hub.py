@@ -0,0 +1,286 @@
+"""
+Server-sent event fan-out for the monitoring dashboard.
+
+Every browser tab opens one event stream and subscribes it to a set of
+views (a table page with its filters and sort, or the row counts of the
+table list). Views are keyed by what they query, not by who asks, so each
+distinct view is polled by exactly one ViewPoller however many tabs watch
+it; a changed result is serialized once and pushed to all subscribers.
+A poller stops as soon as its last subscriber leaves, so idle views cost
+no database work.
+
+When a change feed is active for a database (see set_change_driven), its
+pollers stop polling on a timer and only re-query after notify_change()
+reports a write to one of the tables the view reads.
+"""
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from row_serializer import dumps
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event, data):
+    """Encode one server-sent event"""
+    lines = '\n'.join(f'data: {line}' for line in data.split('\n'))
+    return f'event: {event}\n{lines}\n\n'
+
+
+class StreamClient:
+    """
+    One open event stream. Pending messages are conflated per view, so a
+    slow client only ever receives the latest state of each view.
+    """
+
+    def __init__(self, session_token, context, interval):
+        self.id = secrets.token_urlsafe(16)
+        self.session_token = session_token
+        self.context = context
+        self.interval = interval
+        self.views = {}   # view_id -> poller key
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def push(self, view_id, event, data):
+        with self._cond:
+            self._pending.pop(view_id, None)
+            self._pending[view_id] = format_event(event, data)
+            self._cond.notify()
+
+    def next_messages(self, timeout):
+        """Wait up to timeout seconds; returns the pending events (possibly none)"""
+        with self._cond:
+            if not self._pending and not self._closed:
+                self._cond.wait(timeout)
+            messages = list(self._pending.values())
+            self._pending.clear()
+            return messages
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class ViewPoller:
+    """
+    Polls one view on a background thread for as long as it has subscribers.
+
+    poll() returns (version, render): version changes whenever the result
+    does, and render() builds the JSON-serializable payload. render() is only
+    called for new versions, so unchanged views are never re-serialized.
+    """
+
+    def __init__(self, hub, key, poll, tables=None):
+        self.hub = hub
+        self.key = key
+        self.tables = frozenset(tables) if tables is not None else None
+        self._poll = poll
+        self._subscribers = {}   # (client, view_id) -> None
+        self._version = None
+        self._payload = None
+        self._error = None
+        self._wake = threading.Event()
+        self._changed = False
+        self._thread = threading.Thread(target=self._run, name='udbm-stream-poller', daemon=True)
+        self.polls = 0
+        self.pushes = 0
+
+    def start(self):
+        self._thread.start()
+
+    def subscribe(self, client, view_id):
+        """Add a subscriber (hub lock held); it gets the last known state straight away"""
+        self._subscribers[(client, view_id)] = None
+        if self._payload is not None:
+            client.push(view_id, 'data', self._message(view_id, self._payload))
+        self._wake.set()
+
+    def unsubscribe(self, client, view_id):
+        """Remove a subscriber (hub lock held); returns True when none are left"""
+        self._subscribers.pop((client, view_id), None)
+        if not self._subscribers:
+            self._wake.set()
+            return True
+        return False
+
+    def notify_change(self):
+        """Mark the view as stale and wake the poller"""
+        self._changed = True
+        self._wake.set()
+
+    @staticmethod
+    def _message(view_id, payload):
+        # The payload is serialized once per version; only the view id differs per subscriber
+        return f'{{"view": {json.dumps(view_id)}, "payload": {payload}}}'
+
+    def _interval(self):
+        with self.hub.lock:
+            intervals = [client.interval for client, _ in self._subscribers]
+        return max(self.hub.min_interval, min(intervals)) if intervals else None
+
+    def _wait_for_change(self, interval, started):
+        """
+        Change-driven mode: sleep until a change is reported (or the optional
+        safety refresh is due), then keep at least one interval between polls
+        so a burst of writes costs one query. Returns False when unsubscribed.
+        """
+        refresh = self.hub.change_refresh
+        while not self._changed:
+            if self._interval() is None:
+                return False
+            if not self.hub.is_change_driven(self.key[0]):
+                return True
+            remaining = refresh - (time.monotonic() - started) if refresh else None
+            if remaining is not None and remaining <= 0:
+                return True
+            self._wake.clear()
+            if not self._changed:
+                self._wake.wait(remaining)
+        delay = interval - (time.monotonic() - started)
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def _run(self):
+        while True:
+            interval = self._interval()
+            if interval is None:
+                return
+            started = time.monotonic()
+            self._changed = False
+            try:
+                version, render = self._poll()
+                self.polls += 1
+                if version != self._version:
+                    self._publish('data', dumps(render()).decode('utf-8'), version=version)
+            except Exception as e:
+                self.polls += 1
+                message = str(e)
+                if message != self._error:
+                    logger.warning(f"Stream view {self.key[1:]} failed: {message}")
+                    self._publish('view_error', json.dumps({'error': message}), error=message)
+            if self.hub.is_change_driven(self.key[0]) and self._error is None:
+                if not self._wait_for_change(interval, started):
+                    return
+                continue
+            self._wake.clear()
+            self._wake.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def _publish(self, event, payload, version=None, error=None):
+        # State and subscriber snapshot change together, so a client subscribing
+        # concurrently gets either this payload on subscribe or through the fan-out
+        with self.hub.lock:
+            self._version, self._error = version, error
+            self._payload = payload if event == 'data' else None
+            subscribers = list(self._subscribers)
+        for client, view_id in subscribers:
+            client.push(view_id, event, self._message(view_id, payload))
+        self.pushes += 1
+
+    def stats(self):
+        with self.hub.lock:
+            subscribers = len(self._subscribers)
+        return {'view': list(self.key[1:]), 'subscribers': subscribers, 'polls': self.polls,
+                'pushes': self.pushes, 'error': self._error,
+                'change_driven': self.hub.is_change_driven(self.key[0])}
+
+
+class StreamHub:
+    """Registry of open streams and the pollers behind their views"""
+
+    def __init__(self, min_interval=0.5, heartbeat=15.0, change_refresh=0):
+        self.min_interval = min_interval
+        self.heartbeat = heartbeat
+        self.change_refresh = change_refresh   # seconds between safety polls in change-driven mode; 0 = never
+        self.lock = threading.RLock()
+        self._clients = {}
+        self._pollers = {}
+        self._change_driven = set()
+
+    def connect(self, session_token, context, interval):
+        client = StreamClient(session_token, context, max(self.min_interval, interval))
+        with self.lock:
+            self._clients[client.id] = client
+        return client
+
+    def client(self, client_id):
+        return self._clients.get(client_id)
+
+    def set_views(self, client, views):
+        """
+        Replace a client's subscriptions. views: {view_id: (key, poll, tables)}
+        where key identifies what the view queries (starting with the database
+        fingerprint), poll is used only if no poller exists yet for that key,
+        and tables names the tables it reads (None: any table).
+        """
+        with self.lock:
+            for view_id, key in list(client.views.items()):
+                if views.get(view_id, (None,))[0] != key:
+                    self._unsubscribe(client, view_id, key)
+            for view_id, (key, poll, tables) in views.items():
+                if client.views.get(view_id) == key:
+                    continue
+                poller = self._pollers.get(key)
+                if poller is None:
+                    poller = ViewPoller(self, key, poll, tables)
+                    self._pollers[key] = poller
+                    poller.start()
+                poller.subscribe(client, view_id)
+                client.views[view_id] = key
+
+    def _unsubscribe(self, client, view_id, key):
+        client.views.pop(view_id, None)
+        poller = self._pollers.get(key)
+        if poller is not None and poller.unsubscribe(client, view_id):
+            # Last subscriber gone: the poller thread exits on its next wake-up
+            del self._pollers[key]
+
+    def disconnect(self, client):
+        client.close()
+        with self.lock:
+            for view_id, key in list(client.views.items()):
+                self._unsubscribe(client, view_id, key)
+            self._clients.pop(client.id, None)
+
+    def set_change_driven(self, fingerprint, enabled):
+        """Switch a database's pollers between timed polling and change notifications"""
+        with self.lock:
+            if enabled:
+                self._change_driven.add(fingerprint)
+            else:
+                self._change_driven.discard(fingerprint)
+            pollers = [p for key, p in self._pollers.items() if key[0] == fingerprint]
+        for poller in pollers:
+            # Re-poll once so nothing written during the switch is missed
+            poller.notify_change()
+
+    def is_change_driven(self, fingerprint):
+        return fingerprint in self._change_driven
+
+    def notify_change(self, fingerprint, table_name=None):
+        """Wake the pollers reading table_name (every poller of the database when None)"""
+        with self.lock:
+            pollers = [p for key, p in self._pollers.items()
+                       if key[0] == fingerprint
+                       and (table_name is None or p.tables is None or table_name in p.tables)]
+        for poller in pollers:
+            poller.notify_change()
+        return len(pollers)
+
+    def stats(self):
+        with self.lock:
+            pollers = list(self._pollers.values())
+            clients = len(self._clients)
+        return {'clients': clients, 'change_driven': len(self._change_driven),
+                'pollers': [poller.stats() for poller in pollers]}
@@ -0,0 +1,145 @@
+"""
+Captures a binlog fixture from a real MySQL 8 server for test_binlog_cdc.py.
+
+Runs the same workload binlog_fixture.py encodes by hand against a scratch
+server, copies the binlog files it produced with `mysqlbinlog --raw`, and
+writes expected.json next to them. The expectations come from the server
+and the client, never from binlog_cdc:
+
+- events:  SHOW BINLOG EVENTS of every copied file (type, start and end
+           position), so commit positions are the server's own
+- changes: the workload's statements with the row counts the server
+           reported for them (cursor.rowcount)
+
+The server needs binlog_format=ROW and binlog checksums (the 8.0 defaults);
+the user needs CREATE, DROP, RELOAD, REPLICATION CLIENT and REPLICATION
+SLAVE. The schemas udbm_fixture_shop and udbm_fixture_other are dropped and
+recreated. Use a scratch server: FLUSH BINARY LOGS rotates its logs.
+
+    python tests/capture_binlog_fixture.py --host 127.0.0.1 --user root \\
+        --password secret --output tests/fixtures/binlog-mysql8
+"""
+import argparse
+import json
+import os
+import subprocess
+
+import mysql.connector
+
+SHOP = 'udbm_fixture_shop'
+OTHER = 'udbm_fixture_other'
+
+ORDERS = """
+    CREATE TABLE orders (
+        id INT PRIMARY KEY,
+        name VARCHAR(300) CHARACTER SET utf8mb4,
+        price DECIMAL(10,2),
+        created DATETIME(3),
+        code CHAR(10),
+        doc JSON,
+        bits BIT(10),
+        kind ENUM('a', 'b', 'c'),
+        note TEXT NULL
+    )
+"""
+ORDER_ROW = "(%s, %s, 2.61, '2024-05-06 07:08:09.123', 'abc', '{\"a\": 1}', b'0111111111', 'b', %s)"
+
+
+def binlog_status(cursor):
+    try:
+        cursor.execute("SHOW BINARY LOG STATUS")  # MySQL 8.2+
+    except mysql.connector.Error:
+        cursor.execute("SHOW MASTER STATUS")
+    row = cursor.fetchall()[0]
+    return row[0], int(row[1])
+
+
+def run_workload(connection):
+    """Run the workload; returns the changes of SHOP in commit order: [[table, operation, rows]]"""
+    cursor = connection.cursor()
+    changes = []
+
+    def execute(table, operation, sql, params=()):
+        cursor.execute(sql, params)
+        changes.append([table, operation, cursor.rowcount if operation != 'TRUNCATE' else None])
+
+    cursor.execute(f"USE {SHOP}")
+    execute('orders', 'INSERT', f"INSERT INTO orders VALUES {', '.join([ORDER_ROW] * 3)}",
+            (1, 'a' * 300, None, 2, 'b', 'hello', 3, 'c', None))
+    execute('audit', 'INSERT', "INSERT INTO audit VALUES (5)")
+    connection.commit()
+
+    # Minimal row images: the before image holds the primary key, the after image the changed column
+    cursor.execute("SET SESSION binlog_row_image = 'MINIMAL'")
+    execute('orders', 'UPDATE', "UPDATE orders SET name = CASE id WHEN 1 THEN 'zz' ELSE 'yy' END WHERE id IN (1, 2)")
+    execute('orders', 'DELETE', "DELETE FROM orders WHERE id = 3")
+    connection.commit()
+    cursor.execute("SET SESSION binlog_row_image = 'FULL'")
+
+    cursor.execute(f"INSERT INTO {OTHER}.orders VALUES {ORDER_ROW}", (9, 'x', None))
+    connection.commit()
+
+    cursor.execute("FLUSH BINARY LOGS")
+    execute('orders', 'TRUNCATE', "TRUNCATE TABLE orders")
+    execute('orders', 'INSERT', f"INSERT INTO orders VALUES {ORDER_ROW}", (10, 'n', None))
+    connection.commit()
+    cursor.close()
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--mysqlbinlog', default='mysqlbinlog', help='mysqlbinlog executable')
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         'fixtures', 'binlog-mysql8'))
+    args = parser.parse_args()
+
+    connection = mysql.connector.connect(host=args.host, port=args.port, user=args.user, password=args.password,
+                                         autocommit=False)
+    cursor = connection.cursor()
+    cursor.execute("SELECT @@version, @@binlog_format, @@binlog_checksum")
+    version, binlog_format, checksum = cursor.fetchone()
+    if binlog_format != 'ROW':
+        raise SystemExit(f'binlog_format is {binlog_format}, the fixture needs ROW')
+
+    for schema in (SHOP, OTHER):
+        cursor.execute(f"DROP DATABASE IF EXISTS {schema}")
+        cursor.execute(f"CREATE DATABASE {schema}")
+        cursor.execute(f"USE {schema}")
+        cursor.execute(ORDERS)
+    cursor.execute(f"CREATE TABLE {SHOP}.audit (id INT)")
+    # Start the fixture on a fresh file, after the setup DDL
+    cursor.execute("FLUSH BINARY LOGS")
+    first_file, _ = binlog_status(cursor)
+
+    changes = run_workload(connection)
+    last_file, _ = binlog_status(cursor)
+    cursor.execute("FLUSH BINARY LOGS")
+
+    cursor.execute("SHOW BINARY LOGS")
+    names = [row[0] for row in cursor.fetchall()]
+    files = names[names.index(first_file):names.index(last_file) + 1]
+    events = {}
+    for name in files:
+        cursor.execute(f"SHOW BINLOG EVENTS IN '{name}'")
+        # Log_name, Pos, Event_type, Server_id, End_log_pos, Info
+        events[name] = [[row[2], int(row[1]), int(row[4]), row[5]] for row in cursor.fetchall()]
+    cursor.close()
+    connection.close()
+
+    os.makedirs(args.output, exist_ok=True)
+    subprocess.run([args.mysqlbinlog, '--read-from-remote-server', '--raw', f'--host={args.host}',
+                    f'--port={args.port}', f'--user={args.user}', f'--password={args.password}',
+                    f'--result-file={args.output}{os.sep}', *files], check=True)
+    with open(os.path.join(args.output, 'expected.json'), 'w') as handle:
+        json.dump({'server_version': version, 'binlog_checksum': checksum, 'schema': SHOP,
+                   'files': files, 'events': events, 'changes': changes}, handle, indent=1)
+    print(f'Captured {len(files)} binlog files from MySQL {version} into {args.output}')
+
+
+if __name__ == '__main__':
+    main()
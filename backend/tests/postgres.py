@@ -0,0 +1,28 @@
+"""
+Scratch PostgreSQL database for the tests that need a server.
+
+Set UDBM_TEST_POSTGRES to a libpq connection string, e.g.
+
+    UDBM_TEST_POSTGRES="host=127.0.0.1 user=postgres password=secret dbname=udbm_test"
+
+The tests create and drop their own tables there. Without it (or without
+psycopg2) they are skipped.
+"""
+import os
+import unittest
+
+DSN = os.environ.get('UDBM_TEST_POSTGRES', '')
+
+
+def connect():
+    """A new connection to the test database; skips the calling test when there is none"""
+    if not DSN:
+        raise unittest.SkipTest('UDBM_TEST_POSTGRES is not set')
+    try:
+        import psycopg2
+    except ImportError:
+        raise unittest.SkipTest('psycopg2 is not installed')
+    try:
+        return psycopg2.connect(DSN)
+    except psycopg2.OperationalError as e:
+        raise unittest.SkipTest(f'PostgreSQL is not reachable: {e}')
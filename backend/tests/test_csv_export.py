@@ -0,0 +1,114 @@
+"""
+PostgreSQL CSV exports must not depend on the path that wrote them: the
+COPY fast path and the row-by-row fallback are compared byte for byte on
+rows mixing the types whose text differs between the server and Python.
+
+Needs a scratch PostgreSQL database (see postgres.py):
+
+    cd backend && UDBM_TEST_POSTGRES="..." python -m unittest tests.test_csv_export
+"""
+import csv
+import io
+import os
+import sys
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, 'tests'))
+
+from postgres import connect  # noqa: E402
+
+TABLE = 'udbm_test_csv_export'
+COLUMNS = """
+    id integer PRIMARY KEY,
+    flag boolean,
+    price numeric(10, 2),
+    tiny numeric,
+    ratio real,
+    score double precision,
+    seen timestamptz,
+    created timestamp,
+    day date,
+    at time,
+    doc json,
+    docb jsonb,
+    ids integer[],
+    tags text[],
+    raw bytea,
+    note text,
+    label varchar(20)
+"""
+ROWS = [
+    "(1, true, 12.50, 0.0000001, 0.1, 1e20, '2024-05-06 07:08:09.12+02', '2024-05-06 07:08:09.5', "
+    "'2024-05-06', '07:08:09.25', '{\"b\": 1,  \"a\": [1, 2]}', '{\"b\": 1, \"a\": \"x\"}', '{1,2,3}', "
+    "'{\"a b\",c}', '\\x00ff', '', 'say \"hi\", then\nleave')",
+    "(2, false, NULL, 'NaN', 'Infinity', -0.5, '2024-05-06 07:08:09+00', '2024-05-06 07:08:09', "
+    "'2024-05-06', '07:08:09', '\"text\"', 'null', '{}', '{NULL}', '', NULL, NULL)",
+    "(3, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL)",
+]
+
+
+class CsvExportPathsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.connection = connect()
+        import monitor
+        cls.monitor = monitor
+        with cls.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cursor.execute(f"CREATE TABLE {TABLE} ({COLUMNS})")
+            cursor.execute(f"INSERT INTO {TABLE} VALUES {', '.join(ROWS)}")
+        cls.connection.commit()
+        cls.metadata = monitor.load_table_metadata(cls.connection, 'postgresql', TABLE)
+        cls.connection.rollback()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cls.connection.commit()
+        cls.connection.close()
+
+    def export(self, copy, args):
+        monitor = self.monitor
+        saved, monitor.EXPORT_COPY = monitor.EXPORT_COPY, copy
+        try:
+            reader, chunks = monitor.open_csv_export(self.connection, self.metadata, 'postgresql', args)
+            try:
+                return b''.join(chunks)
+            finally:
+                reader.close()
+        finally:
+            monitor.EXPORT_COPY = saved
+            self.connection.rollback()
+
+    def test_copy_and_row_by_row_write_the_same_bytes(self):
+        for args in ({}, {'sort_column': 'score', 'sort_direction': 'asc'}):
+            with self.subTest(args=args):
+                copied = self.export(True, args)
+                self.assertEqual(self.export(False, args), copied)
+
+    def rows(self, args):
+        return list(csv.reader(io.StringIO(self.export(True, args).decode(), newline='')))
+
+    def test_values(self):
+        header, first, second, third = self.rows({'sort_column': 'id', 'sort_direction': 'asc'})
+        self.assertEqual(header, [column['name'] for column in self.metadata.columns])
+        values = dict(zip(header, first))
+        self.assertEqual([values[name] for name in ('flag', 'price', 'tiny', 'ratio', 'score')],
+                         ['True', '12.50', '0.0000001', '0.1', '1e+20'])
+        self.assertEqual(values['doc'], '{"b": 1,  "a": [1, 2]}')  # json keeps its own text
+        self.assertEqual((values['ids'], values['raw']), ('{1,2,3}', '\\x00ff'))
+        self.assertEqual(values['note'], '')  # empty text is an empty field, like NULL
+        self.assertEqual(values['label'], 'say "hi", then\nleave')
+        self.assertEqual(dict(zip(header, second))['flag'], 'False')
+        self.assertEqual(third, ['3'] + [''] * (len(header) - 1))
+
+    def test_sort_uses_the_column_type(self):
+        # score is cast to text in the select list; sorting must still be numeric
+        rows = self.rows({'sort_column': 'score', 'sort_direction': 'asc'})
+        self.assertEqual([row[0] for row in rows[1:]], ['2', '1', '3'])
+
+if __name__ == '__main__':
+    unittest.main()
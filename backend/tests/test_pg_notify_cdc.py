@@ -0,0 +1,138 @@
+"""
+Change capture through PostgreSQL LISTEN/NOTIFY (pg_notify_cdc.py): trigger
+installation, the payloads sent for each kind of write, delivery through a
+PgChangeListener, and removal of the triggers.
+
+Needs a scratch PostgreSQL database (see postgres.py); only the payload
+parsing runs without one:
+
+    cd backend && UDBM_TEST_POSTGRES="..." python -m unittest tests.test_pg_notify_cdc
+"""
+import json
+import os
+import queue
+import select
+import sys
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, 'tests'))
+
+from postgres import connect  # noqa: E402
+
+TABLES = ['udbm_test_cdc_orders', 'udbm_test_cdc_audit']
+CHANNEL = 'udbm_test_changes'
+
+
+class ParsePayloadTest(unittest.TestCase):
+    def test_payloads(self):
+        from pg_notify_cdc import parse_payload
+        self.assertEqual(parse_payload('{"table": "orders", "op": "INSERT"}'), ('orders', 'INSERT'))
+        self.assertEqual(parse_payload('orders'), ('orders', None))  # a bare table name from another tool
+        self.assertEqual(parse_payload(''), (None, None))
+
+
+class PgNotifyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.connection = connect()
+        import pg_notify_cdc
+        cls.cdc = pg_notify_cdc
+        with cls.connection.cursor() as cursor:
+            for table_name in TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+                cursor.execute(f"CREATE TABLE {table_name} (id integer PRIMARY KEY, note text)")
+        cls.connection.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.connection.cursor() as cursor:
+            for table_name in TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        cls.connection.commit()
+        cls.connection.close()
+
+    def setUp(self):
+        self.write(f"TRUNCATE {', '.join(TABLES)}")
+        self.addCleanup(self.cdc.uninstall_triggers, self.connection, TABLES)
+        self.addCleanup(self.connection.rollback)
+
+    def write(self, *statements):
+        with self.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        self.connection.commit()
+
+    def test_install_and_uninstall(self):
+        cdc = self.cdc
+        result = cdc.install_triggers(self.connection, TABLES + ['udbm_test_cdc_missing'], CHANNEL)
+        self.assertEqual(result['installed'], TABLES)
+        self.assertEqual(list(result['failed']), ['udbm_test_cdc_missing'])
+        self.assertEqual(cdc.triggered_tables(self.connection) & set(TABLES), set(TABLES))
+
+        # Installing again leaves the existing triggers alone
+        result = cdc.install_triggers(self.connection, TABLES, CHANNEL)
+        self.assertEqual((result['installed'], result['existing']), ([], TABLES))
+
+        self.assertEqual(cdc.uninstall_triggers(self.connection, TABLES[:1]), TABLES[:1])
+        self.assertEqual(cdc.triggered_tables(self.connection) & set(TABLES), set(TABLES[1:]))
+        self.assertEqual(cdc.uninstall_triggers(self.connection, TABLES), TABLES[1:])
+        self.assertEqual(cdc.triggered_tables(self.connection) & set(TABLES), set())
+
+    def test_notify_payloads(self):
+        self.cdc.install_triggers(self.connection, TABLES, CHANNEL)
+        listener = connect()
+        self.addCleanup(listener.close)
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+        orders = TABLES[0]
+        self.write(f"INSERT INTO {orders} VALUES (1, 'a'), (2, 'b'), (3, 'c')")
+        self.write(f"UPDATE {orders} SET note = 'z'")
+        self.write(f"DELETE FROM {orders} WHERE id = 3")
+        self.write(f"TRUNCATE {orders}")
+        # Statement-level triggers: one notification per statement, not per row
+        self.write(f"INSERT INTO {orders} VALUES (4, 'd')", f"INSERT INTO {orders} VALUES (5, 'e')")
+
+        payloads = []
+        while len(payloads) < 5 and select.select([listener], [], [], 5) != ([], [], []):
+            listener.poll()
+            payloads += [json.loads(notify.payload) for notify in listener.notifies
+                         if notify.channel == CHANNEL]
+            listener.notifies.clear()
+        self.assertEqual(payloads, [{'table': orders, 'op': op}
+                                    for op in ('INSERT', 'UPDATE', 'DELETE', 'TRUNCATE', 'INSERT')])
+
+    def test_listener_delivery(self):
+        cdc = self.cdc
+        cdc.install_triggers(self.connection, TABLES, CHANNEL)
+        changes, statuses = queue.Queue(), queue.Queue()
+        listener = cdc.PgChangeListener(connect, lambda table_name, op: changes.put((table_name, op)),
+                                        statuses.put, channel=CHANNEL, name='udbm-test-listener')
+        listener.start()
+        self.assertTrue(statuses.get(timeout=5))
+
+        orders, audit = TABLES
+        self.write(f"INSERT INTO {orders} VALUES (1, 'a')", f"INSERT INTO {audit} VALUES (1, 'a')")
+        self.write(f"UPDATE {audit} SET note = 'b'")
+        self.write(f"DELETE FROM {orders}")
+        received = [changes.get(timeout=5) for _ in range(4)]
+        self.assertEqual(received, [(orders, 'INSERT'), (audit, 'INSERT'), (audit, 'UPDATE'), (orders, 'DELETE')])
+
+        # Without the triggers, writes are no longer reported
+        cdc.uninstall_triggers(self.connection, TABLES)
+        self.write(f"INSERT INTO {orders} VALUES (2, 'b')")
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, 'marker')", (CHANNEL,))
+        self.connection.commit()
+        self.assertEqual(changes.get(timeout=5), ('marker', None))
+
+        listener.stop()
+        self.assertFalse(statuses.get(timeout=5))
+        self.assertEqual(listener.stats()['notifications'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()